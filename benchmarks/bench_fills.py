@@ -0,0 +1,60 @@
+"""Overhead of fill models in the vectorized backtester
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fills --symbols 20 --bars 100000 --max-overhead 1.5
+
+Backtests a synthetic universe with random buy/sell signals three ways:
+close fills at no cost, the default FillModel and the nse_delivery preset
+(next-open fills, intrabar stops, costs, spread and volume impact), the
+last including FillModel.prepare. Prints the time of each and exits
+non-zero if nse_delivery takes more than --max-overhead times the
+cost-free run.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_universe
+from modules.backtester import simulate_trades
+from modules.fills import FillModel
+
+def backtest_all(inputs, model):
+    trades = pnl = 0
+    for df, buy, sell in inputs:
+        fills = model.prepare(df) if model is not None else None
+        out = simulate_trades(df['close'].to_numpy(), buy, sell, 100000, fills=fills)
+        trades += len(out['pnl'])
+        pnl += out['pnl'].sum()
+    return trades, pnl
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--buy-rate", type=float, default=0.05, help="share of bars with a buy signal")
+    parser.add_argument("--sell-rate", type=float, default=0.05)
+    parser.add_argument("--max-overhead", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    inputs = [(df, rng.random(args.bars) < args.buy_rate, rng.random(args.bars) < args.sell_rate)
+              for df in synthetic_universe(args.symbols, args.bars, freq="min").values()]
+
+    timings = {}
+    for name, model in (("none", None), ("frictionless", FillModel()),
+                        ("nse_delivery", FillModel.preset("nse_delivery"))):
+        start = time.perf_counter()
+        trades, pnl = backtest_all(inputs, model)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:<13} {timings[name]:7.3f}s  trades={trades:,}  pnl={pnl:,.0f}")
+
+    overhead = timings["nse_delivery"] / timings["none"]
+    print(f"symbols={args.symbols} bars={args.bars:,} nse_delivery overhead={overhead:.2f}x "
+          f"(max {args.max_overhead:.2f}x)")
+    return 0 if overhead <= args.max_overhead else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Monte Carlo benchmark for the robustness engine
+
+Run from the repository root:
+
+    python -m benchmarks.bench_robustness --symbols 50 --paths 10000 --budget-s 60
+
+Backtests a synthetic universe (five years of daily bars per symbol),
+turns each trade log into per-bar returns and simulates --paths paths per
+symbol with run_robustness, spread over --n-jobs processes. Prints the
+throughput and the median spread across symbols. Exits non-zero if the
+simulation takes longer than the budget.
+"""
+import argparse
+import sys
+import time
+import warnings
+
+from benchmarks.synthetic import synthetic_universe
+from modules.backtester import backtest_strategy
+from modules.robustness import bar_returns, run_robustness
+from modules.strategy import calculate_indicators, generate_signals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=1_250)
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--method", default="block_bootstrap",
+                        choices=["block_bootstrap", "trade_reshuffle", "trade_bootstrap"])
+    parser.add_argument("--block-size", type=int, default=20)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--budget-s", type=float, default=60.0)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    inputs = {}
+    for symbol, df in synthetic_universe(args.symbols, args.bars).items():
+        signals = generate_signals(calculate_indicators(df))
+        trades = backtest_strategy(signals, symbol, 100000)
+        inputs[symbol] = (bar_returns(signals['close'], trades), trades)
+
+    start = time.perf_counter()
+    table = run_robustness(inputs, args.method, n_paths=args.paths, block_size=args.block_size,
+                           n_jobs=args.n_jobs)
+    wall = time.perf_counter() - start
+
+    medians = table.groupby('metric')[['p5', 'p50', 'p95']].median()
+    print(f"symbols={args.symbols} paths={args.paths} method={args.method} "
+          f"wall={wall:.2f}s ({args.symbols * args.paths / wall:,.0f} paths/s) budget={args.budget_s:.1f}s")
+    print(medians.to_string(float_format=lambda v: f"{v:,.3f}"))
+    return 0 if wall <= args.budget_s else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
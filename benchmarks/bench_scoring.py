@@ -0,0 +1,78 @@
+"""Latency benchmark for UniverseScorer.score_frames
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scoring --symbols 500 --budget-ms 200
+
+Fits a handful of RandomForest models with the production settings on
+synthetic bars, assigns them round-robin to N symbols and times one
+scoring call for the whole universe, from the symbols' OHLCV frames:
+building the latest feature rows and scoring them. Exits non-zero if the
+median call exceeds the budget.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.synthetic import synthetic_ohlcv
+from modules.ml_model import FEATURES, MODEL_PARAMS, prepare_features
+from modules.scoring import UniverseScorer, latest_feature_row
+from modules.strategy import calculate_indicators
+
+def synthetic_features(n, seed):
+    return prepare_features(calculate_indicators(synthetic_ohlcv(n, seed=seed)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--models", type=int, default=8, help="distinct fitted models to reuse")
+    parser.add_argument("--bars", type=int, default=1250)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=200.0)
+    args = parser.parse_args(argv)
+
+    fitted = []
+    for seed in range(args.models):
+        feats = synthetic_features(args.bars, seed)
+        model = RandomForestClassifier(**MODEL_PARAMS)
+        model.fit(feats[FEATURES].to_numpy(), feats['target'].to_numpy())
+        fitted.append(model)
+
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    bundles = {symbol: {'model': fitted[i % args.models], 'features': FEATURES}
+               for i, symbol in enumerate(symbols)}
+    frames = {symbol: synthetic_ohlcv(args.bars, seed=i) for i, symbol in enumerate(symbols)}
+    start = time.perf_counter()
+    scorer = UniverseScorer(bundles)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    timings, feature_timings = [], []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        X = scorer.feature_matrix(frames)
+        built = time.perf_counter()
+        scorer.score(X)
+        timings.append((time.perf_counter() - start) * 1000)
+        feature_timings.append((built - start) * 1000)
+
+    # Reference: one feature row and one predict_proba call per symbol
+    start = time.perf_counter()
+    for i, symbol in enumerate(symbols):
+        row = latest_feature_row(frames[symbol], FEATURES)
+        fitted[i % args.models].predict_proba(row[None, :])
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    median = statistics.median(timings)
+    trees = sum(len(m.estimators_) for m in fitted) * args.symbols // args.models
+    print(f"symbols={args.symbols} trees={trees} compile={compile_ms:.1f}ms "
+          f"score median={median:.1f}ms (features {statistics.median(feature_timings):.1f}ms) "
+          f"min={min(timings):.1f}ms budget={args.budget_ms:.0f}ms "
+          f"| per-symbol features + predict_proba loop={loop_ms:.0f}ms")
+    return 0 if median <= args.budget_ms else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
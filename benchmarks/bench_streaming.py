@@ -0,0 +1,86 @@
+"""Replay benchmark for the streaming runner
+
+Run from the repository root:
+
+    python -m benchmarks.bench_streaming --symbols 50 --budget-s 5
+
+Writes one trading day of synthetic minute bars (375 per symbol, 09:15 to
+15:30) to a replay file, pushes it through StreamingRunner and reports
+throughput and per-event latency. --ticks N replays N trades per bar
+instead, so bars are built by the aggregator; --socket sends the file over
+a local TCP socket. Exits non-zero if the replay takes longer than the
+budget.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_universe
+from modules.streaming import (StreamingRunner, TRADE_FIELDS, replay_file, serve_replay,
+                               socket_feed, write_replay)
+
+BARS_PER_DAY = 375
+
+def write_ticks(path, frames, ticks, seed=0):
+    """Spread each bar into ticks trades inside its minute, ending at the close"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for symbol, df in frames.items():
+        n = len(df)
+        offsets = np.sort(rng.integers(0, 60 * 10**9, (n, ticks)), axis=1)
+        prices = df['low'].to_numpy()[:, None] + rng.random((n, ticks)) * \
+            (df['high'] - df['low']).to_numpy()[:, None]
+        prices[:, -1] = df['close'].to_numpy()
+        parts.append(pd.DataFrame({
+            'ts': (df.index.asi8[:, None] + offsets).ravel(),
+            'symbol': symbol,
+            'price': prices.ravel(),
+            'size': np.repeat(df['volume'].to_numpy() // ticks, ticks)
+        }))
+    events = pd.concat(parts).sort_values('ts', kind='stable')
+    events.to_csv(path, index=False, columns=TRADE_FIELDS)
+    return len(events)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=BARS_PER_DAY)
+    parser.add_argument("--ticks", type=int, default=0, help="trades per bar (0 replays bars)")
+    parser.add_argument("--warmup", type=int, default=100, help="history bars per symbol")
+    parser.add_argument("--socket", action="store_true")
+    parser.add_argument("--budget-s", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    frames = synthetic_universe(args.symbols, args.warmup + args.bars, volatility=0.002,
+                                start="2024-01-01 09:15", freq="min")
+    history = {s: df['close'].iloc[:args.warmup] for s, df in frames.items()}
+    day = {s: df.iloc[args.warmup:] for s, df in frames.items()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replay.csv")
+        events = write_ticks(path, day, args.ticks) if args.ticks else write_replay(path, day)
+
+        runner = StreamingRunner(history=history)
+        start = time.perf_counter()
+        if args.socket:
+            thread, port = serve_replay(path)
+            runner.run(socket_feed("127.0.0.1", port))
+            thread.join()
+        else:
+            runner.run(replay_file(path))
+        wall = time.perf_counter() - start
+
+    report = runner.latency_report()
+    print(f"symbols={args.symbols} events={events} bars={report['bars']} orders={report['orders']} "
+          f"wall={wall:.2f}s ({events / wall:,.0f} events/s) budget={args.budget_s:.1f}s "
+          f"| latency p50={report['p50_us']:.1f}us p99={report['p99_us']:.1f}us "
+          f"max={report['max_us']:.0f}us")
+    return 0 if wall <= args.budget_s else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Per-stage pipeline benchmarks on synthetic OHLCV data
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --preset quick
+    python -m benchmarks.run_benchmarks --preset full --stages calculate_indicators run_backtest
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/old.json benchmarks/results/new.json
+
+Two sweeps are run: bars per symbol with a single symbol, and number of
+symbols at a fixed history length. Each stage is timed on its own; the
+network (yfinance download) and Google Sheets are replaced by a stub
+downloader and MemoryBackend. Results are written as JSON, by default to
+benchmarks/results/<commit>.json, so runs can be compared between commits.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.synthetic import synthetic_universe
+from modules import data_fetcher
+from modules.backtester import Backtester, backtest_strategy
+from modules.gsheet import MemoryBackend, SheetWriter
+from modules.ml_model import prepare_features, train_model
+from modules.strategy import calculate_indicators, generate_signals
+
+STAGES = [
+    'fetch_data_cold', 'fetch_data_warm', 'calculate_indicators', 'generate_signals',
+    'run_backtest', 'run_backtest_loop', 'prepare_features', 'train_model', 'sheet_writer'
+]
+PRESETS = {
+    'quick': {'bars': [1_000, 10_000], 'symbols': [1, 10], 'symbol_bars': 1_250},
+    'full': {'bars': [1_000, 10_000, 100_000, 1_000_000], 'symbols': [1, 10, 100, 500],
+             'symbol_bars': 1_250},
+}
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+class StubDownloader:
+    """Stands in for data_fetcher._download, serving frames from memory"""
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __call__(self, symbol, period=None, interval="1d", start=None):
+        df = self.frames[symbol]
+        return df[df.index >= start].copy() if start is not None else df.copy()
+
+def run_stages(frames, stages, max_train_bars, max_loop_bars):
+    """Total seconds spent in each stage over all frames (None if skipped)"""
+    timings = {stage: 0.0 for stage in stages}
+    n_bars = max(len(df) for df in frames.values())
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        if stage in timings and timings[stage] is not None:
+            timings[stage] += time.perf_counter() - start
+        return result
+
+    if n_bars > max_train_bars and 'train_model' in timings:
+        timings['train_model'] = None
+    if n_bars > max_loop_bars and 'run_backtest_loop' in timings:
+        timings['run_backtest_loop'] = None
+
+    writer = SheetWriter(backend=MemoryBackend())
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            mock.patch.object(data_fetcher, "_download", StubDownloader(frames)):
+        for symbol in frames:
+            df = timed('fetch_data_cold', data_fetcher.fetch_data, symbol, period="max", cache_dir=cache_dir)
+            df = timed('fetch_data_warm', data_fetcher.fetch_data, symbol, period="max", cache_dir=cache_dir)
+
+            df = timed('calculate_indicators', calculate_indicators, df)
+            signal_df = timed('generate_signals', generate_signals, df.copy())
+            trades = timed('run_backtest', Backtester(100000).run_backtest, signal_df)
+            if timings.get('run_backtest_loop') is not None:
+                timed('run_backtest_loop', Backtester(100000, engine="loop").run_backtest, signal_df)
+
+            ml_df = timed('prepare_features', prepare_features, df.copy())
+            if timings.get('train_model') is not None:
+                timed('train_model', train_model, ml_df)
+
+            if 'sheet_writer' in timings and not trades.empty:
+                trade_log = backtest_strategy(signal_df, symbol, 100000)
+                timed('sheet_writer', writer.add_trades, trade_log, symbol)
+        if 'sheet_writer' in timings:
+            timed('sheet_writer', writer.flush)
+    return timings
+
+def run_suite(preset, stages, repeats, max_train_bars, max_loop_bars, seed=0):
+    config = PRESETS[preset]
+    sweeps = [('bars', n, 1) for n in config['bars']] + \
+             [('symbols', config['symbol_bars'], n) for n in config['symbols']]
+    results = []
+    for sweep, n_bars, n_symbols in sweeps:
+        frames = synthetic_universe(n_symbols, n_bars, seed=seed)
+        best = {}
+        for _ in range(repeats):
+            for stage, seconds in run_stages(frames, stages, max_train_bars, max_loop_bars).items():
+                if seconds is not None:
+                    best[stage] = min(seconds, best.get(stage, float('inf')))
+        for stage in stages:
+            if stage not in best:
+                continue
+            results.append({
+                'stage': stage, 'sweep': sweep, 'bars': n_bars, 'symbols': n_symbols,
+                'seconds': best[stage],
+                'ns_per_bar': best[stage] * 1e9 / (n_bars * n_symbols)
+            })
+            print(f"{sweep:>7} | {stage:<20} | bars={n_bars:>9,} symbols={n_symbols:>4} | "
+                  f"{best[stage] * 1000:>10.1f} ms")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+def compare(old_path, new_path, threshold):
+    """Print new/old time ratios; returns the number of regressions"""
+    with open(old_path) as f:
+        old = {(r['stage'], r['sweep'], r['bars'], r['symbols']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+
+    regressions = 0
+    for r in new:
+        key = (r['stage'], r['sweep'], r['bars'], r['symbols'])
+        if key not in old or old[key]['seconds'] <= 0:
+            continue
+        ratio = r['seconds'] / old[key]['seconds']
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- regression"
+            regressions += 1
+        print(f"{r['stage']:<20} {r['sweep']:>7} bars={r['bars']:>9,} symbols={r['symbols']:>4} "
+              f"{old[key]['seconds'] * 1000:>10.1f} -> {r['seconds'] * 1000:>10.1f} ms ({ratio:.2f}x){flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmarks on synthetic data")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeats", type=int, default=1, help="best of N runs per size")
+    parser.add_argument("--max-train-bars", type=int, default=100_000,
+                        help="skip train_model above this many bars per symbol")
+    parser.add_argument("--max-loop-bars", type=int, default=100_000,
+                        help="skip the row-by-row backtest above this many bars per symbol")
+    parser.add_argument("--output", help="JSON path (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio flagged by --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    # Per-symbol progress logging would dominate the small sizes
+    logging.disable(logging.INFO)
+    commit = git_commit()
+    results = run_suite(args.preset, args.stages, args.repeats, args.max_train_bars, args.max_loop_bars)
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            'commit': commit,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'preset': args.preset,
+            'environment': environment(),
+            'results': results
+        }, f, indent=2)
+    print(f"Saved {len(results)} results to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""Synthetic OHLCV generators for benchmarks (no network access)"""
+import numpy as np
+import pandas as pd
+
+# Business days from 2000 run past pandas' Timestamp range (year 2262) near
+# 68k bars; longer daily series fall back to minute bars
+MAX_DAILY_BARS = 50_000
+
+def synthetic_ohlcv(n_bars, seed=0, start="2000-01-03", freq="B", volatility=0.02):
+    """Geometric random walk with consistent open/high/low/close and volume
+
+    Daily bars use business days; pass freq="min" for minute bars. Daily
+    series longer than MAX_DAILY_BARS are indexed by minute instead.
+    """
+    if freq == "B" and n_bars > MAX_DAILY_BARS:
+        freq = "min"
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0002, volatility, n_bars)
+    close = 100 * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([100.0], close[:-1])) * np.exp(rng.normal(0, volatility / 4, n_bars))
+    spread = np.abs(rng.normal(0, volatility / 2, n_bars))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.integers(100_000, 5_000_000, n_bars)
+    index = pd.date_range(start, periods=n_bars, freq=freq, name='Date')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': volume}, index=index)
+
+def synthetic_universe(n_symbols, n_bars, seed=0, **kwargs):
+    """{symbol: OHLCV frame} for n_symbols independent random walks"""
+    return {f"SYN{i:04d}.NS": synthetic_ohlcv(n_bars, seed=seed + i, **kwargs)
+            for i in range(n_symbols)}
@@ -0,0 +1,13 @@
+from benchmarks.run_benchmarks import PRESETS
+from benchmarks.synthetic import MAX_DAILY_BARS, synthetic_ohlcv
+
+def test_largest_preset_size_builds():
+    n_bars = max(max(config['bars']) for config in PRESETS.values())
+    df = synthetic_ohlcv(n_bars)
+    assert len(df) == n_bars
+    assert df.index.is_monotonic_increasing and df.index.is_unique
+    assert (df['high'] >= df[['open', 'close']].max(axis=1)).all()
+
+def test_daily_bars_up_to_the_limit():
+    df = synthetic_ohlcv(MAX_DAILY_BARS)
+    assert df.index.freqstr == "B"
@@ -1,151 +1,302 @@
 import pandas as pd
 import os
+import sys
 import logging
 import time
+import itertools
 import numpy as np
 
-# Import settings directly
-SPREADSHEET_ID = '1OJW19vsYGIj-ZEHvuF5G1hEPqmNixC3VUhEIQ9eMQaw'
+from modules.settings import SPREADSHEET_ID
+
+# Default settings; a YAML, TOML or CSV file can override them (see apply_settings)
 NIFTY_50 = ['TATAMOTORS.NS', 'ADANIENT.NS', 'HINDALCO.NS', 'JSWSTEEL.NS', 'SBIN.NS']
+UNIVERSE = NIFTY_50  # Symbols to run: a list, or a Universe streamed from a CSV (modules/settings.py)
+CHUNK_SIZE = 200  # Symbols fetched and processed per batch, bounding the frames held at once
 INITIAL_CAPITAL = 100000
+MIN_ACCURACY = 0.45  # Model accuracy needed to upload it to the sheet
+OFFLINE_MODE = False  # Read OHLCV only from the local cache under data/cache
+PARALLEL_MODE = False  # Run the CPU-bound stages in a process pool
+PANEL_MODE = False  # One vectorised pass per chunk (modules/panel.py); waits for the chunk's downloads first
+MAX_WORKERS = None  # Process pool size (defaults to the number of cores)
+FETCH_CONCURRENCY = 4  # Downloads in flight at once
+FETCH_RATE = 0.5  # New download requests per second
+TRAIN_MODE = "split"  # "walk_forward" persists models under models/ and warm-starts them
+METRICS_DIR = "data/metrics"  # Per-stage timing reports (JSON, CSV, Prometheus)
+PROFILE_STAGE = None  # e.g. "train_model" to capture a cProfile for that stage
+TRADE_DB = "data/trades.db"  # Every run's trades, keyed by run id, symbol and parameters
+CACHE_DIR = "data/cache"  # Downloaded OHLCV bars
+FEATURE_DIR = "data/features"
+MEMO_DIR = "data/memo"
+LOW_MEMORY = False  # float32 columns and no frame copies between stages (modules/memory.py)
+FEATURE_STORE = True  # Reuse cached feature matrices under FEATURE_DIR
+MEMO_CACHE = True  # Reuse per-stage results under MEMO_DIR for unchanged symbols
+EXPORT_SYMBOL_CSV = False  # Also write data/{symbol}_trades.csv for each symbol
+FILL_MODEL = None  # e.g. "nse_delivery": next-open fills, intrabar stops and NSE costs (modules/fills.py)
+DISTRIBUTED_MODE = False  # Per-symbol jobs on a shared SQLite queue, run by workers on any machine
+QUEUE_DB = "data/queue.db"  # The queue; remote workers need it on shared storage
+LOCAL_WORKERS = 1  # Workers the coordinator starts itself (0 to rely on remote ones)
+ROBUSTNESS_PATHS = 0  # Block-bootstrap paths per symbol for data/robustness.csv, e.g. 1000 (0 disables)
 
 # Import modules
-from modules.data_fetcher import fetch_data
-from modules.strategy import calculate_indicators, generate_signals
-from modules.backtester import backtest_strategy
-from modules.ml_model import prepare_features, train_model
-from modules.gsheet import log_trades_to_sheet, log_summary_to_sheet, log_model_accuracy
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("trading_system.log"),
-        logging.StreamHandler()
-    ]
-)
-
-def run_strategy():
-    all_trades = []
+from modules.async_fetcher import AsyncFetcher, iter_frames
+from modules.pipeline import chunk_panel, process_symbol, run_parallel
+from modules.job_queue import coordinate
+from modules.instrumentation import Instrumentation
+from modules.trade_store import TradeStore
+from modules.feature_store import FeatureStore
+from modules.memo import MemoCache
+from modules.fills import FillModel
+from modules.robustness import run_robustness
+from modules.settings import Universe, load_settings
+from modules.strategy import SIGNAL_PARAMS
+from modules.gsheet import SheetWriter, log_trades_to_sheet, log_summary_to_sheet, log_model_accuracy
+
+def setup_logging():
+    """Log to the console and trading_system.log (no-op if logging is configured)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("trading_system.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+def publish_result(result, writer=None, instr=None, store=None, run_id=None):
+    """Save, upload and log the outcome of one symbol's pipeline run"""
+    symbol = result['symbol']
+    instr = instr or Instrumentation(enabled=False)
+    if result['status'] == 'skipped':
+        logging.warning(f"⚠️ Insufficient data for {symbol}. Skipping.")
+        return
+    if result['status'] == 'error':
+        logging.error(f"❌ Error processing {symbol}: {result['error']}")
+        return
+
+    # 5. Process trades
+    trade_df = result['trades']
+    if not trade_df.empty:
+        if store is not None:
+            store.add_trades(run_id, symbol, trade_df)
+            logging.info(f"💾 Stored {len(trade_df)} trades for {symbol} (run {run_id})")
+        if store is None or EXPORT_SYMBOL_CSV:
+            output_path = f"data/{symbol}_trades.csv"
+            trade_df.to_csv(output_path, index=False)
+            logging.info(f"💾 Saved {len(trade_df)} trades to {output_path}")
+        
+        # Queue for the Google Sheet upload
+        with instr.stage('gsheet', symbol):
+            log_trades_to_sheet(trade_df, symbol, SPREADSHEET_ID, writer=writer)
+        
+        # Calculate performance
+        if 'pnl' in trade_df.columns:
+            win_rate = (trade_df['pnl'] > 0).mean()
+            avg_return = trade_df['return_pct'].mean() if 'return_pct' in trade_df.columns else 0
+            logging.info(f"📈 Performance | Win Rate: {win_rate:.2%} | Avg Return: {avg_return:.2f}%")
+    else:
+        logging.warning(f"⚠️ No trades executed for {symbol}")
+        
+        # Debug signals in backtest period
+        buy_signals, sell_signals = result.get('period_signals', (0, 0))
+        logging.info(f"🔍 Signals in period - Buy: {buy_signals}, Sell: {sell_signals}")
+
+    # 7. ML accuracy
+    if result['status'] == 'no_ml_data':
+        logging.warning("⚠️ Insufficient data for ML")
+    elif result['accuracy'] > MIN_ACCURACY:
+        logging.info(f"🤖 Model Accuracy: {result['accuracy']:.2%}")
+        with instr.stage('gsheet', symbol):
+            log_model_accuracy(symbol, result['accuracy'], SPREADSHEET_ID, writer=writer)
+    else:
+        logging.warning("⚠️ Low accuracy, skipping upload")
+
+def simulate_robustness(inputs, first=0, path="data/robustness.csv"):
+    """Bootstrap a chunk of symbols' backtests and add them to path
+
+    first is how many symbols earlier chunks simulated: 0 starts a new file.
+    """
+    table = run_robustness(inputs, n_paths=ROBUSTNESS_PATHS, initial_capital=INITIAL_CAPITAL,
+                           n_jobs=MAX_WORKERS or -1, first=first)
+    table.to_csv(path, mode="a" if first else "w", header=not first, index=False)
+
+def report_robustness(path="data/robustness.csv"):
+    """Log where the history sits in the bootstrapped spread, across every symbol in path"""
+    table = pd.read_csv(path)
+    medians = table.groupby('metric')[['p5', 'p50', 'p95']].median()
+    logging.info(f"🎲 Robustness ({ROBUSTNESS_PATHS} paths/symbol, median across symbols) | "
+                 f"Max DD p50/p95: {medians.loc['max_drawdown', 'p50']:.2%}/"
+                 f"{medians.loc['max_drawdown', 'p95']:.2%} | "
+                 f"Sharpe p5/p50: {medians.loc['sharpe', 'p5']:.2f}/{medians.loc['sharpe', 'p50']:.2f} | "
+                 f"Terminal equity p5: ₹{medians.loc['terminal_equity', 'p5']:,.2f} -> {path}")
+
+def apply_settings(path):
+    """Override the settings above from a YAML, TOML or CSV file, validated up front
+
+    Keys are the setting names in lower case, e.g. initial_capital; a
+    signals table updates SIGNAL_PARAMS. See modules/settings.py.
+    """
+    settings = load_settings(path)
+    SIGNAL_PARAMS.update(settings.pop('signals', {}))
+    for key, value in settings.items():
+        globals()[key.upper()] = value
+    return settings
+
+def run_strategy(parallel=None, distributed=None):
+    """The daily run; parallel and distributed default to PARALLEL_MODE and DISTRIBUTED_MODE
+
+    The universe is processed CHUNK_SIZE symbols at a time: each chunk's
+    frames, results and robustness inputs are dropped, and its sheet rows
+    sent, before the next one starts. Trades go to the TradeStore as they
+    arrive and the summary is read back from it at the end.
+    """
+    parallel = PARALLEL_MODE if parallel is None else parallel
+    distributed = DISTRIBUTED_MODE if distributed is None else distributed
+    setup_logging()
+    robustness_inputs = {}
+    n_simulated = 0  # Symbols in data/robustness.csv so far
+    writer = SheetWriter(SPREADSHEET_ID)  # Sheet rows are sent in one batch per chunk
+    instr = Instrumentation(profile_stage=PROFILE_STAGE)
     os.makedirs("data", exist_ok=True)
+    store = TradeStore(TRADE_DB)
+    run_id = store.start_run({'initial_capital': INITIAL_CAPITAL, 'train_mode': TRAIN_MODE,
+                              'signals': SIGNAL_PARAMS, 'fill_model': FILL_MODEL})
     start_time = time.time()
 
+    universe = UNIVERSE if isinstance(UNIVERSE, Universe) else Universe(UNIVERSE)
+    n_symbols = len(universe)
+    preview = ', '.join(itertools.islice(universe, 10)) + (", ..." if n_symbols > 10 else "")
     logging.info("🚀 Starting Algo-Trading System")
-    logging.info(f"📊 Processing {len(NIFTY_50)} stocks: {', '.join(NIFTY_50)}")
-
-    for i, symbol in enumerate(NIFTY_50):
-        symbol_start = time.time()
-        try:
-            logging.info(f"\n{'='*50}")
-            logging.info(f"🚀 Processing {symbol} ({i+1}/{len(NIFTY_50)})")
-            logging.info(f"{'='*50}")
-
-            # 1. Fetch data with extended history
-            df = fetch_data(symbol, period="5y")
-            if df.empty or len(df) < 200:
-                logging.warning(f"⚠️ Insufficient data for {symbol}. Skipping.")
+    logging.info(f"📊 Processing {n_symbols} stocks: {preview}")
+
+    features = FeatureStore(FEATURE_DIR) if FEATURE_STORE else None
+    memo = MemoCache(MEMO_DIR) if MEMO_CACHE else None
+    fill_model = FillModel.preset(FILL_MODEL) if FILL_MODEL else None
+
+    # Downloads run concurrently, rate limited and retried (see AsyncFetcher)
+    fetcher = AsyncFetcher(rate=FETCH_RATE, max_concurrency=FETCH_CONCURRENCY,
+                           offline=OFFLINE_MODE, cache_dir=CACHE_DIR, instrumentation=instr)
+
+    def end_chunk():
+        """Simulate the chunk's robustness paths and send its sheet rows"""
+        nonlocal n_simulated
+        if ROBUSTNESS_PATHS and robustness_inputs:
+            simulate_robustness(robustness_inputs, first=n_simulated)
+            n_simulated += len(robustness_inputs)
+        robustness_inputs.clear()
+        with instr.stage('gsheet_flush'):
+            writer.flush()
+
+    def publish_all(results):
+        for result in results:
+            logging.info(f"⏱️ {result['symbol']} processed in {result['elapsed']:.2f}s")
+            publish_result(result, writer, instr, store, run_id)
+            if 'returns' in result:
+                robustness_inputs[result['symbol']] = (result['returns'], result['trades'])
+        end_chunk()
+
+    if distributed:
+        # Only symbols go on the queue, a chunk at a time, and results are
+        # read back a chunk at a time. Workers elsewhere join with:
+        # python -m modules.cli worker --queue QUEUE_DB --run-id <run_id>
+        job_params = {'period': "5y", 'offline': OFFLINE_MODE, 'initial_capital': INITIAL_CAPITAL,
+                      'train_mode': TRAIN_MODE, 'low_memory': LOW_MEMORY, 'fill_model': FILL_MODEL,
+                      'feature_store': FEATURE_STORE, 'memo': MEMO_CACHE, 'cache_dir': CACHE_DIR,
+                      'feature_dir': FEATURE_DIR, 'memo_dir': MEMO_DIR, 'signals': dict(SIGNAL_PARAMS)}
+        pages, _ = coordinate(universe, run_id, job_params, path=QUEUE_DB,
+                              local_workers=LOCAL_WORKERS, page_size=CHUNK_SIZE)
+        for results in pages:
+            for result in results:
+                instr.merge(result.get('metrics'))
+            publish_all(results)
+    else:
+        # One chunk of the universe at a time, so only its frames are in memory
+        i = 0
+        for chunk in universe.chunks(CHUNK_SIZE):
+            if parallel:
+                # CPU-bound stages in a process pool, downloads on the async fetcher
+                publish_all(run_parallel(chunk, INITIAL_CAPITAL, period="5y", offline=OFFLINE_MODE,
+                                         max_workers=MAX_WORKERS, train_mode=TRAIN_MODE,
+                                         instrumentation=instr, profile_stage=PROFILE_STAGE,
+                                         fetcher=fetcher, low_memory=LOW_MEMORY, feature_store=features,
+                                         memo=memo, fill_model=fill_model,
+                                         signal_params=dict(SIGNAL_PARAMS), use_panel=PANEL_MODE))
                 continue
-                
-            logging.info(f"📊 Data shape: {df.shape} | From {df.index[0].date()} to {df.index[-1].date()}")
-
-            # 2. Calculate indicators
-            df = calculate_indicators(df)
-            
-            # 3. Generate signals
-            signal_df = generate_signals(df.copy())
-            
-            # Debug: Show signal stats
-            logging.info(f"🔍 Signals - Buy: {signal_df['buy_signal'].sum()}, Sell: {signal_df['sell_signal'].sum()}")
-            logging.info(f"📈 Indicators - RSI min: {signal_df['rsi'].min():.2f}, max: {signal_df['rsi'].max():.2f}")
-            
-            # 4. Backtest with sufficient history
-            min_history = max(126, int(len(signal_df) * 0.3))
-            backtest_df = signal_df.iloc[-min_history:] 
-            logging.info(f"💼 Backtesting last {len(backtest_df)} days")
-            
-            trade_df = backtest_strategy(backtest_df, symbol, INITIAL_CAPITAL)
-            
-            # 5. Process trades
-            if not trade_df.empty:
-                all_trades.append(trade_df)
-                output_path = f"data/{symbol}_trades.csv"
-                trade_df.to_csv(output_path, index=False)
-                logging.info(f"💾 Saved {len(trade_df)} trades to {output_path}")
-                
-                # Upload to Google Sheet
-                log_trades_to_sheet(trade_df, symbol, SPREADSHEET_ID)
-                
-                # Calculate performance
-                if 'pnl' in trade_df.columns:
-                    win_rate = (trade_df['pnl'] > 0).mean()
-                    avg_return = trade_df['return_pct'].mean() if 'return_pct' in trade_df.columns else 0
-                    logging.info(f"📈 Performance | Win Rate: {win_rate:.2%} | Avg Return: {avg_return:.2f}%")
-            else:
-                logging.warning(f"⚠️ No trades executed for {symbol}")
-                
-                # Debug signals in backtest period
-                buy_signals = backtest_df['buy_signal'].sum()
-                sell_signals = backtest_df['sell_signal'].sum()
-                logging.info(f"🔍 Signals in period - Buy: {buy_signals}, Sell: {sell_signals}")
-
-            # 6. ML Preparation
-            ml_df = prepare_features(df.copy())
-            
-            # 7. Train ML model
-            if not ml_df.empty and 'target' in ml_df.columns:
-                model, accuracy = train_model(ml_df)
-                if accuracy > 0.45:
-                    logging.info(f"🤖 Model Accuracy: {accuracy:.2%}")
-                    log_model_accuracy(symbol, accuracy, SPREADSHEET_ID)
-                else:
-                    logging.warning("⚠️ Low accuracy, skipping upload")
-            else:
-                logging.warning("⚠️ Insufficient data for ML")
-                
-            # 8. Time management
-            symbol_time = time.time() - symbol_start
-            logging.info(f"⏱️ Processed in {symbol_time:.2f}s")
-            
-            # Add delay between stocks
-            if i < len(NIFTY_50) - 1:
-                delay = max(3, 6 - symbol_time)
-                logging.info(f"⏳ Waiting {delay:.1f}s before next symbol...")
-                time.sleep(delay)
-                
-        except Exception as e:
-            logging.error(f"❌ Error processing {symbol}: {str(e)}")
-            continue
+
+            # 1. Fetch data with extended history; later symbols download while
+            # earlier ones are processed
+            frames = iter_frames(chunk, fetcher, period="5y", ordered=True)
+            panel = None
+            if PANEL_MODE:
+                # The whole chunk is fetched first, then its indicators, signals
+                # and features are computed in one pass
+                frames = dict(frames)
+                with instr.stage('chunk_panel'):
+                    panel = chunk_panel(frames, LOW_MEMORY, features=not FEATURE_STORE)
+                frames = frames.items()
+            for symbol, df in frames:
+                i += 1
+                try:
+                    logging.info(f"\n{'='*50}")
+                    logging.info(f"🚀 Processing {symbol} ({i}/{n_symbols})")
+                    logging.info(f"{'='*50}")
+
+                    # 2-7. Indicators, signals, backtest and ML training
+                    result = process_symbol(symbol, df, INITIAL_CAPITAL, train_mode=TRAIN_MODE,
+                                            profile_stage=PROFILE_STAGE, low_memory=LOW_MEMORY,
+                                            feature_store=features, memo=memo, fill_model=fill_model,
+                                            panel=panel)
+                    instr.merge(result['metrics'])
+                    publish_result(result, writer, instr, store, run_id)
+                    if result['status'] == 'skipped':
+                        continue
+                    if 'returns' in result:
+                        robustness_inputs[symbol] = (result['returns'], result['trades'])
+                    logging.info(f"⏱️ Processed in {result['elapsed']:.2f}s")
+
+                except Exception as e:
+                    logging.error(f"❌ Error processing {symbol}: {str(e)}")
+                    continue
+            end_chunk()
 
     # 9. Final summary
     logging.info("\n" + "="*50)
     logging.info("📊 Generating summary report")
     logging.info("="*50)
     
-    if all_trades:
-        final_df = pd.concat(all_trades, ignore_index=True)
+    totals = store.summary(by="run_id", run_id=run_id)
+    if not totals.empty:
+        totals = totals.iloc[0]
         summary_path = "data/all_trades_summary.csv"
+        final_df = store.query(run_id=run_id)
         final_df.to_csv(summary_path, index=False)
         
-        # Calculate performance
-        total_trades = len(final_df)
-        win_rate = (final_df['pnl'] > 0).mean() if 'pnl' in final_df.columns else 0
-        avg_return = final_df['return_pct'].mean() if 'return_pct' in final_df.columns else 0
-        total_pnl = final_df['pnl'].sum() if 'pnl' in final_df.columns else 0
-        
-        logging.info(f"✅ Saved {total_trades} trades to {summary_path}")
-        logging.info(f"📈 Summary | Win Rate: {win_rate:.2%} | Avg Return: {avg_return:.2f}% | Total P&L: ₹{total_pnl:,.2f}")
+        logging.info(f"✅ Saved {totals['trades']} trades to {TRADE_DB} and {summary_path}")
+        logging.info(f"📈 Summary | Win Rate: {totals['win_rate']:.2%} | Avg Return: {totals['avg_return']:.2f}% | Total P&L: ₹{totals['total_pnl']:,.2f}")
         
         # Upload summary
-        log_summary_to_sheet(final_df, SPREADSHEET_ID)
+        with instr.stage('gsheet'):
+            log_summary_to_sheet(final_df, SPREADSHEET_ID, writer=writer)
     else:
         logging.warning("⚠️ No trades executed")
 
+    if n_simulated:
+        report_robustness()
+
+    # Send the summary and anything still buffered for Google Sheets
+    with instr.stage('gsheet_flush'):
+        writer.flush()
+
     # Final stats
     total_time = time.time() - start_time
     logging.info(f"\n{'='*50}")
-    logging.info(f"🏁 Completed in {total_time:.2f}s | Processed {len(NIFTY_50)} stocks")
+    logging.info(f"🏁 Completed in {total_time:.2f}s | Processed {n_symbols} stocks")
     logging.info("="*50)
+    instr.log_summary()
+    instr.export(METRICS_DIR)
+    store.close()
 
 if __name__ == "__main__":
+    # python main.py [settings.yaml|settings.toml|universe.csv]
+    if len(sys.argv) > 1:
+        apply_settings(sys.argv[1])
     run_strategy()
\ No newline at end of file
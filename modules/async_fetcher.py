@@ -0,0 +1,182 @@
+import time
+import queue
+import random
+import asyncio
+import inspect
+import logging
+import threading
+
+import pandas as pd
+
+from modules import data_fetcher
+from modules.data_fetcher import CACHE_DIR, fetch_data, _plan_fetch, _finish_fetch
+from modules.instrumentation import Instrumentation
+
+class TokenBucket:
+    """Allow bursts of up to capacity calls, refilled at rate tokens per second
+
+    rate=None disables the limit. Only used from one event loop, so the
+    check-and-take needs no lock.
+    """
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class AsyncFetcher:
+    """Download many symbols concurrently into the same cache as fetch_data
+
+    At most max_concurrency downloads are in flight and new requests start at
+    no more than rate per second (bursts of burst). A failed download is
+    retried up to retries times with exponential backoff and jitter; a full
+    download that comes back empty is retried too, since that is how yfinance
+    reports throttling. downloader takes the arguments of
+    data_fetcher._download and may be a plain function (run in a thread) or a
+    coroutine function, so tests can plug in a stub or a local fake server.
+    """
+    def __init__(self, downloader=None, rate=0.5, burst=2, max_concurrency=4, retries=3,
+                 backoff=1.0, max_backoff=30.0, use_cache=True, offline=False,
+                 cache_dir=CACHE_DIR, instrumentation=None):
+        self.downloader = downloader
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.use_cache = use_cache
+        self.offline = offline
+        self.cache_dir = cache_dir
+        self.instr = instrumentation or Instrumentation(enabled=False)
+        self._loop = None
+
+    def _limits(self):
+        # Semaphores bind to the loop that first uses them, so make new ones per loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket = TokenBucket(self.rate, self.burst)
+        return self._semaphore, self._bucket
+
+    async def _call(self, symbol, interval, window):
+        downloader = self.downloader or data_fetcher._download
+        if inspect.iscoroutinefunction(downloader) or \
+                inspect.iscoroutinefunction(getattr(downloader, '__call__', None)):
+            return await downloader(symbol, interval=interval, **window)
+        return await asyncio.to_thread(downloader, symbol, interval=interval, **window)
+
+    async def _download(self, symbol, interval, window):
+        """Download with rate limiting and retries, returning None once retries run out"""
+        semaphore, bucket = self._limits()
+        for attempt in range(self.retries + 1):
+            with self.instr.stage('rate_limit_wait', symbol):
+                await bucket.acquire()
+            try:
+                async with semaphore:
+                    df = await self._call(symbol, interval, window)
+                if not df.empty or 'start' in window:
+                    return df
+                error = "empty response"
+            except Exception as e:
+                error = str(e)
+
+            if attempt == self.retries:
+                logging.error(f"❌ Failed to fetch data for {symbol} after {attempt + 1} attempts: {error}")
+                return None
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logging.warning(f"⚠️ Download failed for {symbol} ({error}), "
+                            f"retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def fetch(self, symbol, period="5y", interval="1d"):
+        """Fetch one symbol like fetch_data, returning an empty frame on failure"""
+        with self.instr.stage('fetch_data', symbol):
+            if self.offline:
+                return await asyncio.to_thread(fetch_data, symbol, period, interval,
+                                               offline=True, cache_dir=self.cache_dir)
+
+            logging.info(f"📡 Fetching data for {symbol} | Period: {period} | Interval: {interval}")
+            try:
+                cached, window, cache_period = await asyncio.to_thread(
+                    _plan_fetch, symbol, period, interval, self.use_cache, self.cache_dir)
+                new = await self._download(symbol, interval, window)
+                if new is None:
+                    return pd.DataFrame()
+                return await asyncio.to_thread(_finish_fetch, symbol, cached, new, period, interval,
+                                               self.use_cache, self.cache_dir, cache_period)
+            except Exception as e:
+                logging.error(f"❌ Failed to fetch data for {symbol}: {str(e)}")
+                return pd.DataFrame()
+
+    async def fetch_many(self, symbols, period="5y", interval="1d"):
+        """Yield (symbol, frame) pairs as each download completes"""
+        async def one(symbol):
+            return symbol, await self.fetch(symbol, period, interval)
+
+        tasks = [asyncio.ensure_future(one(symbol)) for symbol in symbols]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+def iter_frames(symbols, fetcher=None, period="5y", interval="1d", ordered=False):
+    """Iterate over (symbol, frame) from synchronous code while downloads continue
+
+    The event loop runs in a background thread, so each frame can be
+    processed as soon as it arrives. ordered=True yields in symbol order
+    (later symbols keep downloading while earlier ones are processed);
+    otherwise frames come in completion order.
+    """
+    fetcher = fetcher or AsyncFetcher()
+    frames = queue.Queue()
+    done = object()
+    state = {}
+
+    async def produce():
+        state['task'] = asyncio.current_task()
+        state['loop'] = asyncio.get_running_loop()
+        try:
+            async for item in fetcher.fetch_many(symbols, period, interval):
+                frames.put(item)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            frames.put(done)
+
+    worker = threading.Thread(target=lambda: asyncio.run(produce()), daemon=True)
+    worker.start()
+    pending, position = {}, 0
+    try:
+        while True:
+            item = frames.get()
+            if item is done:
+                break
+            if not ordered:
+                yield item
+                continue
+            pending[item[0]] = item[1]
+            while position < len(symbols) and symbols[position] in pending:
+                symbol = symbols[position]
+                position += 1
+                yield symbol, pending.pop(symbol)
+    finally:
+        if worker.is_alive() and 'task' in state:
+            # The consumer stopped early: cancel the outstanding downloads
+            state['loop'].call_soon_threadsafe(state['task'].cancel)
+        worker.join()
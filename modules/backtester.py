@@ -2,13 +2,139 @@ import pandas as pd
 import numpy as np
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from modules.fills import FillModel
+
+# The daily run backtests the most recent 30% of the history, at least half a year
+BACKTEST_FRACTION = 0.3
+MIN_BACKTEST_BARS = 126
+
+# Stops sit this fraction below the entry price
+STOP_LOSS_PCT = 0.05
+
+EXIT_SIGNAL = 0
+EXIT_STOP = 1
+EXIT_END = 2
+
+def _next_true(mask):
+    """For every bar i, the first index >= i where mask is set (len(mask) if none)"""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.append(np.minimum.accumulate(idx[::-1])[::-1], n)
+
+def simulate_trades(close, buy_signal, sell_signal, initial_capital=100000,
+                    stop_loss_pct=STOP_LOSS_PCT, max_position=10, fills=None):
+    """Array-based trade simulation with the same rules as Backtester.run_backtest.
+
+    Instead of visiting every bar, the engine jumps from one event to the next
+    using precomputed next-buy/next-sell indices: the next affordable buy
+    while flat, and the earlier of the next sell signal or the first bar
+    through the stop while in a position.
+
+    fills is FillModel.prepare's output for the same bars; without it orders
+    fill at the signal bar's close at no cost. The stop sits stop_loss_pct
+    below the entry fill price, and pnl is net of the orders' costs.
+
+    Returns a dict of equal-length arrays, one entry per trade: entry_idx,
+    exit_idx (the bars the orders filled on), position, entry_price,
+    exit_price, pnl, costs, entry_costs (the part of costs paid on entry)
+    and exit_reason (EXIT_SIGNAL, EXIT_STOP or EXIT_END).
+    """
+    if fills is None:
+        fills = FillModel().prepare({'close': close})
+    model = fills['model']
+    prices, fill_idx, order_price = fills['close'], fills['fill_idx'], fills['price']
+    inv_volume, trigger, gap = fills['inv_volume'], fills['trigger'], fills['gap']
+    stop_offset, intrabar = fills['stop_offset'], fills['intrabar']
+    unit_price, cash_needed = fills['unit_price'], fills['fixed_cost']
+    n = len(prices)
+    next_buy = _next_true(np.asarray(buy_signal, dtype=bool) & fills['fillable']).tolist()
+    next_sell = _next_true(np.asarray(sell_signal, dtype=bool) & fills['fillable']).tolist()
+
+    capital = initial_capital
+    entries, exits, positions, reasons = [], [], [], []
+    entry_prices, exit_prices, pnls, costs, entry_costs = [], [], [], [], []
+
+    i = 0
+    while i < n:
+        # Next bar where a buy fires and there is enough cash for one share
+        entry = next_buy[i]
+        order = None
+        while entry < n:
+            if capital - cash_needed > unit_price[entry]:
+                order = model.buy(capital, order_price[entry], inv_volume[fill_idx[entry]], max_position)
+                if order is not None:
+                    break
+            entry = next_buy[entry + 1]
+        if entry == n:
+            break
+        position, entry_price, entry_cost = order
+        entry_bar = int(fill_idx[entry])
+        stop_loss_price = entry_price * (1 - stop_loss_pct)
+        capital -= position * entry_price + entry_cost
+
+        # The stop is checked before the sell signal on every bar up to the next sell
+        next_sell_idx = next_sell[entry + 1]
+        start = entry_bar + stop_offset
+        hits = np.flatnonzero(trigger[start:min(next_sell_idx + 1, n)] < stop_loss_price)[:1]
+        if len(hits):
+            exit_bar, reason = start + int(hits[0]), EXIT_STOP
+        elif next_sell_idx < n:
+            exit_bar, reason = int(fill_idx[next_sell_idx]), EXIT_SIGNAL
+        else:
+            exit_bar, reason = n - 1, EXIT_END
+
+        if reason == EXIT_STOP:
+            price = min(gap[exit_bar], stop_loss_price) if intrabar else prices[exit_bar]
+        elif reason == EXIT_SIGNAL:
+            price = order_price[next_sell_idx]
+        else:
+            price = prices[exit_bar]
+        exit_price, exit_cost = model.sell(position, price, inv_volume[exit_bar])
+        capital += position * exit_price - exit_cost
+
+        entries.append(entry_bar)
+        exits.append(exit_bar)
+        positions.append(position)
+        entry_prices.append(entry_price)
+        exit_prices.append(exit_price)
+        pnls.append(position * (exit_price - entry_price) - entry_cost - exit_cost)
+        costs.append(entry_cost + exit_cost)
+        entry_costs.append(entry_cost)
+        reasons.append(reason)
+
+        if reason == EXIT_END:
+            break
+        # A stopped-out bar can re-enter on the same bar; a signal exit cannot
+        i = exit_bar if reason == EXIT_STOP else next_sell_idx + 1
+
+    return {
+        'entry_idx': np.asarray(entries, dtype=np.int64),
+        'exit_idx': np.asarray(exits, dtype=np.int64),
+        'position': positions,
+        'entry_price': np.asarray(entry_prices, dtype=np.float64),
+        'exit_price': np.asarray(exit_prices, dtype=np.float64),
+        'pnl': np.asarray(pnls, dtype=np.float64),
+        'costs': np.asarray(costs, dtype=np.float64),
+        'entry_costs': np.asarray(entry_costs, dtype=np.float64),
+        'exit_reason': np.asarray(reasons, dtype=np.int8),
+    }
 
 class Backtester:
-    def __init__(self, initial_capital=100000):
+    def __init__(self, initial_capital=100000, engine="vectorized", fill_model=None,
+                 stop_loss_pct=STOP_LOSS_PCT):
         self.initial_capital = initial_capital
+        self.engine = engine
+        self.fill_model = fill_model
+        self.stop_loss_pct = stop_loss_pct
         
     def run_backtest(self, df):
+        if self.engine == "vectorized":
+            return self.run_backtest_vectorized(df)
+        if self.engine != "loop":
+            raise ValueError(f"Unknown backtest engine: {self.engine}")
+        if self.fill_model is not None:
+            raise ValueError("Fill models need the vectorized engine")
+
         position = 0
         capital = self.initial_capital
         trades = []
@@ -19,7 +145,7 @@ class Backtester:
             row = df.iloc[i]
             date = df.index[i]
             
-            # Stop loss check (5%)
+            # Stop loss check
             if position > 0 and row['close'] < stop_loss_price:
                 exit_price = row['close']
                 pnl = position * (exit_price - entry_price)
@@ -36,7 +162,7 @@ class Backtester:
             # Buy signal execution
             if row['buy_signal'] and position == 0 and capital > row['close']:
                 entry_price = row['close']
-                stop_loss_price = entry_price * 0.95
+                stop_loss_price = entry_price * (1 - self.stop_loss_pct)
                 position_size = min(10, capital // entry_price)  # Position sizing
                 position = position_size
                 capital -= position * entry_price
@@ -77,10 +203,60 @@ class Backtester:
         
         return pd.DataFrame(trades) if trades else pd.DataFrame()
 
-def backtest_strategy(df, symbol, initial_capital):
-    """Wrapper function for backtesting"""
+    def run_backtest_vectorized(self, df):
+        """Same trade log as the loop engine, driven by simulate_trades
+
+        With a fill_model, dates are the bars the orders filled on and a
+        costs column holds each trade's brokerage, taxes and fees (entry_costs
+        the part paid on entry).
+        """
+        result = simulate_trades(
+            df['close'].to_numpy(),
+            df['buy_signal'].to_numpy(),
+            df['sell_signal'].to_numpy(),
+            self.initial_capital,
+            stop_loss_pct=self.stop_loss_pct,
+            fills=self.fill_model.prepare(df) if self.fill_model is not None else None
+        )
+        if not len(result['entry_idx']):
+            return pd.DataFrame()
+
+        # Columns mirror the loop engine's records: stop_loss holds the stop
+        # price or True when it was hit (an object column only then),
+        # open_at_end only exists when used
+        entry_price = result['entry_price']
+        stop_loss = entry_price * (1 - self.stop_loss_pct)
+        stopped = result['exit_reason'] == EXIT_STOP
+        if stopped.any():
+            stop_loss = stop_loss.astype(object)
+            stop_loss[stopped] = True
+        trades = {
+            'entry_date': df.index[result['entry_idx']],
+            'entry_price': entry_price,
+            'position': result['position'],
+            'stop_loss': stop_loss,
+            'exit_date': df.index[result['exit_idx']],
+            'exit_price': result['exit_price'],
+            'pnl': result['pnl']
+        }
+        if self.fill_model is not None:
+            trades['costs'] = result['costs']
+            trades['entry_costs'] = result['entry_costs']
+        if result['exit_reason'][-1] == EXIT_END:
+            open_at_end = np.full(len(entry_price), np.nan, dtype=object)
+            open_at_end[-1] = True
+            trades['open_at_end'] = open_at_end
+
+        return pd.DataFrame(trades)
+
+def backtest_window(df):
+    """The bars the daily run backtests: the latest BACKTEST_FRACTION of df"""
+    return df.iloc[-max(MIN_BACKTEST_BARS, int(len(df) * BACKTEST_FRACTION)):]
+
+def backtest_strategy(df, symbol, initial_capital, engine="vectorized", fill_model=None):
+    """Wrapper function for backtesting (fill_model: see modules/fills.py)"""
     try:
-        bt = Backtester(initial_capital)
+        bt = Backtester(initial_capital, engine=engine, fill_model=fill_model)
         trade_log = bt.run_backtest(df)
         
         if not trade_log.empty:
@@ -93,4 +269,4 @@ def backtest_strategy(df, symbol, initial_capital):
             return pd.DataFrame()
     except Exception as e:
         logging.error(f"❌ Backtest failed for {symbol}: {str(e)}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
@@ -0,0 +1,199 @@
+"""Command line entry point for the pipeline stages
+
+Run from the repository root:
+
+    python -m modules.cli fetch TATAMOTORS.NS SBIN.NS
+    python -m modules.cli backtest TATAMOTORS.NS --offline --out data/trades.csv
+    python -m modules.cli backtest TATAMOTORS.NS --offline --fills nse_delivery
+    python -m modules.cli train TATAMOTORS.NS --offline --mode walk_forward
+    python -m modules.cli score TATAMOTORS.NS --offline
+    python -m modules.cli publish --run-id 20250101T093000-ab12cd
+    python -m modules.cli tune TATAMOTORS.NS --offline
+    python -m modules.cli run --offline --parallel
+    python -m modules.cli run --offline --distributed
+    python -m modules.cli run --settings settings.example.toml
+    python -m modules.cli worker --queue /shared/queue.db --run-id 20250101T093000-ab12cd
+
+Each subcommand imports only the modules its stage needs: a backtest from
+the cache never loads yfinance, sklearn or the Google Sheets client.
+"""
+import sys
+import logging
+import argparse
+
+def _frames(args):
+    from modules.data_fetcher import fetch_data
+
+    frames = {}
+    for symbol in args.symbols:
+        df = fetch_data(symbol, period=args.period, interval=args.interval, offline=args.offline)
+        if not df.empty:
+            frames[symbol] = df
+    return frames
+
+def fetch(args):
+    frames = _frames(args)
+    print(f"Cached {sum(len(df) for df in frames.values())} bars for "
+          f"{len(frames)}/{len(args.symbols)} symbols")
+    return 0 if len(frames) == len(args.symbols) else 1
+
+def backtest(args):
+    import pandas as pd
+    from modules.backtester import backtest_strategy, backtest_window
+    from modules.fills import FillModel
+    from modules.strategy import calculate_indicators, generate_signals
+
+    fill_model = FillModel.preset(args.fills) if args.fills else None
+    logs = []
+    for symbol, df in _frames(args).items():
+        signals = generate_signals(calculate_indicators(df.copy()))
+        trades = backtest_strategy(backtest_window(signals), symbol, args.capital, fill_model=fill_model)
+        pnl = trades['pnl'] if not trades.empty else pd.Series(dtype=float)
+        print(f"{symbol:<16} trades={len(trades):<4} win_rate={(pnl > 0).mean() if len(pnl) else 0:.2%} "
+              f"pnl={pnl.sum():,.2f}")
+        logs.append(trades)
+    if args.out and logs:
+        pd.concat(logs, ignore_index=True).to_csv(args.out, index=False)
+        print(f"Saved trades to {args.out}")
+    return 0
+
+def train(args):
+    from modules.ml_model import prepare_features, train_model, walk_forward_train
+    from modules.strategy import calculate_indicators
+    from modules.tuning import load_best_params
+
+    store = None
+    if not args.no_feature_store:
+        from modules.feature_store import FeatureStore
+        store = FeatureStore()
+    for symbol, df in _frames(args).items():
+        ml_df = store.features(symbol, df) if store else prepare_features(calculate_indicators(df.copy()))
+        model_params = load_best_params(symbol, ml_df.columns)
+        if args.mode == "walk_forward":
+            _, accuracy = walk_forward_train(ml_df, symbol, model_params=model_params)
+        else:
+            _, accuracy = train_model(ml_df, model_params)
+        print(f"{symbol:<16} accuracy={accuracy:.2%}")
+    return 0
+
+def score(args):
+    from modules.ml_model import MODEL_DIR
+    from modules.scoring import UniverseScorer
+
+    scorer = UniverseScorer.load(args.symbols or None)
+    if not scorer.symbols:
+        print(f"No saved models in {MODEL_DIR}: only walk_forward training saves them "
+              "(train --mode walk_forward, or TRAIN_MODE = \"walk_forward\" in main.py)")
+        return 1
+    args.symbols = scorer.symbols
+    probabilities = scorer.score_frames(_frames(args))
+    for symbol, probability in probabilities.items():
+        print(f"{symbol:<16} p_up={probability:.3f}")
+    return 0
+
+def publish(args):
+    from modules.trade_store import TradeStore
+    from modules.gsheet import SheetWriter, log_summary_to_sheet, log_trades_to_sheet
+
+    spreadsheet_id = args.spreadsheet_id
+    if spreadsheet_id is None:
+        from modules.settings import SPREADSHEET_ID as spreadsheet_id
+    with TradeStore(args.db) as store:
+        runs = store.runs()
+        if runs.empty:
+            print(f"No runs in {args.db}")
+            return 1
+        run_id = args.run_id or runs['run_id'].iloc[-1]
+        trades = store.query(run_id=run_id)
+    if trades.empty:
+        print(f"No trades for run {run_id}")
+        return 1
+
+    writer = SheetWriter(spreadsheet_id)
+    for symbol, symbol_trades in trades.groupby('symbol', sort=False):
+        log_trades_to_sheet(symbol_trades, symbol, spreadsheet_id, writer=writer)
+    log_summary_to_sheet(trades, spreadsheet_id, writer=writer)
+    writer.flush()
+    print(f"Published {len(trades)} trades of run {run_id}")
+    return 0 if not any(writer.pending_rows().values()) else 1
+
+def tune(args):
+    from modules import tuning
+    return tuning.main(args.args)
+
+def run(args):
+    import main
+
+    if args.settings:
+        main.apply_settings(args.settings)
+    if args.offline:
+        main.OFFLINE_MODE = True
+    main.run_strategy(parallel=args.parallel or None, distributed=args.distributed or None)
+    return 0
+
+def worker(args):
+    from modules.job_queue import run_worker
+
+    finished = run_worker(args.queue, worker=args.worker_id, run_id=args.run_id,
+                          exit_when_idle=not args.forever)
+    print(f"Finished {finished} jobs")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m modules.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def data_command(name, handler, help, symbols="+", period="5y"):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument("symbols", nargs=symbols)
+        sub.add_argument("--period", default=period)
+        sub.add_argument("--interval", default="1d")
+        sub.add_argument("--offline", action="store_true", help="read bars from the cache only")
+        sub.set_defaults(handler=handler)
+        return sub
+
+    data_command("fetch", fetch, "download bars into the local cache")
+    sub = data_command("backtest", backtest, "backtest the signal strategy")
+    sub.add_argument("--capital", type=float, default=100000)
+    sub.add_argument("--out", help="write the trade logs to this CSV")
+    sub.add_argument("--fills", help="fill model preset from modules/fills.py, e.g. nse_delivery")
+    sub = data_command("train", train, "train the per-symbol models")
+    sub.add_argument("--mode", choices=["split", "walk_forward"], default="split",
+                     help="only walk_forward saves the models score uses")
+    sub.add_argument("--no-feature-store", action="store_true")
+    data_command("score", score, "score the latest bar with saved models (default: all)",
+                 symbols="*", period="2y")
+
+    sub = commands.add_parser("publish", help="upload a stored run to Google Sheets")
+    sub.add_argument("--db", default="data/trades.db")
+    sub.add_argument("--run-id", help="defaults to the latest run")
+    sub.add_argument("--spreadsheet-id", help="defaults to modules.settings.SPREADSHEET_ID")
+    sub.set_defaults(handler=publish)
+
+    sub = commands.add_parser("tune", help="hyperparameter search (see modules/tuning.py)")
+    sub.add_argument("args", nargs=argparse.REMAINDER)
+    sub.set_defaults(handler=tune)
+
+    sub = commands.add_parser("run", help="the full daily pipeline, as main.py runs it")
+    sub.add_argument("--offline", action="store_true")
+    sub.add_argument("--parallel", action="store_true")
+    sub.add_argument("--distributed", action="store_true", help="coordinate workers through main.QUEUE_DB")
+    sub.add_argument("--settings", help="YAML, TOML or CSV file overriding main.py's settings")
+    sub.set_defaults(handler=run)
+
+    sub = commands.add_parser("worker", help="run queued per-symbol jobs (see modules/job_queue.py)")
+    sub.add_argument("--queue", default="data/queue.db")
+    sub.add_argument("--run-id", help="only this run's jobs, exiting once it has finished")
+    sub.add_argument("--worker-id", help="defaults to <host>-<pid>")
+    sub.add_argument("--forever", action="store_true", help="keep polling when the queue is empty")
+    sub.set_defaults(handler=worker)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command != "run":  # run_strategy sets up its own log file
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    return args.handler(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
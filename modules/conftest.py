@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+def random_walk_ohlcv(n=600, seed=0, start="2020-01-01"):
+    """Business-day random walk with gapped opens and highs/lows around them"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = np.concatenate(([100.0], close[:-1])) * np.exp(rng.normal(0, 0.005, n))
+    return pd.DataFrame({
+        'open': open_, 'high': np.maximum(open_, close) * 1.01, 'low': np.minimum(open_, close) * 0.99,
+        'close': close, 'volume': rng.integers(100000, 1000000, n)
+    }, index=pd.bdate_range(start, periods=n, name='Date'))
+
+@pytest.fixture
+def make_ohlcv():
+    """make_ohlcv(n=600, seed=0, start="2020-01-01") -> synthetic OHLCV frame"""
+    return random_walk_ohlcv
@@ -1,44 +1,200 @@
+import os
+import json
 import pandas as pd
-import yfinance as yf
+import numpy as np
 import logging
 import warnings
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
-def fetch_data(symbol, period="5y", interval="1d"):
-    """Fetch historical stock data with error handling"""
-    logging.info(f"📡 Fetching data for {symbol} | Period: {period} | Interval: {interval}")
+CACHE_DIR = os.path.join("data", "cache")
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def _download(symbol, period=None, interval="1d", start=None):
+    """Download and clean OHLCV bars from yfinance
+
+    Uses Ticker.history rather than yf.download, whose module-level state is
+    not safe to share between concurrent downloads. The index is normalised
+    the way yf.download does it: naive dates for daily bars, UTC otherwise.
+    """
+    import yfinance as yf  # slow to import, and offline runs never need it
+
+    # Fetch data with explicit parameters
+    window = {'start': start} if start is not None else {'period': period}
+    df = yf.Ticker(symbol).history(
+        interval=interval,
+        auto_adjust=True,
+        **window
+    )
     
-    try:
-        # Fetch data with explicit parameters
-        df = yf.download(
-            symbol, 
-            period=period, 
-            interval=interval,
-            auto_adjust=True,
-            progress=False
-        )
-        
-        if df.empty:
-            logging.warning(f"⚠️ Empty data returned for {symbol}")
-            return pd.DataFrame()
-        
-        # Select and rename columns
-        if 'Close' not in df.columns:
-            logging.error(f"Missing 'Close' column in data for {symbol}")
-            return pd.DataFrame()
-            
-        df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-        df.columns = ['open', 'high', 'low', 'close', 'volume']
-        df.index = pd.to_datetime(df.index)
-        
-        # Filter out zeros and fill gaps
-        df = df[df['volume'] > 0]
-        df = df.fillna(method='ffill').fillna(method='bfill')
+    if df.empty:
+        logging.warning(f"⚠️ Empty data returned for {symbol}")
+        return pd.DataFrame()
+    
+    # Select and rename columns
+    if 'Close' not in df.columns:
+        logging.error(f"Missing 'Close' column in data for {symbol}")
+        return pd.DataFrame()
         
-        logging.info(f"📊 Retrieved {len(df)} records for {symbol}")
+    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+    df.columns = OHLCV_COLUMNS
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        intraday = interval[-1] in "mh"
+        df.index = df.index.tz_convert("UTC") if intraday else df.index.tz_localize(None)
+    df.index.name = 'Date'
+    
+    # Filter out zeros and fill gaps
+    df = df[df['volume'] > 0]
+    df = df.ffill().bfill()
+    return df
+
+def _period_offset(period):
+    """Translate a yfinance period string into a DateOffset (None for 'max')"""
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.DateOffset(years=1)
+    units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+def _covers(cached_period, period):
+    """True if a cache filled with cached_period spans at least period"""
+    cached, requested = _period_offset(cached_period), _period_offset(period)
+    if cached is None:
+        return True
+    if requested is None:
+        return False
+    anchor = pd.Timestamp("2000-01-01")
+    return anchor - cached <= anchor - requested
+
+def _cache_path(symbol, interval, cache_dir):
+    return os.path.join(cache_dir, f"{symbol.replace(os.sep, '_')}_{interval}")
+
+def load_cache(symbol, interval="1d", cache_dir=CACHE_DIR):
+    """Load cached OHLCV bars as a DataFrame backed by memory-mapped columns"""
+    path = _cache_path(symbol, interval, cache_dir)
+    try:
+        index = np.load(os.path.join(path, "index.npy"), mmap_mode='r')
+        columns = {
+            col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r')
+            for col in OHLCV_COLUMNS
+        }
+    except (FileNotFoundError, ValueError):
+        return pd.DataFrame()
+
+    if any(len(values) != len(index) for values in columns.values()):
+        logging.warning(f"⚠️ Inconsistent cache for {symbol}, ignoring it")
+        return pd.DataFrame()
+
+    dates = pd.DatetimeIndex(np.asarray(index).view('datetime64[ns]'), name='Date')
+    tz = cache_metadata(symbol, interval, cache_dir).get('tz')
+    if tz:
+        # Intraday bars are stored as UTC nanoseconds
+        dates = dates.tz_localize('UTC').tz_convert(tz)
+    return pd.DataFrame(columns, index=dates)
+
+def cache_metadata(symbol, interval="1d", cache_dir=CACHE_DIR):
+    """Return the metadata stored next to a symbol's cache ({} if none)"""
+    try:
+        with open(os.path.join(_cache_path(symbol, interval, cache_dir), "meta.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_cache(symbol, df, interval="1d", cache_dir=CACHE_DIR, period=None):
+    """Write OHLCV bars as one .npy file per column, replacing files atomically"""
+    path = _cache_path(symbol, interval, cache_dir)
+    os.makedirs(path, exist_ok=True)
+
+    arrays = {'index': df.index.values.astype('datetime64[ns]').view(np.int64)}
+    arrays.update({col: df[col].to_numpy() for col in OHLCV_COLUMNS})
+    for name, values in arrays.items():
+        tmp = os.path.join(path, f"{name}.tmp.npy")
+        np.save(tmp, values)
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+    meta = cache_metadata(symbol, interval, cache_dir)
+    if period is not None:
+        meta['period'] = period
+    meta.update({
+        'symbol': symbol,
+        'interval': interval,
+        'rows': len(df),
+        'start': str(df.index[0]) if len(df) else None,
+        'end': str(df.index[-1]) if len(df) else None,
+        'tz': str(df.index.tz) if df.index.tz is not None else None
+    })
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def _trim_to_period(df, period):
+    offset = _period_offset(period)
+    if df.empty or offset is None:
         return df
+    return df[df.index >= df.index[-1] - offset]
+
+def _plan_fetch(symbol, period, interval, use_cache, cache_dir):
+    """Decide what to download: returns (cached bars, download window, cache period)
+
+    A cache that spans period is refreshed from its last bar, so a partial
+    bar is re-downloaded; otherwise the whole period is fetched.
+    """
+    if use_cache:
+        cached = load_cache(symbol, interval, cache_dir)
+        meta = cache_metadata(symbol, interval, cache_dir)
+        if not cached.empty and _covers(meta.get('period'), period):
+            return cached, {'start': cached.index[-1].strftime('%Y-%m-%d')}, meta.get('period')
+    return pd.DataFrame(), {'period': period}, period
+
+def _finish_fetch(symbol, cached, new, period, interval, use_cache, cache_dir, cache_period):
+    """Merge downloaded bars into the cache and return the requested period"""
+    if not cached.empty:
+        if not new.empty:
+            df = pd.concat([cached[cached.index < new.index[0]], new])
+            df = df[~df.index.duplicated(keep='last')]
+        else:
+            df = cached
+        logging.info(f"🔄 Appended {len(df) - len(cached)} new bars for {symbol}")
+    else:
+        df = new
+
+    if df.empty:
+        return pd.DataFrame()
+
+    if use_cache:
+        save_cache(symbol, df, interval, cache_dir, period=cache_period)
+
+    df = _trim_to_period(df, period)
+    logging.info(f"📊 Retrieved {len(df)} records for {symbol}")
+    return df
+
+def fetch_data(symbol, period="5y", interval="1d", use_cache=True, offline=False,
+               cache_dir=CACHE_DIR):
+    """Fetch historical stock data with error handling
+
+    With use_cache, bars are kept under cache_dir and later calls only download
+    from the last cached timestamp onwards. offline=True reads the cache only.
+    """
+    if offline:
+        df = load_cache(symbol, interval, cache_dir)
+        if df.empty:
+            logging.warning(f"⚠️ No cached data for {symbol} ({interval}) in offline mode")
+            return df
+        logging.info(f"📂 Loaded {len(df)} cached records for {symbol}")
+        return _trim_to_period(df, period)
+
+    logging.info(f"📡 Fetching data for {symbol} | Period: {period} | Interval: {interval}")
+    
+    try:
+        cached, window, cache_period = _plan_fetch(symbol, period, interval, use_cache, cache_dir)
+        new = _download(symbol, interval=interval, **window)
+        return _finish_fetch(symbol, cached, new, period, interval, use_cache, cache_dir,
+                             cache_period)
     except Exception as e:
         logging.error(f"❌ Failed to fetch data for {symbol}: {str(e)}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
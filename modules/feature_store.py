@@ -0,0 +1,157 @@
+import os
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+from modules.data_fetcher import OHLCV_COLUMNS
+from modules.strategy import calculate_indicators
+from modules.ml_model import add_features
+
+# Bump whenever calculate_indicators or add_features change what they
+# compute; matrices stored under an older version are then rebuilt.
+FEATURE_VERSION = 1
+FEATURE_DIR = os.path.join("data", "features")
+# Bars of history recomputed in front of appended rows. EMA/Wilder weights
+# older than this are below 1e-9, so appended rows match a full rebuild.
+APPEND_LOOKBACK = 300
+
+def build_feature_frame(df):
+    """Indicators plus features and target for every bar of an OHLCV frame"""
+    return add_features(calculate_indicators(df[OHLCV_COLUMNS].copy()))
+
+class FeatureStore:
+    """Per-symbol indicator and feature matrices cached as memory-mapped columns
+
+    Each symbol's matrix lives under feature_dir/v<FEATURE_VERSION>/ as one
+    raw binary file per column plus meta.json, which records the dtypes, the
+    row count and the first bar of the data it was built from. A call with
+    data that extends the stored bars only computes and appends the new
+    rows, after recomputing the previous last row (its target needed the
+    next close) and any rows whose close or volume changed. Data that starts
+    earlier than the stored matrix, or a different FEATURE_VERSION, rebuilds
+    it. A later window of the stored range is served as a slice, so its
+    first rows carry values computed with the earlier history.
+    """
+    def __init__(self, feature_dir=FEATURE_DIR, version=FEATURE_VERSION):
+        self.feature_dir = feature_dir
+        self.version = version
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.feature_dir, f"v{self.version}",
+                            f"{symbol.replace(os.sep, '_')}_{interval}")
+
+    def _meta(self, path):
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if meta.get('version') == self.version else None
+
+    def _read(self, path, meta):
+        """The stored matrix as a DataFrame over memory-mapped columns"""
+        rows = meta['rows']
+
+        def column(name, dtype):
+            if rows == 0:
+                return np.empty(0, dtype=dtype)
+            return np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode='r', shape=(rows,))
+
+        index = pd.DatetimeIndex(column('index', np.int64).view('datetime64[ns]'), name='Date')
+        if meta.get('tz'):
+            index = index.tz_localize('UTC').tz_convert(meta['tz'])
+        return pd.DataFrame({name: column(name, dtype) for name, dtype in meta['dtypes'].items()},
+                            index=index)
+
+    def _write(self, path, meta, frame, keep):
+        """Replace the stored rows from keep onwards with frame"""
+        os.makedirs(path, exist_ok=True)
+        arrays = {'index': frame.index.values.astype('datetime64[ns]').view(np.int64)}
+        arrays.update({name: frame[name].to_numpy(dtype=dtype) for name, dtype in meta['dtypes'].items()})
+        for name, values in arrays.items():
+            file = os.path.join(path, f"{name}.bin")
+            # Overwrite in place rather than truncating first, so a mapping of
+            # the old rows never points past the end of the file
+            with open(file, "r+b" if keep and os.path.exists(file) else "wb") as f:
+                f.seek(keep * values.itemsize)
+                f.write(values.tobytes())
+                f.truncate()
+
+        meta['rows'] = int(keep) + len(frame)
+        meta['end'] = str(frame.index[-1]) if len(frame) else meta.get('end')
+        tmp = os.path.join(path, "meta.tmp.json")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def _rebuild(self, path, df):
+        frame = build_feature_frame(df)
+        meta = {
+            'version': self.version,
+            'dtypes': {name: str(frame[name].dtype) for name in frame.columns},
+            'source_start': str(df.index[0]),
+            'tz': str(df.index.tz) if df.index.tz is not None else None,
+        }
+        self._write(path, meta, frame, keep=0)
+        return meta
+
+    def frame(self, symbol, df, interval="1d"):
+        """Indicator and feature frame for the bars of df, updating the store
+
+        Same columns as add_features(calculate_indicators(df)), including
+        the warm-up rows with missing features.
+        """
+        if df.empty:
+            return pd.DataFrame()
+        path = self._path(symbol, interval)
+        meta = self._meta(path)
+        if meta is None or meta['rows'] == 0 or df.index[0] < pd.Timestamp(meta['source_start']) or \
+                df.index[0] > pd.Timestamp(meta['end']):
+            meta = self._rebuild(path, df)
+            logging.info(f"🧱 Built {meta['rows']} feature rows for {symbol}")
+        else:
+            stored = self._read(path, meta)
+            keep = self._matching_rows(stored, df)
+            if keep < len(stored) or stored.index[-1] < df.index[-1]:
+                self._append(path, meta, stored, keep, df, symbol)
+
+        stored = self._read(path, meta)
+        return stored[(stored.index >= df.index[0]) & (stored.index <= df.index[-1])]
+
+    def _matching_rows(self, stored, df):
+        """How many leading stored rows are unaffected by df's bars
+
+        Stored rows before df starts are kept as they are. From there on a row
+        is kept while df has the same bar, and the row before the first
+        changed or new bar is recomputed because its target depends on the
+        next close.
+        """
+        first = stored.index.searchsorted(df.index[0])
+        pos = df.index.get_indexer(stored.index[first:])
+        overlap = pos >= 0
+        same = overlap.copy()
+        same[overlap] = ((df['close'].to_numpy()[pos[overlap]] == stored['close'].to_numpy()[first:][overlap]) &
+                         (df['volume'].to_numpy()[pos[overlap]] == stored['volume'].to_numpy()[first:][overlap]))
+        # Stored rows past the end of df are left alone
+        same |= stored.index[first:] > df.index[-1]
+        keep = first + (same.argmin() if not same.all() else len(same))
+        if keep < len(stored) or stored.index[-1] < df.index[-1]:
+            # The row before a changed or new bar has a stale target
+            keep = max(keep - 1, first)
+        return keep
+
+    def _append(self, path, meta, stored, keep, df, symbol):
+        # Recompute from the first replaced row with APPEND_LOOKBACK bars of history
+        start = df.index.searchsorted(stored.index[keep]) if keep < len(stored) else \
+            df.index.searchsorted(stored.index[-1], side='right')
+        tail = build_feature_frame(df.iloc[max(0, start - APPEND_LOOKBACK):])
+        new = tail[tail.index >= df.index[start]] if start < len(df) else tail.iloc[:0]
+        self._write(path, meta, new, keep)
+        logging.info(f"➕ Appended {len(new)} feature rows for {symbol} "
+                     f"({len(stored) - keep} recomputed)")
+
+    def features(self, symbol, df, interval="1d"):
+        """ML-ready rows, as prepare_features(calculate_indicators(df)) returns them"""
+        return self.frame(symbol, df, interval).dropna()
@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+
+FILL_TIMINGS = ("close", "next_open")
+STOP_FILLS = ("close", "intrabar")
+
+# Named settings for FillModel.preset. Rates are fractions of the order
+# value (0.001 is 0.1%).
+PRESETS = {
+    'frictionless': {},
+    # Equity delivery on NSE with a zero-brokerage discount broker: STT on
+    # both sides, exchange and SEBI fees, stamp duty on buys and GST on the fees
+    'nse_delivery': {
+        'timing': "next_open",
+        'stop_fill': "intrabar",
+        'stt_pct': 0.001,
+        'exchange_pct': 0.0000307,
+        'stamp_pct': 0.00015,
+        'gst_pct': 0.18,
+        'half_spread_pct': 0.0005,
+        'impact_pct': 0.1,
+    },
+}
+
+class FillModel:
+    """Fill prices and transaction costs for simulate_trades
+
+    timing "close" fills an order at the close of its signal bar,
+    "next_open" at the open of the bar after it (a signal on the last bar
+    is then not filled). stop_fill "close" exits once a close falls below
+    the stop, at that close; "intrabar" once a bar's low does, at the stop
+    price or at the open if the bar gapped through it.
+
+    Every fill moves the price against the order by half_spread_pct plus
+    impact_pct * sqrt(shares / bar volume). Each order pays brokerage
+    (brokerage_fixed plus brokerage_pct of its value, at most
+    brokerage_cap), STT and exchange fees on its value, stamp duty on buys
+    and GST on the brokerage and exchange fees. The defaults fill at the
+    close with no costs, which is what the backtester does without a model.
+    """
+    def __init__(self, timing="close", stop_fill="close", brokerage_fixed=0.0, brokerage_pct=0.0,
+                 brokerage_cap=None, stt_pct=0.0, exchange_pct=0.0, stamp_pct=0.0, gst_pct=0.0,
+                 half_spread_pct=0.0, impact_pct=0.0):
+        if timing not in FILL_TIMINGS:
+            raise ValueError(f"Unknown fill timing: {timing}")
+        if stop_fill not in STOP_FILLS:
+            raise ValueError(f"Unknown stop fill: {stop_fill}")
+        self.timing = timing
+        self.stop_fill = stop_fill
+        self.brokerage_fixed = brokerage_fixed
+        self.brokerage_pct = brokerage_pct
+        self.brokerage_cap = brokerage_cap
+        self.stt_pct = stt_pct
+        self.exchange_pct = exchange_pct
+        self.stamp_pct = stamp_pct
+        self.gst_pct = gst_pct
+        self.half_spread_pct = half_spread_pct
+        self.impact_pct = impact_pct
+
+    @classmethod
+    def preset(cls, name):
+        if name not in PRESETS:
+            raise ValueError(f"Unknown fill model: {name}")
+        return cls(**PRESETS[name])
+
+    def params(self):
+        """The settings as a dict, e.g. for cache keys"""
+        return dict(vars(self))
+
+    def __repr__(self):
+        changed = {k: v for k, v in self.params().items() if v != FillModel().params()[k]}
+        return f"FillModel({', '.join(f'{k}={v!r}' for k, v in changed.items())})"
+
+    def order_costs(self, value, buy):
+        """Brokerage, taxes and fees of orders worth value (a number or an array)"""
+        brokerage = self.brokerage_fixed + self.brokerage_pct * value
+        if self.brokerage_cap is not None:
+            brokerage = np.minimum(brokerage, self.brokerage_cap)
+        exchange = self.exchange_pct * value
+        taxes = self.stt_pct * value + self.gst_pct * (brokerage + exchange)
+        if buy:
+            taxes = taxes + self.stamp_pct * value
+        return brokerage + exchange + taxes
+
+    def _slipped(self, price, shares, inv_volume, side):
+        """price moved against an order of shares by spread and volume impact"""
+        slip = self.half_spread_pct
+        if self.impact_pct:
+            slip += self.impact_pct * math.sqrt(shares * inv_volume)
+        return price * (1 + side * slip)
+
+    def _fixed_cost(self):
+        """Most a buy pays regardless of its value"""
+        return self.brokerage_fixed * (1 + self.gst_pct)
+
+    def _cost_rate(self):
+        """Most a buy pays per rupee of value on top of _fixed_cost"""
+        return ((self.brokerage_pct + self.exchange_pct) * (1 + self.gst_pct)
+                + self.stt_pct + self.stamp_pct)
+
+    def buy(self, capital, price, inv_volume, max_shares):
+        """(shares, fill price, costs) of the largest buy capital affords, None if none
+
+        Shares are sized at the fill price of a max_shares order, which is
+        never below the actual fill price, so cash cannot go negative.
+        """
+        fixed = self._fixed_cost()
+        unit = self._slipped(price, max_shares, inv_volume, 1) * (1 + self._cost_rate())
+        if not capital - fixed > unit:
+            return None
+        shares = min(max_shares, (capital - fixed) // unit)
+        fill = self._slipped(price, shares, inv_volume, 1)
+        return shares, fill, self.order_costs(shares * fill, buy=True)
+
+    def sell(self, shares, price, inv_volume):
+        """(fill price, costs) of selling shares"""
+        fill = self._slipped(price, shares, inv_volume, -1)
+        return fill, self.order_costs(shares * fill, buy=False)
+
+    def prepare(self, bars):
+        """Per-bar arrays simulate_trades fills orders from, computed once per symbol
+
+        bars maps column names to arrays (a DataFrame works): close, plus
+        open for next-open fills, low and open for intrabar stops and
+        volume for impact. The result can be reused for every signal set
+        backtested on the same bars.
+        """
+        close = np.asarray(bars['close'], dtype=np.float64)
+        n = len(close)
+
+        def column(name):
+            if bars.get(name) is None:
+                raise ValueError(f"{self!r} needs a '{name}' column")
+            return np.asarray(bars[name], dtype=np.float64)
+
+        if self.timing == "next_open":
+            fill_idx, price = np.arange(1, n + 1), np.append(column('open')[1:], np.nan)
+        else:
+            fill_idx, price = np.arange(n), close
+        if self.stop_fill == "intrabar":
+            trigger, gap = column('low'), column('open')
+        else:
+            trigger = gap = close
+        if self.impact_pct:
+            inv_volume = 1 / np.maximum(column('volume'), 1)
+        else:
+            inv_volume = np.zeros(n)
+        # Cost of one share before volume impact, to skip buys cash cannot
+        # cover without calling buy
+        factor = (1 + self.half_spread_pct) * (1 + self._cost_rate())
+        unit_price = price if factor == 1 else price * factor
+
+        return {
+            'model': self,
+            'close': close,
+            'fillable': np.isfinite(price),
+            'fill_idx': fill_idx,
+            'price': price,
+            'inv_volume': inv_volume,
+            'trigger': trigger,
+            'gap': gap,
+            'unit_price': unit_price,
+            'fixed_cost': self._fixed_cost(),
+            # Bars after an order fills at an open are checked for the stop from
+            # the fill bar itself, close fills from the next bar
+            'stop_offset': 0 if self.timing == "next_open" else 1,
+            'intrabar': self.stop_fill == "intrabar",
+        }
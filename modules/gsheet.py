@@ -1,10 +1,7 @@
-import gspread
+import re
 import numpy as np
 import pandas as pd
 import logging
-from oauth2client.service_account import ServiceAccountCredentials
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def convert_to_serializable(value):
     """Convert numpy types to native Python types for Google Sheets"""
@@ -23,8 +20,22 @@ def convert_to_serializable(value):
     else:
         return value
 
+TRADE_HEADERS = [
+    'entry_date', 'entry_price', 'position', 'exit_date',
+    'exit_price', 'pnl', 'symbol', 'holding_days', 'return_pct'
+]
+SUMMARY_HEADERS = ["Metric", "Value"]
+ML_HEADERS = ["Symbol", "Accuracy"]
+
+_clients = {}
+
 def get_sheet_client(spreadsheet_id):
-    """Authenticate and access Google Sheet"""
+    """Authenticate and access Google Sheet (cached per spreadsheet)"""
+    if spreadsheet_id in _clients:
+        return _clients[spreadsheet_id]
+    # The Google client libraries are only needed once a sheet is opened
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
     try:
         scope = [
             'https://spreadsheets.google.com/feeds',
@@ -38,6 +49,7 @@ def get_sheet_client(spreadsheet_id):
         logging.info(f"✅ Accessed spreadsheet: {sheet.title}")
         logging.info(f"📊 Worksheets: {[ws.title for ws in sheet.worksheets()]}")
         
+        _clients[spreadsheet_id] = sheet
         return sheet
     except gspread.SpreadsheetNotFound:
         logging.error(f"❌ Spreadsheet not found with ID: {spreadsheet_id}")
@@ -48,6 +60,7 @@ def get_sheet_client(spreadsheet_id):
 
 def create_worksheet_if_not_exists(sheet, title, headers):
     """Create worksheet if it doesn't exist"""
+    import gspread
     try:
         return sheet.worksheet(title)
     except gspread.exceptions.WorksheetNotFound:
@@ -64,116 +77,181 @@ def create_worksheet_if_not_exists(sheet, title, headers):
         logging.error(f"❌ Error accessing worksheet {title}: {str(e)}")
         return None
 
-def log_trades_to_sheet(trade_df, symbol, spreadsheet_id):
-    """Log trades to Google Sheet with proper serialization"""
+def trade_rows(trade_df):
+    """Serialize trade log rows in TRADE_HEADERS order"""
+    if not all(col in trade_df.columns for col in TRADE_HEADERS):
+        return []
+    return [
+        [convert_to_serializable(value) for value in row]
+        for row in trade_df[TRADE_HEADERS].itertuples(index=False)
+    ]
+
+def summary_rows(summary_df):
+    """Summary statistics as Metric/Value rows, header included"""
+    stats = {
+        "Total Trades": len(summary_df),
+        "Winning Trades": (summary_df['pnl'] > 0).sum() if 'pnl' in summary_df else 0,
+        "Losing Trades": (summary_df['pnl'] < 0).sum() if 'pnl' in summary_df else 0,
+        "Win Ratio": f"{(summary_df['pnl'] > 0).mean():.2%}" if 'pnl' in summary_df else "0.00%",
+        "Average P&L": summary_df['pnl'].mean() if 'pnl' in summary_df else 0,
+        "Total P&L": summary_df['pnl'].sum() if 'pnl' in summary_df else 0,
+        "Best Trade": summary_df['pnl'].max() if 'pnl' in summary_df else 0,
+        "Worst Trade": summary_df['pnl'].min() if 'pnl' in summary_df else 0
+    }
+    
+    # Convert to serializable format
+    data = [list(SUMMARY_HEADERS)]
+    data.extend([[k, convert_to_serializable(v)] for k, v in stats.items()])
+    return data
+
+class GSpreadBackend:
+    """Google Sheets backend holding one authenticated client for the run"""
+    def __init__(self, spreadsheet_id):
+        self.spreadsheet_id = spreadsheet_id
+        self._sheet = None
+        self._worksheets = {}
+
+    def _worksheet(self, title, headers):
+        if title not in self._worksheets:
+            if self._sheet is None:
+                self._sheet = get_sheet_client(self.spreadsheet_id)
+                if not self._sheet:
+                    raise RuntimeError(f"Spreadsheet {self.spreadsheet_id} is not accessible")
+            worksheet = create_worksheet_if_not_exists(self._sheet, title, headers)
+            if not worksheet:
+                raise RuntimeError(f"Worksheet {title} is not accessible")
+            self._worksheets[title] = worksheet
+        return self._worksheets[title]
+
+    def append_rows(self, title, headers, rows):
+        """Append rows in one request and return the last row number written"""
+        response = self._worksheet(title, headers).append_rows(rows)
+        updated_range = response.get('updates', {}).get('updatedRange', '')
+        match = re.search(r'(\d+)$', updated_range)
+        return int(match.group(1)) if match else None
+
+    def replace(self, title, headers, rows):
+        worksheet = self._worksheet(title, headers)
+        worksheet.clear()
+        worksheet.update('A1', rows)
+        return len(rows)
+
+class MemoryBackend:
+    """In-memory spreadsheet with the same interface, for tests and dry runs"""
+    def __init__(self):
+        self.worksheets = {}
+        self.calls = []
+
+    def _worksheet(self, title, headers):
+        if title not in self.worksheets:
+            self.worksheets[title] = [list(headers)]
+        return self.worksheets[title]
+
+    def append_rows(self, title, headers, rows):
+        self.calls.append(('append_rows', title, len(rows)))
+        worksheet = self._worksheet(title, headers)
+        worksheet.extend(rows)
+        return len(worksheet)
+
+    def replace(self, title, headers, rows):
+        self.calls.append(('replace', title, len(rows)))
+        self.worksheets[title] = [list(row) for row in rows]
+        return len(rows)
+
+class SheetWriter:
+    """Buffer rows per worksheet and write them with one request each on flush
+
+    Row counts are tracked from the write responses, so nothing is read back.
+    """
+    def __init__(self, spreadsheet_id=None, backend=None):
+        self.backend = backend if backend is not None else GSpreadBackend(spreadsheet_id)
+        self.row_counts = {}
+        self._pending = {}
+        self._headers = {}
+        self._summary = None
+
+    def _buffer(self, title, headers, rows):
+        self._headers[title] = headers
+        self._pending.setdefault(title, []).extend(rows)
+
+    def add_trades(self, trade_df, symbol):
+        rows = trade_rows(trade_df)
+        if rows:
+            self._buffer("TradeLog", TRADE_HEADERS, rows)
+            logging.info(f"📥 Buffered {len(rows)} trades for {symbol}")
+        else:
+            logging.warning("⚠️ No trade data to upload")
+        return len(rows)
+
+    def add_model_accuracy(self, symbol, accuracy):
+        self._buffer("MLResults", ML_HEADERS, [[symbol, f"{accuracy:.2%}"]])
+
+    def set_summary(self, summary_df):
+        self._summary = summary_rows(summary_df)
+        logging.info(f"📋 Summary data: {self._summary}")
+
+    def pending_rows(self):
+        return {title: len(rows) for title, rows in self._pending.items()}
+
+    def flush(self):
+        """Write all buffered rows; worksheets that fail keep their rows"""
+        for title in list(self._pending):
+            rows = self._pending[title]
+            if not rows:
+                continue
+            try:
+                last_row = self.backend.append_rows(title, self._headers[title], rows)
+                self.row_counts[title] = last_row
+                del self._pending[title]
+                logging.info(f"✅ Uploaded {len(rows)} rows to {title}")
+                if last_row is not None:
+                    logging.info(f"📝 Total rows in {title}: {last_row}")
+            except Exception as e:
+                logging.error(f"❌ Failed to upload {len(rows)} rows to {title}: {str(e)}")
+
+        if self._summary is not None:
+            try:
+                self.row_counts["Summary"] = self.backend.replace("Summary", SUMMARY_HEADERS, self._summary)
+                self._summary = None
+                logging.info("✅ Uploaded summary to Google Sheets")
+            except Exception as e:
+                logging.error(f"❌ Failed to log summary: {str(e)}")
+
+def log_trades_to_sheet(trade_df, symbol, spreadsheet_id, writer=None):
+    """Log trades to Google Sheet; buffered when a SheetWriter is given"""
     try:
         logging.info(f"📤 Preparing to upload {len(trade_df)} trades for {symbol}")
-        sheet = get_sheet_client(spreadsheet_id)
-        if not sheet:
-            return
-            
-        # Define headers
-        trade_headers = [
-            'entry_date', 'entry_price', 'position', 'exit_date',
-            'exit_price', 'pnl', 'symbol', 'holding_days', 'return_pct'
-        ]
-        
-        # Create worksheet if needed
-        worksheet = create_worksheet_if_not_exists(sheet, "TradeLog", trade_headers)
-        if not worksheet:
+        if writer is not None:
+            writer.add_trades(trade_df, symbol)
             return
-            
-        # Prepare data with serialization
-        data = []
-        for _, row in trade_df.iterrows():
-            if all(col in row for col in trade_headers):
-                data.append([convert_to_serializable(row[col]) for col in trade_headers])
-        
-        # Append new trades
-        if data:
-            current_row_count = len(worksheet.get_all_values())
-            worksheet.append_rows(data)
-            new_row_count = len(worksheet.get_all_values())
-            added_rows = new_row_count - current_row_count
-            logging.info(f"✅ Uploaded {added_rows} trades for {symbol} to Google Sheets")
-            logging.info(f"📝 Total rows in TradeLog: {new_row_count}")
-        else:
-            logging.warning("⚠️ No trade data to upload")
+        writer = SheetWriter(spreadsheet_id)
+        if writer.add_trades(trade_df, symbol):
+            writer.flush()
     except Exception as e:
         logging.error(f"❌ Failed to log trades for {symbol}: {str(e)}")
 
-def log_summary_to_sheet(summary_df, spreadsheet_id):
-    """Log summary to Google Sheet with proper serialization"""
+def log_summary_to_sheet(summary_df, spreadsheet_id, writer=None):
+    """Log summary to Google Sheet; buffered when a SheetWriter is given"""
     try:
         logging.info("📤 Preparing to upload summary")
-        sheet = get_sheet_client(spreadsheet_id)
-        if not sheet:
+        if writer is not None:
+            writer.set_summary(summary_df)
             return
-            
-        # Prepare summary stats
-        stats = {
-            "Total Trades": len(summary_df),
-            "Winning Trades": (summary_df['pnl'] > 0).sum() if 'pnl' in summary_df else 0,
-            "Losing Trades": (summary_df['pnl'] < 0).sum() if 'pnl' in summary_df else 0,
-            "Win Ratio": f"{(summary_df['pnl'] > 0).mean():.2%}" if 'pnl' in summary_df else "0.00%",
-            "Average P&L": summary_df['pnl'].mean() if 'pnl' in summary_df else 0,
-            "Total P&L": summary_df['pnl'].sum() if 'pnl' in summary_df else 0,
-            "Best Trade": summary_df['pnl'].max() if 'pnl' in summary_df else 0,
-            "Worst Trade": summary_df['pnl'].min() if 'pnl' in summary_df else 0
-        }
-        
-        # Convert to serializable format
-        serializable_stats = {k: convert_to_serializable(v) for k, v in stats.items()}
-        
-        # Format as rows
-        data = [["Metric", "Value"]]
-        data.extend([[k, v] for k, v in serializable_stats.items()])
-        
-        # Log the data being sent
-        logging.info(f"📋 Summary data: {data}")
-        
-        # Create or get worksheet
-        summary_headers = ["Metric", "Value"]
-        worksheet = create_worksheet_if_not_exists(sheet, "Summary", summary_headers)
-        if not worksheet:
-            return
-            
-        # Clear and update
-        worksheet.clear()
-        worksheet.update('A1', data)
-        logging.info("✅ Uploaded summary to Google Sheets")
-        
-        # Verify update
-        updated_data = worksheet.get_all_values()
-        logging.info(f"📝 Summary worksheet now has {len(updated_data)} rows")
+        writer = SheetWriter(spreadsheet_id)
+        writer.set_summary(summary_df)
+        writer.flush()
     except Exception as e:
         logging.error(f"❌ Failed to log summary: {str(e)}")
 
-def log_model_accuracy(symbol, accuracy, spreadsheet_id):
-    """Log ML accuracy to Google Sheet"""
+def log_model_accuracy(symbol, accuracy, spreadsheet_id, writer=None):
+    """Log ML accuracy to Google Sheet; buffered when a SheetWriter is given"""
     try:
         logging.info(f"📤 Preparing to upload ML accuracy for {symbol}")
-        sheet = get_sheet_client(spreadsheet_id)
-        if not sheet:
-            return
-            
-        # Create or get worksheet
-        ml_headers = ["Symbol", "Accuracy"]
-        worksheet = create_worksheet_if_not_exists(sheet, "MLResults", ml_headers)
-        if not worksheet:
+        if writer is not None:
+            writer.add_model_accuracy(symbol, accuracy)
             return
-            
-        # Append new row
-        row_data = [symbol, f"{accuracy:.2%}"]
-        current_row_count = len(worksheet.get_all_values())
-        worksheet.append_row(row_data)
-        new_row_count = len(worksheet.get_all_values())
-        
-        # Verify addition
-        if new_row_count > current_row_count:
-            logging.info(f"✅ Uploaded ML accuracy for {symbol} to Google Sheets")
-            logging.info(f"📝 Total rows in MLResults: {new_row_count}")
-        else:
-            logging.warning("⚠️ ML accuracy row not added")
+        writer = SheetWriter(spreadsheet_id)
+        writer.add_model_accuracy(symbol, accuracy)
+        writer.flush()
     except Exception as e:
-        logging.error(f"❌ Failed to log ML accuracy for {symbol}: {str(e)}")
\ No newline at end of file
+        logging.error(f"❌ Failed to log ML accuracy for {symbol}: {str(e)}")
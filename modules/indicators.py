@@ -2,28 +2,31 @@
 import pandas as pd
 import numpy as np
 
+from modules.kernels import macd, rolling_mean
+
 def compute_rsi(data, window=14):
     """Compute Relative Strength Index"""
-    delta = data['Close'].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    close = data['Close'].to_numpy(dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
 
-    avg_gain = gain.rolling(window).mean()
-    avg_loss = loss.rolling(window).mean()
+    avg_gain = rolling_mean(gain, window)
+    avg_loss = rolling_mean(loss, window)
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+    return pd.Series(rsi, index=data.index, name='Close')
 
 def compute_moving_averages(data, short_window=20, long_window=50):
     """Compute moving averages"""
-    data['20_DMA'] = data['Close'].rolling(short_window).mean()
-    data['50_DMA'] = data['Close'].rolling(long_window).mean()
+    close = data['Close'].to_numpy(dtype=np.float64)
+    data['20_DMA'] = rolling_mean(close, short_window)
+    data['50_DMA'] = rolling_mean(close, long_window)
     return data
 
 def compute_macd(data, fast=12, slow=26, signal=9):
     """Compute MACD and Signal Line"""
-    data['MACD'] = data['Close'].ewm(span=fast, min_periods=0, adjust=False).mean() - \
-                   data['Close'].ewm(span=slow, min_periods=0, adjust=False).mean()
-    data['Signal_Line'] = data['MACD'].ewm(span=signal, min_periods=0, adjust=False).mean()
-    return data
\ No newline at end of file
+    data['MACD'], data['Signal_Line'] = macd(data['Close'].to_numpy(dtype=np.float64), fast, slow, signal)
+    return data
@@ -0,0 +1,172 @@
+import os
+import csv
+import json
+import time
+import logging
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRIC_FIELDS = ['stage', 'symbol', 'calls', 'wall_seconds', 'cpu_seconds',
+                 'peak_rss_bytes', 'rss_delta_bytes', 'traced_peak_bytes']
+
+def _rss_bytes():
+    """Current resident set size, falling back to the peak where unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_bytes()
+
+def _peak_rss_bytes():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+class Instrumentation:
+    """Wall time, CPU time, RSS and call counts per pipeline stage and symbol
+
+    Stages are timed with the stage() context manager or wrap(). The cost is
+    a few clock and getrusage calls per stage, so it can stay on in
+    production. profile_stage turns on a cProfile ("cprofile") or tracemalloc
+    ("tracemalloc") capture for that one stage only; cProfile output goes to
+    profile_dir/<stage>_<symbol>.prof.
+    """
+    def __init__(self, enabled=True, profile_stage=None, profile_mode="cprofile",
+                 profile_dir=os.path.join("data", "profiles")):
+        if profile_mode not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown profile mode: {profile_mode}")
+        self.enabled = enabled
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.profile_dir = profile_dir
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, symbol=""):
+        if not self.enabled:
+            yield
+            return
+
+        profiler = None
+        if name == self.profile_stage:
+            if self.profile_mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            elif not tracemalloc.is_tracing():
+                tracemalloc.start()
+                profiler = tracemalloc
+            else:
+                tracemalloc.reset_peak()
+
+        rss_before = _rss_bytes()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            traced_peak = 0
+            if profiler is not None and self.profile_mode == "cprofile":
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                label = (symbol or str(os.getpid())).replace(os.sep, "_")
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}_{label}.prof"))
+            elif name == self.profile_stage:
+                traced_peak = tracemalloc.get_traced_memory()[1]
+                if profiler is not None:
+                    tracemalloc.stop()
+            self._record(name, symbol, 1, wall, cpu, _peak_rss_bytes(),
+                         _rss_bytes() - rss_before, traced_peak)
+
+    def wrap(self, name, func, symbol=""):
+        """Return func timed as stage name"""
+        def wrapped(*args, **kwargs):
+            with self.stage(name, symbol):
+                return func(*args, **kwargs)
+        return wrapped
+
+    def _record(self, stage, symbol, calls, wall, cpu, peak_rss, rss_delta, traced_peak):
+        with self._lock:
+            entry = self._stats.setdefault((stage, symbol), dict.fromkeys(METRIC_FIELDS[2:], 0))
+            entry['calls'] += calls
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            entry['peak_rss_bytes'] = max(entry['peak_rss_bytes'], peak_rss)
+            entry['rss_delta_bytes'] = max(entry['rss_delta_bytes'], rss_delta)
+            entry['traced_peak_bytes'] = max(entry['traced_peak_bytes'], traced_peak)
+
+    def records(self):
+        """One dict per (stage, symbol), sorted by stage then symbol"""
+        with self._lock:
+            return [{'stage': stage, 'symbol': symbol, **values}
+                    for (stage, symbol), values in sorted(self._stats.items())]
+
+    def merge(self, records):
+        """Add records collected elsewhere, e.g. in a worker process"""
+        for r in records or []:
+            self._record(r['stage'], r['symbol'], r['calls'], r['wall_seconds'], r['cpu_seconds'],
+                         r['peak_rss_bytes'], r['rss_delta_bytes'], r['traced_peak_bytes'])
+
+    def summary(self):
+        """Records aggregated over symbols, one per stage"""
+        totals = Instrumentation(enabled=False)
+        totals.merge([{**r, 'symbol': ""} for r in self.records()])
+        return totals.records()
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump({'stages': self.summary(), 'records': self.records()}, f, indent=2)
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=METRIC_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records())
+
+    def to_prometheus(self, prefix="algo_trading"):
+        """Prometheus text exposition format"""
+        metrics = [
+            ('stage_calls_total', 'counter', 'calls', 'Number of calls of a pipeline stage'),
+            ('stage_wall_seconds_total', 'counter', 'wall_seconds', 'Wall-clock seconds spent in a stage'),
+            ('stage_cpu_seconds_total', 'counter', 'cpu_seconds', 'CPU seconds spent in a stage'),
+            ('stage_peak_rss_bytes', 'gauge', 'peak_rss_bytes', 'Process peak RSS after the stage'),
+            ('stage_rss_delta_bytes', 'gauge', 'rss_delta_bytes', 'Largest RSS growth during one call'),
+            ('stage_traced_peak_bytes', 'gauge', 'traced_peak_bytes', 'Peak tracemalloc bytes of a profiled stage'),
+        ]
+        records = self.records()
+        lines = []
+        for name, kind, field, help_text in metrics:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for r in records:
+                labels = ",".join(f'{key}="{_escape(r[key])}"' for key in ('stage', 'symbol'))
+                lines.append(f"{prefix}_{name}{{{labels}}} {r[field]}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory, name="pipeline_metrics"):
+        """Write JSON, CSV and Prometheus reports into directory"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        self.to_json(base + ".json")
+        self.to_csv(base + ".csv")
+        with open(base + ".prom", "w") as f:
+            f.write(self.to_prometheus())
+        logging.info(f"📏 Stage metrics written to {base}.json/.csv/.prom")
+
+    def log_summary(self):
+        for r in sorted(self.summary(), key=lambda r: -r['wall_seconds']):
+            logging.info(f"⏱️ {r['stage']:<22} {r['wall_seconds']:8.2f}s wall | {r['cpu_seconds']:8.2f}s cpu "
+                         f"| {r['calls']:4d} calls | peak RSS {r['peak_rss_bytes'] / 2**20:,.0f} MB")
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import pickle
+import socket
+import sqlite3
+import hashlib
+import logging
+import itertools
+import multiprocessing
+
+import pandas as pd
+
+QUEUE_DB = os.path.join("data", "queue.db")
+LEASE_S = 600  # a job whose worker has not finished it by then is handed to another
+MAX_ATTEMPTS = 3
+POLL_S = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    run_id       TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    symbol       TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker       TEXT,
+    lease_until  INTEGER,
+    started_at   INTEGER,
+    finished_at  INTEGER,
+    error        TEXT,
+    result       BLOB
+);
+CREATE INDEX IF NOT EXISTS jobs_by_run ON jobs (run_id, status, seq);
+"""
+
+def job_id(run_id, symbol, params=None):
+    """Stable id of a symbol's job in a run, so enqueueing it again is a no-op"""
+    blob = json.dumps([run_id, symbol, params or {}], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class JobQueue:
+    """Per-symbol pipeline jobs in a SQLite file shared by a coordinator and workers
+
+    Jobs move pending -> running -> done, or back to pending when an
+    attempt fails, until max_attempts have failed. A claim leases the job
+    to its worker for lease_s; a job whose lease ran out (the worker died)
+    is claimed again by the next worker. Workers on other machines need
+    the file on shared storage. Times are time.time_ns().
+    """
+    def __init__(self, path=QUEUE_DB, lease_s=LEASE_S):
+        self.path = path
+        self.lease_s = lease_s
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def enqueue(self, run_id, symbols, params=None, max_attempts=MAX_ATTEMPTS, start=0):
+        """Add a job per symbol; returns their ids. Existing jobs are left as they are
+
+        Jobs are claimed in enqueue order; start is the position of the
+        first symbol when a run is queued a page at a time.
+        """
+        ids = [job_id(run_id, symbol, params) for symbol in symbols]
+        blob = json.dumps(params or {}, sort_keys=True, default=str)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (job_id, run_id, seq, symbol, params, status, max_attempts) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                [(jid, run_id, seq, symbol, blob, max_attempts)
+                 for seq, (jid, symbol) in enumerate(zip(ids, symbols), start)])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def _reap(self, now):
+        """Fail jobs whose last allowed attempt lost its lease"""
+        self.conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = ?, error = 'lease expired on the last attempt' "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts", (now, now))
+
+    def reap(self):
+        self._reap(time.time_ns())
+
+    def claim(self, worker, run_id=None):
+        """Lease the next runnable job to worker: a dict of its fields, or None"""
+        now = time.time_ns()
+        run_filter = "AND run_id = ?" if run_id is not None else ""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._reap(now)
+            row = self.conn.execute(
+                "SELECT job_id, run_id, symbol, params, attempts FROM jobs "
+                "WHERE (status = 'pending' OR (status = 'running' AND lease_until < ?)) "
+                f"AND attempts < max_attempts {run_filter} ORDER BY run_id, seq LIMIT 1",
+                (now,) + ((run_id,) if run_id is not None else ())).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                    "lease_until = ?, started_at = ? WHERE job_id = ?",
+                    (worker, now + int(self.lease_s * 1e9), now, row[0]))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return {'job_id': row[0], 'run_id': row[1], 'symbol': row[2], 'params': json.loads(row[3]),
+                'attempt': row[4] + 1}
+
+    def complete(self, job_id, worker, result):
+        """Store a job's result; False if worker no longer holds the job"""
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, error = NULL, result = ? "
+            "WHERE job_id = ? AND worker = ? AND status = 'running'",
+            (time.time_ns(), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), job_id, worker))
+        return cur.rowcount == 1
+
+    def fail(self, job_id, worker, error, result=None):
+        """Record a failed attempt: retried later, or failed for good after max_attempts"""
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL) if result is not None else None
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+            "finished_at = ?, error = ?, result = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+            (time.time_ns(), str(error), blob, job_id, worker))
+        return cur.rowcount == 1
+
+    def counts(self, run_id):
+        """{status: jobs} for a run"""
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status",
+                                 (run_id,))
+        return dict(rows.fetchall())
+
+    def results(self, run_id, start=0, stop=None):
+        """{symbol: result dict} of a run's finished jobs, in enqueue order
+
+        Only jobs queued at positions start to stop (exclusive) are read.
+        Failed jobs give their last attempt's result, or an error result
+        if the attempt raised.
+        """
+        results = {}
+        stop = stop if stop is not None else 2 ** 62
+        for symbol, status, error, blob in self.conn.execute(
+                "SELECT symbol, status, error, result FROM jobs "
+                "WHERE run_id = ? AND status IN ('done', 'failed') AND seq >= ? AND seq < ? ORDER BY seq",
+                (run_id, start, stop)):
+            if blob is not None:
+                results[symbol] = pickle.loads(blob)
+            else:
+                results[symbol] = {'symbol': symbol, 'status': 'error', 'trades': pd.DataFrame(),
+                                   'accuracy': 0.0, 'error': error, 'elapsed': 0.0}
+        return results
+
+    def throughput(self, run_id):
+        """Jobs, busy seconds and symbols per second of each worker in a run
+
+        A worker's rate is its finished jobs over the time from its first
+        claim to its last finish, so idle time between jobs counts against it.
+        """
+        rows = self.conn.execute(
+            "SELECT worker, COUNT(*), SUM(status = 'failed'), SUM(finished_at - started_at), "
+            "MIN(started_at), MAX(finished_at) FROM jobs "
+            "WHERE run_id = ? AND status IN ('done', 'failed') GROUP BY worker ORDER BY worker",
+            (run_id,)).fetchall()
+        table = pd.DataFrame(rows, columns=['worker', 'jobs', 'failed', 'busy_ns', 'first_ns', 'last_ns'])
+        table['busy_s'] = table.pop('busy_ns') / 1e9
+        table['wall_s'] = (table.pop('last_ns') - table.pop('first_ns')) / 1e9
+        table['symbols_per_s'] = table['jobs'] / table['wall_s'].where(table['wall_s'] > 0)
+        return table
+
+def run_job(job, feature_store=None, memo=None):
+    """Fetch one job's symbol and run the per-symbol pipeline on it"""
+    from modules.data_fetcher import CACHE_DIR, fetch_data
+    from modules.fills import FillModel
+    from modules.pipeline import process_symbol
+
+    params = job['params']
+    df = fetch_data(job['symbol'], period=params.get('period', "5y"), offline=params.get('offline', False),
+                    cache_dir=params.get('cache_dir', CACHE_DIR))
+    if df.empty and not params.get('offline', False):
+        # fetch_data logs and swallows download errors; let the queue retry them
+        raise RuntimeError(f"No data downloaded for {job['symbol']}")
+    fill_model = FillModel.preset(params['fill_model']) if params.get('fill_model') else None
+    return process_symbol(job['symbol'], df, params.get('initial_capital', 100000),
+                          train_mode=params.get('train_mode', "split"),
+                          low_memory=params.get('low_memory', False),
+                          feature_store=feature_store, memo=memo, fill_model=fill_model,
+                          # The coordinator's signal thresholds, in case its settings changed them
+                          signal_params=params.get('signals'))
+
+def _finished(counts):
+    return not counts.get('pending', 0) and not counts.get('running', 0)
+
+def run_worker(path=QUEUE_DB, worker=None, run_id=None, exit_when_idle=True, poll_s=POLL_S,
+               max_jobs=None, lease_s=LEASE_S):
+    """Claim and run jobs, returning how many were finished
+
+    A worker given a run_id stops once every job of that run is done or
+    failed, waiting meanwhile in case another worker's lease runs out.
+    Otherwise it stops when nothing is left to claim, or polls forever
+    with exit_when_idle=False. The feature store and memo cache are on
+    the worker's own disk, one per directory a job's params name, so
+    jobs of different runs use their own run's settings.
+    """
+    from modules.feature_store import FEATURE_DIR, FeatureStore
+    from modules.memo import MEMO_DIR, MemoCache
+
+    worker = worker or default_worker_id()
+    stores = {}  # (kind, directory) -> FeatureStore or MemoCache
+    finished = 0
+    with JobQueue(path, lease_s=lease_s) as queue:
+        logging.info(f"👷 Worker {worker} polling {path}")
+        while max_jobs is None or finished < max_jobs:
+            job = queue.claim(worker, run_id)
+            if job is None:
+                if run_id is not None and _finished(queue.counts(run_id)):
+                    break
+                if run_id is None and exit_when_idle:
+                    break
+                time.sleep(poll_s)
+                continue
+            params = job['params']
+            feature_store = memo = None
+            if params.get('feature_store'):
+                key = ('features', params.get('feature_dir', FEATURE_DIR))
+                if key not in stores:
+                    stores[key] = FeatureStore(key[1])
+                feature_store = stores[key]
+            if params.get('memo'):
+                key = ('memo', params.get('memo_dir', MEMO_DIR))
+                if key not in stores:
+                    stores[key] = MemoCache(key[1])
+                memo = stores[key]
+            try:
+                result = run_job(job, feature_store, memo)
+            except Exception as e:
+                result = {'status': 'error', 'error': str(e)}
+            if result['status'] == 'error':
+                logging.error(f"❌ {worker} failed {job['symbol']} (attempt {job['attempt']}): "
+                              f"{result['error']}")
+                queue.fail(job['job_id'], worker, result['error'], result if 'symbol' in result else None)
+            elif queue.complete(job['job_id'], worker, result):
+                finished += 1
+                logging.info(f"✅ {worker} finished {job['symbol']} in {result['elapsed']:.2f}s")
+    return finished
+
+def _pages(symbols, size=None):
+    """Lists of at most size symbols (all of them when size is None)"""
+    symbols = iter(symbols)
+    while True:
+        page = list(itertools.islice(symbols, size))
+        if not page:
+            return
+        yield page
+
+def _result_pages(path, run_id, symbols, page_size):
+    """coordinate's results for symbols, read back from the queue a page at a time"""
+    unfinished = {'status': 'error', 'trades': pd.DataFrame(), 'accuracy': 0.0,
+                  'error': "not finished before the timeout", 'elapsed': 0.0}
+    with JobQueue(path) as queue:
+        start = 0
+        for page in _pages(symbols, page_size):
+            done = queue.results(run_id, start, start + len(page))
+            start += len(page)
+            yield [done.get(symbol, {**unfinished, 'symbol': symbol}) for symbol in page]
+
+def coordinate(symbols, run_id, params=None, path=QUEUE_DB, local_workers=1, poll_s=POLL_S,
+               timeout_s=None, max_attempts=MAX_ATTEMPTS, page_size=None):
+    """Queue a job per symbol, wait for workers to finish them and return the results
+
+    local_workers processes are started here; more can join from any
+    machine with `python -m modules.cli worker --run-id <run_id>`. Returns
+    the results in symbol order (an error result for any symbol still
+    unfinished after timeout_s) and JobQueue.throughput's report, which is
+    also logged.
+
+    With page_size, symbols may be any iterable that can be read twice
+    (e.g. a Universe): they are queued page_size at a time, and the
+    results come back as an iterator of lists of at most page_size
+    results, each read from the queue when it is reached.
+    """
+    with JobQueue(path) as queue:
+        queued = 0
+        for page in _pages(symbols, page_size):
+            queue.enqueue(run_id, page, params, max_attempts=max_attempts, start=queued)
+            queued += len(page)
+        logging.info(f"📮 Queued {queued} jobs for run {run_id} in {path}")
+
+        processes = [multiprocessing.Process(target=run_worker, kwargs={
+            'path': path, 'worker': f"{default_worker_id()}-{i}", 'run_id': run_id, 'poll_s': poll_s})
+            for i in range(local_workers)]
+        for process in processes:
+            process.start()
+
+        start = time.time()
+        while True:
+            queue.reap()
+            if _finished(queue.counts(run_id)):
+                break
+            if timeout_s is not None and time.time() - start > timeout_s:
+                logging.error(f"❌ Run {run_id} timed out after {timeout_s}s: {queue.counts(run_id)}")
+                for process in processes:
+                    process.terminate()
+                break
+            time.sleep(poll_s)
+        for process in processes:
+            process.join()
+
+        report = queue.throughput(run_id)
+
+    for row in report.itertuples():
+        logging.info(f"⚡ {row.worker}: {row.jobs} jobs ({row.failed} failed) | busy {row.busy_s:.2f}s | "
+                     f"{row.symbols_per_s:.2f} symbols/s")
+    pages = _result_pages(path, run_id, symbols, page_size)
+    if page_size is None:
+        return [result for page in pages for result in page], report
+    return pages, report
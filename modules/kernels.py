@@ -0,0 +1,234 @@
+import math
+import importlib.util
+
+import numpy as np
+
+# "numba" compiles the loop kernels on first use, "numpy" runs vectorised
+# versions and "python" runs the loops as plain Python (slow, reference
+# only). All three give the same results to rounding.
+BACKEND = "numba" if importlib.util.find_spec("numba") is not None else "numpy"
+
+def _columns(x):
+    """x as a float64 (bars, columns) array, and a function restoring its shape"""
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 1:
+        return x[:, None], lambda out: out[:, 0]
+    return x, lambda out: out
+
+def _ema_loop(x, alpha, min_periods):
+    n, m = x.shape
+    out = np.empty((n, m))
+    for j in range(m):
+        state = np.nan
+        nobs = 0
+        for t in range(n):
+            value = x[t, j]
+            if not np.isnan(value):
+                nobs += 1
+                state = value if nobs == 1 else state + alpha * (value - state)
+            out[t, j] = state if nobs >= max(min_periods, 1) else np.nan
+    return out
+
+def _rolling_loop(x, window, min_periods, ddof, std):
+    n, m = x.shape
+    out = np.empty((n, m))
+    for j in range(m):
+        # Centre the column first so the sum-of-squares form stays accurate
+        centre, count = 0.0, 0
+        for t in range(n):
+            if not np.isnan(x[t, j]):
+                centre += x[t, j]
+                count += 1
+        centre = centre / count if count else 0.0
+        total, squares, count = 0.0, 0.0, 0
+        for t in range(n):
+            value = x[t, j]
+            if not np.isnan(value):
+                value -= centre
+                total += value
+                squares += value * value
+                count += 1
+            if t >= window and not np.isnan(x[t - window, j]):
+                old = x[t - window, j] - centre
+                total -= old
+                squares -= old * old
+                count -= 1
+            if np.isnan(x[t, j]) or count < max(min_periods, 1):
+                out[t, j] = np.nan
+            elif std:
+                out[t, j] = math.sqrt(max((squares - total * total / count) / (count - ddof), 0.0))
+            else:
+                out[t, j] = total / count + centre
+    return out
+
+_compiled = {}
+
+def _loop(func):
+    """func compiled with numba under the numba backend, as is otherwise"""
+    if BACKEND != "numba":
+        return func
+    if func not in _compiled:
+        from numba import njit  # slow to import, so only once a kernel runs
+        _compiled[func] = njit(cache=True)(func)
+    return _compiled[func]
+
+def _ema_blocks(x, alpha):
+    """EMA down the columns of a NaN-free x, vectorised across blocks of rows
+
+    Inside a block of L rows starting from state y:
+        y[i] = d**(i+1) * y + alpha * d**i * cumsum(x[k] * d**-k)[i],  d = 1 - alpha
+    Rounding in the cumulative sum is relative to its latest terms, which
+    the d**i factor scales back down, so the result is as accurate as the
+    recursion; the block length only has to keep d**-L far from overflow.
+    """
+    out = np.empty(x.shape)
+    if len(x) == 0:
+        return out
+    decay = 1 - alpha
+    if decay <= 0:
+        out[:] = x
+        return out
+    block = int(min(8192, max(1, 230 / -math.log(decay))))
+    steps = np.arange(block)
+    grow, shrink = (alpha * decay ** -steps)[:, None], (decay ** steps)[:, None]
+    state = x[0]
+    for start in range(0, len(x), block):
+        size = min(block, len(x) - start)
+        part = out[start:start + size]
+        np.multiply(x[start:start + size], grow[:size], out=part)
+        np.cumsum(part, axis=0, out=part)
+        part += decay * state
+        part *= shrink[:size]
+        state = part[-1]
+    return out
+
+def _ema_numpy(x, alpha, min_periods):
+    n = len(x)
+    if n == 0:
+        return np.empty(x.shape)
+    valid = ~np.isnan(x)
+    if valid.all():
+        out = _ema_blocks(x, alpha)
+        out[:max(min_periods, 1) - 1] = np.nan
+        return out
+    nobs = np.cumsum(valid, axis=0)
+    first = np.argmax(valid, axis=0)
+    last = n - 1 - np.argmax(valid[::-1], axis=0)
+    out = np.empty(x.shape)
+
+    # Columns that are complete from their first bar are done in one pass,
+    # with the leading NaNs set to the first value; the rest are compressed
+    contiguous = (nobs[-1] == last - first + 1) & (last == n - 1)
+    if contiguous.any():
+        block = x[:, contiguous]
+        starts = first[contiguous]
+        lead = np.arange(n)[:, None] < starts
+        block = np.where(lead, block[starts, np.arange(len(starts))], block)
+        out[:, contiguous] = _ema_blocks(np.nan_to_num(block), alpha)
+    for j in np.flatnonzero(~contiguous):
+        rows = valid[:, j]
+        if rows.any():
+            out[rows, j] = _ema_blocks(x[rows, j:j + 1], alpha)[:, 0]
+            # Missing bars hold the previous value
+            held = np.maximum.accumulate(np.where(rows, np.arange(n), 0))
+            out[:, j] = out[held, j]
+    out[nobs < max(min_periods, 1)] = np.nan
+    return out
+
+def ema(x, alpha=None, span=None, min_periods=0):
+    """pandas ewm(alpha or span, adjust=False).mean() down each column
+
+    NaN bars are skipped: the average holds its value through them, as if
+    the bar did not exist for that column.
+    """
+    alpha = 2 / (span + 1) if alpha is None else alpha
+    x, restore = _columns(x)
+    if BACKEND == "numpy":
+        return restore(_ema_numpy(x, alpha, min_periods))
+    return restore(_loop(_ema_loop)(x, alpha, min_periods))
+
+def _rolling_sum(x, window):
+    """Sum and count of non-NaN values over the trailing window of each column"""
+    csum = np.cumsum(np.nan_to_num(x), axis=0)
+    ccount = np.cumsum(~np.isnan(x), axis=0)
+    csum[window:] = csum[window:] - csum[:-window]
+    ccount[window:] = ccount[window:] - ccount[:-window]
+    return csum, ccount
+
+def rolling_mean(x, window, min_periods=None):
+    """pandas rolling(window, min_periods).mean() down each column (NaN where x is NaN)"""
+    min_periods = window if min_periods is None else min_periods
+    x, restore = _columns(x)
+    if BACKEND != "numpy":
+        return restore(_loop(_rolling_loop)(x, window, min_periods, 0, False))
+    total, count = _rolling_sum(x, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = total / count
+    out[(count < min_periods) | np.isnan(x)] = np.nan
+    return restore(out)
+
+def rolling_std(x, window, min_periods=None, ddof=1):
+    """pandas rolling(window, min_periods).std(ddof) down each column (NaN where x is NaN)"""
+    min_periods = max(window if min_periods is None else min_periods, ddof + 1)
+    x, restore = _columns(x)
+    if BACKEND != "numpy":
+        return restore(_loop(_rolling_loop)(x, window, min_periods, ddof, True))
+    centred = x - np.nanmean(x, axis=0) if len(x) and not np.isnan(x).all() else x
+    total, count = _rolling_sum(centred, window)
+    squares, _ = _rolling_sum(centred ** 2, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (squares - total ** 2 / count) / (count - ddof)
+    out = np.sqrt(np.clip(var, 0, None))
+    out[(count < min_periods) | np.isnan(x)] = np.nan
+    return restore(out)
+
+def shift(x, periods):
+    """Rows moved down by periods (up if negative), NaN filled"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if periods > 0:
+        out[periods:] = x[:-periods]
+    elif periods < 0:
+        out[:periods] = x[-periods:]
+    else:
+        out[:] = x
+    return out
+
+def _previous(x):
+    """Each column's previous observation: the row above, NaN on the first"""
+    return shift(x, 1)
+
+def wilder_rsi(close, window=14):
+    """RSI with Wilder smoothing, as strategy.calculate_indicators computes it
+
+    The first bar counts as no change; a zero average loss is replaced by
+    1e-10. Not clipped or filled.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = close - _previous(close)
+    delta = np.where(np.isnan(close), np.nan, np.nan_to_num(delta))
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    avg_gain = ema(gain, 1 / window, min_periods=window)
+    avg_loss = ema(loss, 1 / window, min_periods=window)
+    rs = avg_gain / np.where(avg_loss == 0, 1e-10, avg_loss)
+    return 100 - (100 / (1 + rs))
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD line and its signal line from span-based EMAs (adjust=False)"""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    return line, ema(line, span=signal)
+
+def atr(high, low, close, window=14):
+    """Average true range with Wilder smoothing (the first bar's range is high - low)"""
+    high, low = np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64)
+    prev_close = _previous(close)
+    with np.errstate(invalid='ignore'):
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return ema(true_range, 1 / window, min_periods=window)
+
+def bollinger(close, window=20, num_std=2.0, ddof=0):
+    """Middle, upper and lower Bollinger bands (population std by default)"""
+    middle = rolling_mean(close, window)
+    width = num_std * rolling_std(close, window, ddof=ddof)
+    return middle, middle + width, middle - width
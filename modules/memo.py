@@ -0,0 +1,132 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+
+import numpy as np
+
+MEMO_DIR = os.path.join("data", "memo")
+MEMO_MAX_BYTES = 512 * 2 ** 20
+# Bump a stage's version whenever its code changes what it returns, so
+# results cached by the old code are no longer found
+STAGE_VERSIONS = {
+    'calculate_indicators': 1,
+    'generate_signals': 1,
+    'backtest_strategy': 2,
+    'train_model': 1,
+}
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame: index, column names, dtypes and values"""
+    h = hashlib.blake2b(digest_size=16)
+    index = df.index
+    h.update(str(index.dtype).encode())
+    values = index.asi8 if hasattr(index, 'asi8') else index.to_numpy()
+    h.update(np.ascontiguousarray(values).tobytes())
+    for name in df.columns:
+        values = df[name].to_numpy()
+        h.update(f"{name}:{values.dtype}".encode())
+        h.update(np.ascontiguousarray(values).tobytes())
+    return h.hexdigest()
+
+def stage_key(stage, upstream, **params):
+    """Cache key of a stage run on upstream (a fingerprint or another key) with params"""
+    payload = json.dumps({'stage': stage, 'version': STAGE_VERSIONS[stage], 'upstream': upstream,
+                          'params': params}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+class MemoCache:
+    """Content-addressed store of stage results on disk with LRU eviction
+
+    Each result is pickled to memo_dir/<key[:2]>/<key>.pkl. Keys come from
+    stage_key, chained from the input frame's fingerprint, so a stage is
+    recomputed only when its input, params or STAGE_VERSIONS entry change.
+    A hit touches the file, and once the store grows past max_bytes the
+    least recently used files are removed. Writes are atomic, so worker
+    processes can share one directory.
+    """
+    def __init__(self, memo_dir=MEMO_DIR, max_bytes=MEMO_MAX_BYTES):
+        self.memo_dir = memo_dir
+        self.max_bytes = max_bytes
+        self._bytes = None
+
+    def _path(self, key):
+        return os.path.join(self.memo_dir, key[:2], f"{key}.pkl")
+
+    def get(self, key):
+        """(True, value) for a stored key, (False, None) otherwise
+
+        A file that cannot be unpickled (truncated, or written by code whose
+        classes have since moved) is a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logging.warning(f"⚠️ Ignoring unreadable memo entry {path}: {e}")
+            return False, None
+        return True, value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        if self._bytes is None:
+            self._bytes = self.size()
+        else:
+            self._bytes += os.path.getsize(path)
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def cached(self, key, func):
+        """func() through the cache: (value, hit)"""
+        hit, value = self.get(key)
+        if not hit:
+            value = func()
+            self.put(key, value)
+        return value, hit
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.memo_dir):
+            return entries
+        for bucket in os.scandir(self.memo_dir):
+            if bucket.is_dir():
+                for entry in os.scandir(bucket.path):
+                    if entry.name.endswith(".pkl"):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least recently used results until the store fits in max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._bytes = total
+        if removed:
+            logging.info(f"🧹 Evicted {removed} memoised results ({total / 2 ** 20:.1f}MB kept)")
+        return removed
@@ -0,0 +1,82 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from modules.strategy import calculate_indicators, generate_signals
+from modules.ml_model import prepare_features
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+# Low-memory mode keeps prices, indicators and features in float32 (about 7
+# significant digits). Indicators agree with the float64 path to within
+# INDICATOR_RTOL, and a buy/sell signal can only flip on a bar where an
+# indicator sits within that distance of a threshold: on five years of
+# daily bars that is at most SIGNAL_TOLERANCE of the bars, usually none.
+INDICATOR_RTOL = 1e-4
+SIGNAL_TOLERANCE = 0.001
+
+def downcast_prices(df):
+    """Return df with float32 open/high/low/close (volume is left alone)"""
+    columns = {col: np.float32 for col in PRICE_COLUMNS
+               if col in df.columns and df[col].dtype != np.float32}
+    return df.astype(columns) if columns else df
+
+def pack_signals(df, columns=('buy_signal', 'sell_signal')):
+    """Bit-pack boolean signal columns: one bit per bar instead of one byte"""
+    return {col: np.packbits(df[col].to_numpy(dtype=bool)) for col in columns}
+
+def unpack_signals(packed, index):
+    """Inverse of pack_signals, as a DataFrame on index"""
+    return pd.DataFrame({col: np.unpackbits(bits, count=len(index)).astype(bool)
+                         for col, bits in packed.items()}, index=index)
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def _run_stages(df, low_memory):
+    """Indicator, signal and feature stages as process_symbol runs them"""
+    if low_memory:
+        df = calculate_indicators(downcast_prices(df), low_memory=True)
+        signals = generate_signals(df)
+        features = prepare_features(df, low_memory=True)
+    else:
+        df = calculate_indicators(df)
+        signals = generate_signals(df.copy())
+        features = prepare_features(df.copy())
+    return signals, features
+
+def memory_report(df):
+    """Peak allocation and frame sizes of both modes, plus how far signals moved
+
+    Runs the indicator, signal and feature stages on copies of df in the
+    default and low-memory modes under tracemalloc.
+    """
+    report = {}
+    outputs = {}
+    for mode, low_memory in (('default', False), ('low_memory', True)):
+        source = df.copy()
+        tracemalloc.start()
+        try:
+            signals, features = _run_stages(source, low_memory)
+            report[f'{mode}_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # Signals and features share columns in low-memory mode, so count them once
+        frames = [signals] if low_memory else [signals, features]
+        report[f'{mode}_frame_bytes'] = sum(frame_bytes(f) for f in frames)
+        report[f'{mode}_signal_bytes'] = sum(
+            len(bits) for bits in pack_signals(signals).values()) if low_memory else \
+            sum(signals[c].to_numpy().nbytes for c in ('buy_signal', 'sell_signal'))
+        outputs[mode] = signals
+
+    base, low = outputs['default'], outputs['low_memory']
+    report['bars'] = len(base)
+    report['signal_flips'] = int((base['buy_signal'] != low['buy_signal']).sum() +
+                                 (base['sell_signal'] != low['sell_signal']).sum())
+    report['max_indicator_rel_diff'] = max(
+        float(np.nanmax(np.abs(low[c].to_numpy(np.float64) - base[c].to_numpy()) /
+                        np.maximum(np.abs(base[c].to_numpy()), 1e-9)))
+        for c in ('rsi', 'ma20', 'ma50'))
+    report['peak_saving'] = 1 - report['low_memory_peak_bytes'] / report['default_peak_bytes']
+    return report
+
@@ -1,36 +1,61 @@
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from joblib import Parallel, delayed
+import joblib
+import hashlib
+import json
+import glob
+import os
 import pandas as pd
 import numpy as np
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+MODEL_DIR = "models"
+FEATURES = [
+    'rsi', 'macd', 'signal', 'ma20', 'ma50', 
+    'returns', 'volatility', 'momentum_5', 'volume_change'
+]
+MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42, 'min_samples_split': 5}
 
-def prepare_features(df):
-    """Prepare features for ML model with robust handling"""
+def add_features(df, low_memory=False):
+    """Add the feature and target columns to df in place (no rows dropped)"""
+    store = (lambda values: values.astype(np.float32)) if low_memory else (lambda values: values)
+
+    # Basic features
+    df['returns'] = store(df['close'].pct_change())
+    df['volatility'] = store(df['close'].rolling(window=14).std())
+    
+    # Momentum features
+    df['momentum_5'] = store(df['close'] / df['close'].shift(5) - 1)
+    df['momentum_10'] = store(df['close'] / df['close'].shift(10) - 1)
+    
+    # Volume features
+    df['volume_change'] = store(df['volume'] / df['volume'].shift(1) - 1)
+    df['volume_ma'] = store(df['volume'].rolling(window=10).mean())
+    
+    # Ensure required indicators exist
+    for col in ['rsi', 'macd', 'signal', 'ma20', 'ma50']:
+        if col not in df.columns:
+            df[col] = 0
+    
+    # Target: 1 if next day return > 0.5%, else 0
+    df['target'] = (df['close'].shift(-1) > df['close'] * 1.005).astype(np.int8 if low_memory else int)
+    return df
+
+def prepare_features(df, low_memory=False):
+    """Prepare features for ML model with robust handling
+
+    low_memory stores the features as float32 and the target as int8, and
+    returns a row slice of df instead of a filtered copy when the rows with
+    missing values are only the leading warm-up bars.
+    """
     try:
-        # Basic features
-        df['returns'] = df['close'].pct_change()
-        df['volatility'] = df['close'].rolling(window=14).std()
-        
-        # Momentum features
-        df['momentum_5'] = df['close'] / df['close'].shift(5) - 1
-        df['momentum_10'] = df['close'] / df['close'].shift(10) - 1
-        
-        # Volume features
-        df['volume_change'] = df['volume'] / df['volume'].shift(1) - 1
-        df['volume_ma'] = df['volume'].rolling(window=10).mean()
-        
-        # Ensure required indicators exist
-        for col in ['rsi', 'macd', 'signal', 'ma20', 'ma50']:
-            if col not in df.columns:
-                df[col] = 0
-        
-        # Target: 1 if next day return > 0.5%, else 0
-        df['target'] = (df['close'].shift(-1) > df['close'] * 1.005).astype(int)
+        df = add_features(df, low_memory)
         
         # Drop rows with missing values
+        if low_memory:
+            complete = df.notna().all(axis=1).to_numpy()
+            first = complete.argmax() if complete.any() else len(df)
+            if complete[first:].all():
+                return df.iloc[first:]
         df = df.dropna()
         
         return df
@@ -38,21 +63,28 @@ def prepare_features(df):
         logging.error(f"❌ Feature preparation failed: {str(e)}")
         return pd.DataFrame()
 
-def train_model(df):
-    """Train and evaluate ML model with validation"""
+def _class_weight(y):
+    """Handle class imbalance"""
+    class_ratio = y.mean()
+    return 'balanced' if class_ratio < 0.3 or class_ratio > 0.7 else None
+
+def train_model(df, model_params=None):
+    """Train and evaluate ML model with validation
+
+    model_params override MODEL_PARAMS and the class_weight heuristic, e.g.
+    with the tuned configuration from modules/tuning.py.
+    """
+    # sklearn takes about a second to import, so it is loaded on first fit
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+
     try:
         if df.empty or 'target' not in df.columns or len(df) < 100:
             logging.warning("⚠️ Insufficient data for training")
             return None, 0.0
         
-        # Feature selection
-        features = [
-            'rsi', 'macd', 'signal', 'ma20', 'ma50', 
-            'returns', 'volatility', 'momentum_5', 'volume_change'
-        ]
-        
         # Ensure we have required features
-        available_features = [f for f in features if f in df.columns]
+        available_features = [f for f in FEATURES if f in df.columns]
         if len(available_features) < 5:
             logging.warning(f"⚠️ Only {len(available_features)} features available")
             return None, 0.0
@@ -60,12 +92,7 @@ def train_model(df):
         X = df[available_features]
         y = df['target']
         
-        # Handle class imbalance
-        class_ratio = y.mean()
-        if class_ratio < 0.3 or class_ratio > 0.7:
-            class_weight = 'balanced'
-        else:
-            class_weight = None
+        class_weight = _class_weight(y)
         
         # Chronological split
         split_idx = int(len(X) * 0.8)
@@ -78,12 +105,8 @@ def train_model(df):
             return None, 0.0
         
         # Train model
-        model = RandomForestClassifier(
-            n_estimators=100,
-            random_state=42,
-            class_weight=class_weight,
-            min_samples_split=5
-        )
+        model = RandomForestClassifier(**{'class_weight': class_weight, **MODEL_PARAMS,
+                                          **(model_params or {})})
         
         model.fit(X_train, y_train)
         predictions = model.predict(X_test)
@@ -97,4 +120,165 @@ def train_model(df):
         return model, accuracy
     except Exception as e:
         logging.error(f"❌ Model training failed: {str(e)}")
-        return None, 0.0
\ No newline at end of file
+        return None, 0.0
+
+def feature_set_id(features):
+    """Short stable id for a feature list, used to version saved models"""
+    return hashlib.sha1(",".join(features).encode()).hexdigest()[:8]
+
+def walk_forward_splits(n, n_splits=5, window="expanding", min_train=100, purge=0, embargo=0):
+    """Chronological (train, test) slices for walk-forward validation
+
+    The last n - min_train rows are cut into n_splits consecutive test blocks.
+    Each block is trained on everything before it ("expanding") or on the
+    min_train rows just before it ("rolling"). The purge rows whose labels
+    look into the test block (the target horizon) and a further embargo of
+    rows are left out between the training rows and the test block.
+    """
+    if window not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown walk-forward window: {window}")
+    test_size = (n - min_train) // n_splits
+    if test_size < 1:
+        return []
+    splits = []
+    for k in range(n_splits):
+        test_start = min_train + k * test_size
+        test_end = n if k == n_splits - 1 else test_start + test_size
+        train_end = test_start - purge - embargo
+        train_start = 0 if window == "expanding" else max(0, train_end - min_train)
+        splits.append((slice(train_start, train_end), slice(test_start, test_end)))
+    return splits
+
+def _fit_fold(X, y, train, test, model_params):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+
+    params = {'class_weight': _class_weight(y[train]), **model_params}
+    model = RandomForestClassifier(**params)
+    model.fit(X[train], y[train])
+    return accuracy_score(y[test], model.predict(X[test]))
+
+def model_params_id(model_params):
+    """Short stable id for model parameters (overriding MODEL_PARAMS), used to version saved models"""
+    params = json.dumps({**MODEL_PARAMS, **model_params}, sort_keys=True, default=str)
+    return hashlib.sha1(params.encode()).hexdigest()[:8]
+
+def _model_paths(symbol, features, model_dir, model_params=None):
+    """Saved bundles of a feature set (and parameters, if given), oldest end-date first"""
+    params = "*" if model_params is None else model_params_id(model_params)
+    pattern = os.path.join(model_dir, symbol, f"{feature_set_id(features)}_{params}_*.joblib")
+    return sorted(glob.glob(pattern), key=lambda path: (path.rsplit("_", 1)[-1], os.path.getmtime(path)))
+
+def load_latest_model(symbol, features=FEATURES, model_dir=MODEL_DIR, model_params=None):
+    """Most recent saved model bundle for a symbol and feature set, or None
+
+    model_params restricts it to models fitted with those parameters;
+    without them the latest model of any parameters is returned.
+    """
+    paths = _model_paths(symbol, features, model_dir, model_params)
+    return joblib.load(paths[-1]) if paths else None
+
+def save_model(bundle, symbol, model_dir=MODEL_DIR, keep=3):
+    """Save a model bundle versioned by feature set, model parameters and data end-date
+
+    The parameters are bundle['model_params'] (MODEL_PARAMS if missing).
+    """
+    os.makedirs(os.path.join(model_dir, symbol), exist_ok=True)
+    model_params = bundle.setdefault('model_params', dict(MODEL_PARAMS))
+    end = pd.Timestamp(bundle['end_date']).strftime('%Y%m%d')
+    version = f"{feature_set_id(bundle['features'])}_{model_params_id(model_params)}"
+    path = os.path.join(model_dir, symbol, f"{version}_{end}.joblib")
+    joblib.dump(bundle, path, compress=3)
+
+    # Keep only the latest few versions per feature set and parameters
+    for old in _model_paths(symbol, bundle['features'], model_dir, model_params)[:-keep]:
+        os.remove(old)
+    return path
+
+def walk_forward_train(df, symbol, n_splits=5, window="expanding", min_train=250,
+                       n_jobs=-1, model_dir=MODEL_DIR, warm_start_trees=20,
+                       max_trees=300, model_params=None):
+    """Walk-forward validated training with persisted, warm-started models
+
+    - No saved model: the folds from walk_forward_splits are scored in
+      parallel with joblib, then a final model is fit on all labelled rows.
+    - Saved model covering the same end-date: it is returned as is.
+    - Saved model with only new bars since: it is scored on those new bars
+      (out of sample) and the scores are added to its walk-forward accuracy,
+      then warm_start_trees trees fitted on the most recent min_train rows
+      are added. Once the forest would exceed max_trees it is refit from
+      scratch instead.
+
+    Saved models are only reused for the same features and model_params.
+    Returns (model, accuracy) like train_model.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    try:
+        model_params = {**MODEL_PARAMS, **(model_params or {})}
+        features = [f for f in FEATURES if f in df.columns]
+        if len(features) < 5 or 'target' not in df.columns:
+            logging.warning(f"⚠️ Only {len(features)} features available")
+            return None, 0.0
+
+        # The last row's target needs the next close, which isn't known yet
+        data = df.iloc[:-1]
+        if len(data) < min_train + n_splits:
+            logging.warning("⚠️ Insufficient data for walk-forward training")
+            return None, 0.0
+        end_date = data.index[-1]
+        X = data[features].to_numpy()
+        y = data['target'].to_numpy()
+
+        bundle = load_latest_model(symbol, features, model_dir, model_params)
+        if bundle is not None and pd.Timestamp(bundle['end_date']) == end_date:
+            logging.info(f"♻️ Reusing model for {symbol} trained to {end_date.date()}")
+            return bundle['model'], bundle['accuracy']
+
+        if bundle is not None and pd.Timestamp(bundle['end_date']) < end_date:
+            model = bundle['model']
+            new_rows = data.index > pd.Timestamp(bundle['end_date'])
+            recent = slice(len(data) - max(min_train, int(new_rows.sum())), len(data))
+            trees = model.n_estimators + warm_start_trees
+            if trees <= max_trees and len(np.unique(y[recent])) == len(model.classes_):
+                # Out-of-sample hits on the new bars join the walk-forward tally
+                hits = int((model.predict(X[new_rows]) == y[new_rows]).sum())
+                tested = bundle.get('n_tested', bundle['n_rows'] - min_train)
+                n_new = int(new_rows.sum())
+                accuracy = (bundle['accuracy'] * tested + hits) / (tested + n_new)
+                model.set_params(warm_start=True, n_estimators=trees)
+                model.fit(X[recent], y[recent])
+                logging.info(f"🌱 Warm-started {symbol}: +{warm_start_trees} trees on "
+                             f"{n_new} new bars | New-bar accuracy: {hits / n_new:.2%} "
+                             f"| Accuracy: {accuracy:.2%}")
+                bundle.update({'model': model, 'end_date': end_date, 'accuracy': accuracy,
+                               'n_rows': len(data), 'n_tested': tested + n_new})
+                save_model(bundle, symbol, model_dir)
+                return model, accuracy
+
+        # Full walk-forward evaluation, folds in parallel
+        splits = walk_forward_splits(len(data), n_splits, window, min_train)
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(X, y, train, test, model_params) for train, test in splits
+        )
+        accuracy = float(np.mean(scores))
+        logging.info(f"🧭 Walk-forward accuracy for {symbol}: {accuracy:.2%} "
+                     f"({', '.join(f'{s:.2%}' for s in scores)})")
+
+        model = RandomForestClassifier(**{'class_weight': _class_weight(y), **model_params})
+        model.fit(X, y)
+        save_model({
+            'model': model,
+            'features': features,
+            'end_date': end_date,
+            'n_rows': len(data),
+            'accuracy': accuracy,
+            'n_tested': sum(test.stop - test.start for _, test in splits),
+            'fold_scores': scores,
+            'window': window,
+            'model_params': model_params
+        }, symbol, model_dir)
+        return model, accuracy
+    except Exception as e:
+        logging.error(f"❌ Walk-forward training failed for {symbol}: {str(e)}")
+        return None, 0.0
@@ -0,0 +1,165 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from modules.strategy import ma_min_periods, signal_conditions
+from modules.kernels import ema, rolling_mean, rolling_std, shift, wilder_rsi
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+def _fill(x, valid):
+    """bfill then ffill within each column, leaving rows outside valid as NaN"""
+    df = pd.DataFrame(x)
+    return np.where(valid, df.bfill().ffill().to_numpy(), np.nan)
+
+class Panel:
+    """Dates x symbols x fields store for running the pipeline on a universe
+
+    Every field is one contiguous (dates, symbols) NumPy array, so
+    indicators, signals and ML features are computed for all symbols in one
+    vectorised pass. Symbols are aligned on the union of dates; a symbol's
+    missing dates are NaN and are skipped as if the bar did not exist, so
+    results match the per-symbol functions in strategy.py and ml_model.py.
+    Symbols with gaps inside their history are computed column by column.
+    frame(symbol) returns the per-symbol DataFrame those functions produce.
+    """
+    def __init__(self, dates, symbols, fields, dtype=np.float64):
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = list(symbols)
+        self.dtype = np.dtype(dtype)
+        self.fields = {}
+        for name, values in fields.items():
+            self[name] = values
+
+    @classmethod
+    def from_frames(cls, frames, dtype=np.float64, tail=None):
+        """Build a panel from {symbol: OHLCV DataFrame}, or from their last tail bars"""
+        symbols = list(frames)
+        start = -tail if tail else None
+        indexes = [pd.DatetimeIndex(frames[symbol].index[start:]) for symbol in symbols]
+        dates = indexes[0].append(indexes[1:]).unique().sort_values() if indexes else pd.DatetimeIndex([])
+        names = {index.name for index in indexes}
+        dates.name = names.pop() if len(names) == 1 else None
+        fields = {name: np.full((len(dates), len(symbols)), np.nan, dtype=dtype) for name in OHLCV_FIELDS}
+        # One row lookup per symbol, shared by its fields
+        for j, (symbol, index) in enumerate(zip(symbols, indexes)):
+            df = frames[symbol]
+            rows = np.searchsorted(dates.asi8, index.asi8)
+            for name in OHLCV_FIELDS:
+                if name in df.columns:
+                    fields[name][rows, j] = df[name].to_numpy(dtype=np.float64)[start:]
+        return cls(dates, symbols, fields, dtype)
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def select(self, symbols):
+        """A panel of only symbols (their columns copied), e.g. to send to a worker"""
+        cols = [self.symbols.index(symbol) for symbol in symbols]
+        return Panel(self.dates, symbols, {name: values[:, cols] for name, values in self.fields.items()},
+                     self.dtype)
+
+    def __setitem__(self, name, values):
+        values = np.asarray(values)
+        if values.shape != (len(self.dates), len(self.symbols)):
+            raise ValueError(f"Field {name} has shape {values.shape}, expected "
+                             f"{(len(self.dates), len(self.symbols))}")
+        if values.dtype != np.bool_:
+            values = values.astype(self.dtype, copy=False)
+        self.fields[name] = np.ascontiguousarray(values)
+
+    @property
+    def valid(self):
+        """Mask of (date, symbol) cells where the symbol has a bar"""
+        return ~np.isnan(self.fields['close'])
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.fields.values())
+
+    def _by_observation(self, func, *arrays):
+        """Apply a (bars, symbols) kernel so that missing bars are skipped"""
+        valid = self.valid
+        arrays = [np.asarray(a, dtype=np.float64) for a in arrays]
+        out = func(*arrays)
+        counts = valid.sum(axis=0)
+        first = np.argmax(valid, axis=0)
+        last = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+        gapped = np.flatnonzero((counts > 0) & (counts != last - first + 1))
+        for j in gapped:
+            rows = valid[:, j]
+            column = func(*[a[rows, j:j + 1] for a in arrays])
+            out[:, j] = np.nan
+            out[rows, j] = column[:, 0]
+        return out
+
+    def calculate_indicators(self):
+        """Vectorised strategy.calculate_indicators for every symbol"""
+        try:
+            valid = self.valid
+
+            close = self['close']
+            indicators = {
+                'rsi': self._by_observation(wilder_rsi, close),
+                'ma20': self._by_observation(lambda c: rolling_mean(c, 20, ma_min_periods(20)), close),
+                'ma50': self._by_observation(lambda c: rolling_mean(c, 50, ma_min_periods(50)), close),
+            }
+            indicators['macd'] = self._by_observation(lambda c: ema(c, span=12) - ema(c, span=26), close)
+            indicators['signal'] = self._by_observation(lambda m: ema(m, span=9), indicators['macd'])
+
+            for name, values in indicators.items():
+                values = _fill(values, valid)
+                if name == 'rsi':
+                    values = np.clip(values, 0, 100)
+                self[name] = values
+        except Exception as e:
+            logging.error(f"❌ Panel indicator calculation failed: {str(e)}")
+        return self
+
+    def generate_signals(self, params=None):
+        """Vectorised strategy.generate_signals for every symbol (params: see signal_conditions)"""
+        for col in ['rsi', 'ma20', 'ma50', 'macd', 'signal']:
+            if col not in self.fields:
+                self[col] = np.zeros((len(self.dates), len(self.symbols)))
+        buy, sell = signal_conditions(self['close'], self['rsi'], self['ma20'],
+                                      self['ma50'], self['macd'], self['signal'], params)
+        valid = self.valid
+        self['buy_signal'] = buy & valid
+        self['sell_signal'] = sell & valid
+        return self
+
+    def prepare_features(self):
+        """Vectorised ml_model.prepare_features (rows with NaN are left as NaN)"""
+        close, volume = self['close'], self['volume']
+        prev = lambda x, n: self._by_observation(lambda a: shift(a, n), x)
+        self['returns'] = close / prev(close, 1) - 1
+        self['volatility'] = self._by_observation(lambda c: rolling_std(c, 14), close)
+        self['momentum_5'] = close / prev(close, 5) - 1
+        self['momentum_10'] = close / prev(close, 10) - 1
+        self['volume_change'] = volume / prev(volume, 1) - 1
+        self['volume_ma'] = self._by_observation(lambda v: rolling_mean(v, 10), volume)
+        for col in ['rsi', 'macd', 'signal', 'ma20', 'ma50']:
+            if col not in self.fields:
+                self[col] = np.zeros((len(self.dates), len(self.symbols)))
+        with np.errstate(invalid='ignore'):
+            target = prev(close, -1) > close * 1.005
+        self['target'] = np.where(self.valid, target, np.nan)
+        return self
+
+    def view(self, symbol, fields=None):
+        """Per-symbol column views {field: 1-D array} without copying"""
+        j = self.symbols.index(symbol)
+        return {name: self.fields[name][:, j] for name in (fields or self.fields)}
+
+    def frame(self, symbol, fields=None, dropna=False):
+        """Per-symbol DataFrame over the dates the symbol traded
+
+        dropna=True mirrors prepare_features, which drops incomplete rows.
+        """
+        columns = self.view(symbol, fields)
+        rows = self.valid[:, self.symbols.index(symbol)]
+        df = pd.DataFrame({name: values[rows] for name, values in columns.items()},
+                          index=self.dates[rows])
+        if 'target' in df.columns:
+            df['target'] = df['target'].astype(int)
+        return df.dropna() if dropna else df
@@ -0,0 +1,233 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from modules.async_fetcher import AsyncFetcher, iter_frames
+from modules.strategy import INDICATOR_COLUMNS, SIGNAL_PARAMS, calculate_indicators, generate_signals
+from modules.backtester import backtest_strategy, backtest_window
+from modules.ml_model import prepare_features, train_model, walk_forward_train
+from modules.instrumentation import Instrumentation
+from modules.memory import downcast_prices
+from modules.tuning import load_best_params
+from modules.robustness import bar_returns
+from modules.memo import STAGE_VERSIONS, frame_fingerprint, stage_key
+from modules.panel import Panel
+
+MIN_BARS = 200
+SIGNAL_COLUMNS = ['buy_signal', 'sell_signal']
+# Columns prepare_features adds to an indicator frame
+FEATURE_COLUMNS = ['returns', 'volatility', 'momentum_5', 'momentum_10', 'volume_change', 'volume_ma',
+                   'target']
+
+def chunk_panel(frames, low_memory=False, signal_params=None, features=True):
+    """Indicators, signals and (with features) ML features for a chunk of symbols
+
+    frames maps symbol -> OHLCV DataFrame. Everything is computed in one
+    vectorised Panel pass instead of a pandas pipeline per symbol; pass
+    the result to process_symbol as panel. Symbols process_symbol would
+    skip (fewer than MIN_BARS bars) are left out, and None is returned
+    when none are left.
+    """
+    frames = {symbol: df for symbol, df in frames.items() if len(df) >= MIN_BARS}
+    if not frames:
+        return None
+    panel = Panel.from_frames(frames, dtype=np.float32 if low_memory else np.float64)
+    panel.calculate_indicators().generate_signals(signal_params)
+    if features:
+        panel.prepare_features()
+    return panel
+
+def _backtest(signal_df, symbol, initial_capital, fill_model=None):
+    """Backtest the recent window of signal_df, with what publish_result reports"""
+    logging.info(f"🔍 Signals - Buy: {signal_df['buy_signal'].sum()}, Sell: {signal_df['sell_signal'].sum()}")
+    logging.info(f"📈 Indicators - RSI min: {signal_df['rsi'].min():.2f}, max: {signal_df['rsi'].max():.2f}")
+
+    # Backtest with sufficient history
+    backtest_df = backtest_window(signal_df)
+    logging.info(f"💼 Backtesting last {len(backtest_df)} days")
+    trades = backtest_strategy(backtest_df, symbol, initial_capital, fill_model=fill_model)
+    return {
+        'trades': trades,
+        'returns': bar_returns(backtest_df['close'], trades, initial_capital),
+        'period_signals': (int(backtest_df['buy_signal'].sum()), int(backtest_df['sell_signal'].sum())),
+    }
+
+def process_symbol(symbol, df, initial_capital, train_mode="split", n_jobs=-1, profile_stage=None,
+                   low_memory=False, feature_store=None, memo=None, fill_model=None, signal_params=None,
+                   panel=None):
+    """CPU-bound stages for one symbol: indicators, signals, backtest and ML
+
+    train_mode "split" uses train_model's single 80/20 split; "walk_forward"
+    uses walk_forward_train, which persists models and warm-starts them
+    when only new bars arrived. Returns a plain dict so it can be sent back
+    from a worker process. The fitted model is not returned, only its accuracy;
+    per-stage metrics are returned under 'metrics' (see Instrumentation),
+    and the backtest's per-bar equity returns under 'returns' for
+    modules/robustness.py.
+    low_memory runs the stages on float32 columns without copying the frame
+    between them (see modules/memory.py). With a feature_store the ML rows
+    come from its cached matrix instead of being rebuilt.
+    With a memo (MemoCache) each stage's result is looked up by the data
+    fingerprint and its params first; a stage's inputs are only computed
+    when it misses, so an unchanged symbol loads two small results. The
+    stages served from the cache are listed under 'cached'.
+    fill_model (modules/fills.py) sets the backtest's fill prices and costs,
+    and signal_params overrides SIGNAL_PARAMS for this symbol's signals.
+    panel is chunk_panel's output for a chunk holding the symbol (computed
+    with the same signal_params); the indicator, signal and feature frames
+    are then views of the symbol's columns instead of being computed here.
+    """
+    start = time.time()
+    instr = Instrumentation(profile_stage=profile_stage)
+    result = {'symbol': symbol, 'status': 'ok', 'trades': pd.DataFrame(),
+              'accuracy': 0.0, 'error': None, 'cached': []}
+    try:
+        if df.empty or len(df) < MIN_BARS:
+            result['status'] = 'skipped'
+            return result
+
+        logging.info(f"📊 Data shape: {df.shape} | From {df.index[0].date()} to {df.index[-1].date()}")
+
+        raw = df
+        # Settings found by modules/tuning.py, if the symbol was tuned
+        model_params = load_best_params(symbol)
+        thresholds = {**SIGNAL_PARAMS, **(signal_params or {})}
+        keys = dict.fromkeys(STAGE_VERSIONS)
+        if memo is not None:
+            keys['calculate_indicators'] = stage_key('calculate_indicators', frame_fingerprint(raw),
+                                                     low_memory=low_memory, panel=panel is not None)
+            keys['generate_signals'] = stage_key('generate_signals', keys['calculate_indicators'],
+                                                 params=thresholds)
+            keys['backtest_strategy'] = stage_key('backtest_strategy', keys['generate_signals'],
+                                                  symbol=symbol, initial_capital=initial_capital,
+                                                  fill_model=fill_model.params() if fill_model else None)
+            keys['train_model'] = stage_key('train_model', keys['calculate_indicators'], symbol=symbol,
+                                            train_mode=train_mode, model_params=model_params)
+        computed = {}
+
+        def stage(name, func, *inputs):
+            """func(*inputs) timed as stage name, or its memoised result
+
+            inputs are callables evaluated only on a miss, before the timing starts.
+            """
+            if name not in computed:
+                hit, value = memo.get(keys[name]) if memo is not None else (False, None)
+                if hit:
+                    result['cached'].append(name)
+                else:
+                    args = [get() for get in inputs]
+                    with instr.stage(name, symbol):
+                        value = func(*args)
+                    if memo is not None:
+                        memo.put(keys[name], value)
+                computed[name] = value
+            return computed[name]
+
+        # The panel holds OHLCV columns only, in this order
+        columns = [col for col in raw.columns if panel is not None and col in panel.fields]
+
+        def indicators():
+            if panel is not None:
+                return stage('calculate_indicators', lambda: panel.frame(symbol, columns + INDICATOR_COLUMNS))
+            prices = downcast_prices(raw) if low_memory else raw
+            return stage('calculate_indicators', lambda: calculate_indicators(prices, low_memory=low_memory))
+
+        def signals():
+            if panel is not None:
+                return stage('generate_signals',
+                             lambda: panel.frame(symbol, columns + INDICATOR_COLUMNS + SIGNAL_COLUMNS))
+            return stage('generate_signals',
+                         lambda ind: generate_signals(ind if low_memory else ind.copy(), thresholds),
+                         indicators)
+
+        def features():
+            if feature_store is not None:
+                with instr.stage('prepare_features', symbol):
+                    return feature_store.features(symbol, raw)
+            if panel is not None and 'target' in panel.fields:
+                with instr.stage('prepare_features', symbol):
+                    return panel.frame(symbol, columns + INDICATOR_COLUMNS + FEATURE_COLUMNS, dropna=True)
+            # Outside the timing, so a miss here is timed as calculate_indicators only
+            ind = indicators()
+            with instr.stage('prepare_features', symbol):
+                return prepare_features(ind if low_memory else ind.copy(), low_memory=low_memory)
+
+        def train(ml_df):
+            if ml_df.empty or 'target' not in ml_df.columns:
+                return None
+            if train_mode == "walk_forward":
+                return walk_forward_train(ml_df, symbol, n_jobs=n_jobs, model_params=model_params)[1]
+            return train_model(ml_df, model_params)[1]
+
+        result.update(stage('backtest_strategy',
+                            lambda signal_df: _backtest(signal_df, symbol, initial_capital, fill_model),
+                            signals))
+        accuracy = stage('train_model', train, features)
+        if accuracy is None:
+            result['status'] = 'no_ml_data'
+        else:
+            result['accuracy'] = accuracy
+        if 'backtest_strategy' in result['cached'] and 'train_model' in result['cached']:
+            logging.info(f"♻️ {symbol} unchanged, reused cached backtest and model results")
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        result['elapsed'] = time.time() - start
+        result['metrics'] = instr.records()
+    return result
+
+def run_parallel(symbols, initial_capital, period="5y", offline=False,
+                 max_workers=None, fetch_workers=4, fetch_interval=2.0, train_mode="split",
+                 instrumentation=None, profile_stage=None, fetcher=None, low_memory=False,
+                 feature_store=None, memo=None, fill_model=None, signal_params=None, use_panel=False):
+    """Run the pipeline for many symbols, returning results in symbol order
+
+    Downloads run concurrently on an AsyncFetcher (at most fetch_workers in
+    flight, one new request every fetch_interval seconds on average) and
+    each frame is handed to the process pool as soon as it arrives, so
+    fetching and computing overlap. Fetch timings and the workers' stage
+    metrics are collected into instrumentation when one is given.
+    With use_panel, every frame is fetched first and the indicators,
+    signals and features of all symbols are computed here in one
+    chunk_panel pass; each worker then gets its symbol's columns of it.
+    """
+    instr = instrumentation or Instrumentation(enabled=False)
+    max_workers = max_workers or os.cpu_count() or 1
+    fetcher = fetcher or AsyncFetcher(rate=1 / fetch_interval, max_concurrency=fetch_workers,
+                                      offline=offline, instrumentation=instr)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as cpu_pool:
+        # The first job starts every worker, so they are forked before the
+        # fetcher's threads exist: a child forked while one of them holds a
+        # lock (e.g. mid-write to stderr) can hang on it
+        cpu_pool.submit(os.getpid).result()
+        jobs = {}
+        frames = iter_frames(symbols, fetcher, period)
+        panel = None
+        if use_panel:
+            frames = dict(frames)
+            with instr.stage('chunk_panel'):
+                panel = chunk_panel(frames, low_memory, signal_params, features=feature_store is None)
+            frames = frames.items()
+        for symbol, df in frames:
+            view = panel.select([symbol]) if panel is not None and symbol in panel.symbols else None
+            # One core per symbol, so folds are not parallelised again inside
+            jobs[symbol] = cpu_pool.submit(process_symbol, symbol, df, initial_capital,
+                                           train_mode, 1, profile_stage, low_memory, feature_store,
+                                           memo, fill_model, signal_params, view)
+
+        for symbol, job in jobs.items():
+            try:
+                results[symbol] = job.result()
+                instr.merge(results[symbol].get('metrics'))
+            except Exception as e:
+                results[symbol] = {'symbol': symbol, 'status': 'error', 'trades': pd.DataFrame(),
+                                   'accuracy': 0.0, 'error': str(e), 'elapsed': 0.0}
+
+    return [results[symbol] for symbol in symbols]
@@ -0,0 +1,180 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from modules.panel import Panel
+
+EXIT_REASONS = {0: 'signal', 1: 'stop', 2: 'end'}
+
+class PortfolioBacktester:
+    """Backtest a whole universe on one clock with a single cash balance
+
+    Each bar is processed in a fixed event order across all symbols:
+    stop-losses first, then sell signals, then buy signals for flat symbols
+    in panel symbol order, so exits free cash for same-bar entries. Per
+    symbol this keeps Backtester's rules (5% stop checked before signals,
+    re-entry allowed on a stopped-out bar but not after a signal exit).
+
+    allocation:
+      "shares"        min(max_shares, cash // price), today's sizing rule
+      "equal_weight"  equity / max_positions per position
+    symbol_weights maps symbol -> fraction of equity and overrides the rule
+    for those symbols. max_shares caps every position when not None.
+    """
+    def __init__(self, initial_capital=100000, max_positions=10, allocation="shares",
+                 max_shares=10, stop_loss_pct=0.05, symbol_weights=None):
+        if allocation not in ("shares", "equal_weight"):
+            raise ValueError(f"Unknown allocation rule: {allocation}")
+        self.initial_capital = initial_capital
+        self.max_positions = max_positions
+        self.allocation = allocation
+        self.max_shares = max_shares
+        self.stop_loss_pct = stop_loss_pct
+        self.symbol_weights = symbol_weights or {}
+
+    def _position_sizes(self, idx, prices, cash, equity, symbols):
+        if self.allocation == "shares":
+            budget = np.full(len(idx), float(cash))
+        else:
+            budget = np.full(len(idx), equity / self.max_positions)
+        for k, j in enumerate(idx):
+            if symbols[j] in self.symbol_weights:
+                budget[k] = equity * self.symbol_weights[symbols[j]]
+        qty = np.floor(np.minimum(budget, cash) / prices)
+        if self.max_shares is not None:
+            qty = np.minimum(qty, self.max_shares)
+        return qty
+
+    def run(self, data):
+        """Run on a Panel (or {symbol: DataFrame}) with buy/sell signals
+
+        Returns a dict with 'equity' (per-bar cash, holdings, equity,
+        exposure, drawdown, turnover, positions), 'trades' (one row per
+        round trip, in the backtest_strategy layout plus exit_reason) and
+        'stats'.
+        """
+        panel = data if isinstance(data, Panel) else Panel.from_frames(data)
+        if 'buy_signal' not in panel.fields:
+            panel.calculate_indicators().generate_signals()
+
+        dates, symbols = panel.dates, panel.symbols
+        close = panel['close'].astype(np.float64)
+        valid = panel.valid
+        mark = pd.DataFrame(close).ffill().fillna(0.0).to_numpy()
+        buy, sell = panel['buy_signal'], panel['sell_signal']
+        T, N = close.shape
+
+        shares = np.zeros(N)
+        entry_price = np.zeros(N)
+        stop_price = np.zeros(N)
+        entry_bar = np.full(N, -1)
+        cash = float(self.initial_capital)
+        trades = []
+        curve = np.zeros((T, 5))  # cash, holdings, traded value, open positions, equity
+
+        def close_positions(idx, t, prices, reason):
+            nonlocal cash
+            proceeds = shares[idx] * prices
+            cash += proceeds.sum()
+            for k, j in enumerate(idx):
+                trades.append((entry_bar[j], t, j, entry_price[j], prices[k], shares[j], reason))
+            shares[idx] = 0
+            return proceeds.sum()
+
+        for t in range(T):
+            c = close[t]
+            held = shares > 0
+            traded = 0.0
+            with np.errstate(invalid='ignore'):
+                stopped = held & valid[t] & (c < stop_price)
+            sold = held & valid[t] & ~stopped & sell[t]
+
+            for mask, reason in ((stopped, 1), (sold, 0)):
+                if mask.any():
+                    idx = np.flatnonzero(mask)
+                    traded += close_positions(idx, t, c[idx], reason)
+
+            candidates = valid[t] & buy[t] & (shares == 0) & ~sold
+            free = self.max_positions - np.count_nonzero(shares)
+            if free > 0 and candidates.any():
+                idx = np.flatnonzero(candidates)
+                prices = c[idx]
+                equity = cash + shares @ mark[t]
+                qty = self._position_sizes(idx, prices, cash, equity, symbols)
+                keep = qty >= 1
+                idx, prices, qty = idx[keep], prices[keep], qty[keep]
+                # Fill in symbol order while position slots last, skipping
+                # candidates that cost more than the cash left
+                cost = qty * prices
+                fits = np.zeros(len(idx), dtype=bool)
+                left = cash
+                for k in range(len(idx)):
+                    if cost[k] <= left:
+                        fits[k] = True
+                        left -= cost[k]
+                        free -= 1
+                        if not free:
+                            break
+                idx, prices, qty, cost = idx[fits], prices[fits], qty[fits], cost[fits]
+                if len(idx):
+                    shares[idx] = qty
+                    entry_price[idx] = prices
+                    stop_price[idx] = prices * (1 - self.stop_loss_pct)
+                    entry_bar[idx] = t
+                    cash -= cost.sum()
+                    traded += cost.sum()
+
+            holdings = shares @ mark[t]
+            curve[t] = (cash, holdings, traded, np.count_nonzero(shares), cash + holdings)
+
+        # Close out anything still open at the last known price
+        open_idx = np.flatnonzero(shares > 0)
+        if len(open_idx):
+            last_bar = np.array([np.flatnonzero(valid[:, j])[-1] for j in open_idx])
+            for j, t in zip(open_idx, last_bar):
+                trades.append((entry_bar[j], t, j, entry_price[j], close[t, j], shares[j], 2))
+
+        equity = self._equity_frame(curve, dates)
+        trade_log = self._trade_frame(trades, dates, symbols)
+        stats = {
+            'initial_capital': self.initial_capital,
+            'final_equity': float(equity['equity'].iloc[-1]) if T else float(self.initial_capital),
+            'total_return_pct': (float(equity['equity'].iloc[-1]) / self.initial_capital - 1) * 100 if T else 0.0,
+            'max_drawdown_pct': float(equity['drawdown'].min()) * 100 if T else 0.0,
+            'avg_exposure': float(equity['exposure'].mean()) if T else 0.0,
+            'turnover': float(equity['turnover'].sum()),
+            'trades': len(trade_log),
+            'win_rate': float((trade_log['pnl'] > 0).mean()) if len(trade_log) else 0.0
+        }
+        logging.info(f"💼 Portfolio | {N} symbols | {stats['trades']} trades | "
+                     f"Return: {stats['total_return_pct']:.2f}% | Max DD: {stats['max_drawdown_pct']:.2f}%")
+        return {'equity': equity, 'trades': trade_log, 'stats': stats}
+
+    def _equity_frame(self, curve, dates):
+        equity = pd.DataFrame(curve, index=dates,
+                              columns=['cash', 'holdings', 'traded_value', 'positions', 'equity'])
+        equity['positions'] = equity['positions'].astype(int)
+        equity['exposure'] = equity['holdings'] / equity['equity']
+        equity['drawdown'] = equity['equity'] / equity['equity'].cummax() - 1
+        equity['turnover'] = equity['traded_value'] / equity['equity']
+        return equity
+
+    def _trade_frame(self, trades, dates, symbols):
+        columns = ['entry_date', 'entry_price', 'position', 'exit_date', 'exit_price', 'pnl',
+                   'symbol', 'holding_days', 'return_pct', 'exit_reason']
+        if not trades:
+            return pd.DataFrame(columns=columns)
+        entry_t, exit_t, sym, entry_px, exit_px, qty, reason = map(np.asarray, zip(*trades))
+        log = pd.DataFrame({
+            'entry_date': dates[entry_t],
+            'entry_price': entry_px,
+            'position': qty.astype(int),
+            'exit_date': dates[exit_t],
+            'exit_price': exit_px,
+            'pnl': qty * (exit_px - entry_px),
+            'symbol': np.asarray(symbols, dtype=object)[sym],
+        })
+        log['holding_days'] = (log['exit_date'] - log['entry_date']).dt.days
+        log['return_pct'] = (log['pnl'] / (log['entry_price'] * log['position'])) * 100
+        log['exit_reason'] = [EXIT_REASONS[r] for r in reason]
+        return log.sort_values(['entry_date', 'symbol'], kind='stable').reset_index(drop=True)[columns]
@@ -0,0 +1,182 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from numpy.lib.stride_tricks import sliding_window_view
+
+METRICS = ['max_drawdown', 'sharpe', 'terminal_equity']
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+PERIODS_PER_YEAR = 252
+CHUNK_PATHS = 2000  # paths simulated per array, bounding memory to chunk x bars
+
+def bar_returns(close, trades, initial_capital=100000):
+    """Per-bar returns of the strategy's equity from a backtest_strategy trade log
+
+    A trade holds its position from its entry bar to its exit bar, marked
+    at the closes in between. Its entry and exit bars also carry the
+    difference between the fill price and that bar's close, and the costs
+    paid there (a fill model's entry_costs and the rest of costs), so
+    per-bar P&L summed over a trade equals its pnl. Cash is
+    initial_capital plus the realised P&L; the first return also covers
+    the first bar.
+    """
+    close = pd.Series(close)
+    n = len(close)
+    prices = close.to_numpy(dtype=float)
+    pnl = np.zeros(n)
+    if trades is not None and not trades.empty:
+        entry = close.index.get_indexer(trades['entry_date'])
+        exit_ = close.index.get_indexer(trades['exit_date'])
+        position = trades['position'].to_numpy(dtype=float)
+        held = np.zeros(n)
+        np.add.at(held, entry, position)
+        np.add.at(held, exit_, -position)
+        pnl[1:] = np.cumsum(held)[:-1] * np.diff(prices)
+        costs = trades['costs'].to_numpy(dtype=float) if 'costs' in trades else np.zeros(len(trades))
+        entry_costs = (trades['entry_costs'].to_numpy(dtype=float) if 'entry_costs' in trades
+                       else np.zeros(len(trades)))
+        np.add.at(pnl, entry, position * (prices[entry] - trades['entry_price'].to_numpy(dtype=float))
+                  - entry_costs)
+        np.add.at(pnl, exit_, position * (trades['exit_price'].to_numpy(dtype=float) - prices[exit_])
+                  - (costs - entry_costs))
+    if n > 1:
+        pnl[1] += pnl[0]
+    equity = initial_capital + np.cumsum(pnl[1:])
+    returns = pnl[1:] / np.concatenate([[initial_capital], equity[:-1]])
+    return returns
+
+def block_sample(base, n_paths, block_size, rng):
+    """(n_paths, len(base)) circular block bootstrap of base
+
+    Every block is a row of a strided view over the wrapped series, so the
+    sample is gathered a block at a time instead of one index per bar.
+    """
+    n = len(base)
+    block_size = min(block_size, n)
+    blocks = sliding_window_view(np.concatenate([base, base[:block_size - 1]]), block_size)
+    starts = rng.integers(0, n, (n_paths, -(-n // block_size)))
+    return blocks[starts].reshape(n_paths, -1)[:, :n]
+
+def path_metrics(returns, initial_capital=100000, periods_per_year=PERIODS_PER_YEAR):
+    """Max drawdown, annualised Sharpe and terminal equity of each row of returns
+
+    Overwrites returns with the paths' equity (per unit of capital) to
+    avoid allocating another paths x bars array.
+    """
+    std = returns.std(axis=1)
+    sharpe = np.divide(returns.mean(axis=1), std, out=np.zeros(len(returns)), where=std > 0) * \
+        np.sqrt(periods_per_year)
+    equity = np.add(returns, 1, out=returns)
+    np.cumprod(equity, axis=1, out=equity)
+    peak = np.maximum.accumulate(equity, axis=1)
+    # Drawdowns are measured from the starting capital too
+    np.maximum(peak, 1, out=peak)
+    drawdown = 1 - np.divide(equity, peak, out=peak).min(axis=1)
+    return {'max_drawdown': drawdown, 'sharpe': sharpe,
+            'terminal_equity': initial_capital * equity[:, -1]}
+
+def _base_returns(returns, trades, method, initial_capital, periods_per_year):
+    """The series a method resamples, and its periods per year"""
+    if method == "block_bootstrap":
+        return np.asarray(returns, dtype=float), periods_per_year
+    if method not in ("trade_reshuffle", "trade_bootstrap"):
+        raise ValueError(f"Unknown robustness method: {method}")
+    if trades is None or trades.empty:
+        return np.empty(0), periods_per_year
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    # Each trade's P&L relative to the account's equity when it opened
+    base = pnl / (initial_capital + np.concatenate([[0.0], np.cumsum(pnl)[:-1]]))
+    # Returns are per trade, so annualise with trades per year
+    years = (trades['exit_date'].max() - trades['entry_date'].min()).days / 365.25
+    return base, len(base) / years if years > 0 else 1
+
+def _flat_metrics(n_paths, initial_capital):
+    return {'max_drawdown': np.zeros(n_paths), 'sharpe': np.zeros(n_paths),
+            'terminal_equity': np.full(n_paths, float(initial_capital))}
+
+def historical_metrics(returns=None, trades=None, method="block_bootstrap", initial_capital=100000,
+                       periods_per_year=PERIODS_PER_YEAR):
+    """Path metrics of the series simulate resamples, in its historical order"""
+    base, periods_per_year = _base_returns(returns, trades, method, initial_capital, periods_per_year)
+    if len(base) == 0:
+        metrics = _flat_metrics(1, initial_capital)
+    else:
+        metrics = path_metrics(base[None, :].copy(), initial_capital, periods_per_year)
+    return {name: float(values[0]) for name, values in metrics.items()}
+
+def simulate(returns=None, trades=None, method="block_bootstrap", n_paths=10000, block_size=20,
+             initial_capital=100000, periods_per_year=PERIODS_PER_YEAR, seed=0):
+    """Distributions of the path metrics under resampling
+
+    method:
+    - "block_bootstrap": circular blocks of block_size per-bar returns, so
+      volatility clustering within a block is kept.
+    - "trade_reshuffle": the trades' returns in a random order (terminal
+      equity is fixed, drawdown and path shape vary).
+    - "trade_bootstrap": trades drawn with replacement.
+
+    Trade methods take pnl from a backtest_strategy trade log, as a return
+    on the equity before each trade so the historical order compounds back
+    to the historical terminal equity. Their Sharpe is annualised with the
+    number of trades per year.
+    Returns {metric: array of n_paths}.
+    """
+    rng = np.random.default_rng(seed)
+    base, periods_per_year = _base_returns(returns, trades, method, initial_capital, periods_per_year)
+    n = len(base)
+    if n == 0:
+        return _flat_metrics(n_paths, initial_capital)
+
+    results = {name: np.empty(n_paths) for name in METRICS}
+    for start in range(0, n_paths, CHUNK_PATHS):
+        paths = min(CHUNK_PATHS, n_paths - start)
+        if method == "block_bootstrap":
+            sample = block_sample(base, paths, block_size, rng)
+        elif method == "trade_reshuffle":
+            sample = rng.permuted(np.broadcast_to(base, (paths, n)), axis=1)
+        else:
+            sample = base[rng.integers(0, n, (paths, n))]
+        for name, values in path_metrics(sample, initial_capital, periods_per_year).items():
+            results[name][start:start + paths] = values
+    return results
+
+def summarize(results, historical=None):
+    """Mean, standard deviation and quantiles per metric as a DataFrame"""
+    rows = []
+    for name in METRICS:
+        values = results[name]
+        row = {'metric': name, 'mean': values.mean(), 'std': values.std()}
+        row.update({f"p{int(q * 100)}": v for q, v in zip(QUANTILES, np.quantile(values, QUANTILES))})
+        if historical is not None:
+            row['historical'] = historical[name]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def _simulate_symbol(symbol, returns, trades, method, n_paths, block_size, initial_capital, seed):
+    table = summarize(simulate(returns, trades, method, n_paths, block_size, initial_capital,
+                               seed=seed),
+                      historical_metrics(returns, trades, method, initial_capital))
+    table.insert(0, 'symbol', symbol)
+    return table
+
+def run_robustness(inputs, method="block_bootstrap", n_paths=10000, block_size=20,
+                   initial_capital=100000, n_jobs=-1, seed=0, first=0):
+    """Robustness table for many symbols, simulated across processes
+
+    inputs maps symbol -> (per-bar returns, trade log); either may be None
+    when the method does not need it. Each symbol gets its own seed spawned
+    from seed, so results do not depend on n_jobs. A universe simulated in
+    chunks passes each chunk's position as first, so the seeds, and the
+    results, do not depend on the chunk size either.
+    """
+    seeds = [np.random.SeedSequence(seed, spawn_key=(first + i,)) for i in range(len(inputs))]
+    tables = Parallel(n_jobs=n_jobs)(
+        delayed(_simulate_symbol)(symbol, returns, trades, method, n_paths, block_size,
+                                  initial_capital, child)
+        for (symbol, (returns, trades)), child in zip(inputs.items(), seeds)
+    )
+    if not tables:
+        return pd.DataFrame()
+    logging.info(f"🎲 Simulated {n_paths} {method} paths for {len(tables)} symbols")
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,172 @@
+import os
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+from modules.strategy import calculate_indicators
+from modules.ml_model import MODEL_DIR, load_latest_model, prepare_features
+from modules.panel import OHLCV_FIELDS, Panel
+
+# Bars of history used to rebuild the latest feature row. EMA/Wilder weights
+# older than this are below 1e-9, so the row matches a full-history rebuild.
+FEATURE_LOOKBACK = 300
+
+def latest_feature_row(df, features):
+    """Feature vector for the last bar of an OHLCV frame (prepare_features logic)"""
+    tail = df.iloc[-FEATURE_LOOKBACK:].copy()
+    feats = prepare_features(calculate_indicators(tail))
+    if feats.empty:
+        return np.full(len(features), np.nan)
+    return feats[features].iloc[-1].to_numpy(dtype=np.float64)
+
+def latest_feature_rows(frames):
+    """Feature rows for the last bar of every OHLCV frame, computed together on a Panel
+
+    Returns a DataFrame indexed by symbol with one column per feature. A
+    symbol whose last bar has an incomplete row (which prepare_features
+    would drop) falls back to latest_feature_row.
+    """
+    frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+    panel = Panel.from_frames(frames, tail=FEATURE_LOOKBACK).calculate_indicators().prepare_features()
+    valid = panel.valid
+    last = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+    names = [name for name in panel.fields if name not in OHLCV_FIELDS + ['target']]
+    columns = np.arange(len(panel.symbols))
+    rows = pd.DataFrame({name: panel[name][last, columns].astype(np.float64) for name in names},
+                        index=panel.symbols)
+    last_bar = np.vstack([panel[name][last, columns] for name in OHLCV_FIELDS + names])
+    complete = ~np.isnan(last_bar).any(axis=0)
+    for symbol in rows.index[~complete]:
+        rows.loc[symbol] = latest_feature_row(frames[symbol], names)
+    return rows
+
+class UniverseScorer:
+    """Keeps per-symbol RandomForest models resident and scores them together
+
+    The trees of every model are packed into flat node arrays at load time;
+    score() then walks all (symbol, tree) pairs one level at a time with
+    NumPy, so a whole universe costs a few array operations per tree level
+    instead of one predict_proba call per symbol.
+    """
+    def __init__(self, bundles):
+        self.symbols = list(bundles)
+        self.features = {symbol: list(bundles[symbol]['features']) for symbol in self.symbols}
+        self.width = max((len(f) for f in self.features.values()), default=0)
+        self._compile([bundles[symbol]['model'] for symbol in self.symbols])
+
+    @classmethod
+    def load(cls, symbols=None, model_dir=MODEL_DIR):
+        """Load the latest saved model of every symbol (or the given ones)"""
+        if symbols is None:
+            symbols = sorted(d for d in os.listdir(model_dir)
+                             if os.path.isdir(os.path.join(model_dir, d))) if os.path.isdir(model_dir) else []
+        bundles = {}
+        for symbol in symbols:
+            bundle = load_latest_model(symbol, model_dir=model_dir)
+            if bundle is None:
+                logging.warning(f"⚠️ No saved model for {symbol}")
+                continue
+            bundles[symbol] = bundle
+        logging.info(f"📦 Loaded {len(bundles)} models for scoring")
+        return cls(bundles)
+
+    def _compile(self, models):
+        left, right, feature, threshold, leaf_proba = [], [], [], [], []
+        roots, owners, n_trees = [], [], []
+        offset = 0
+        max_depth = 0
+        for s, model in enumerate(models):
+            classes = list(model.classes_)
+            positive = classes.index(1) if 1 in classes else None
+            n_trees.append(len(model.estimators_))
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                is_leaf = tree.children_left == -1
+                # Leaves point at themselves so extra iterations are no-ops
+                nodes = np.arange(tree.node_count)
+                left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+                right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+                feature.append(np.where(is_leaf, 0, tree.feature))
+                threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+                values = tree.value[:, 0, :]
+                if positive is None:
+                    leaf_proba.append(np.zeros(tree.node_count))
+                else:
+                    leaf_proba.append(values[:, positive] / values.sum(axis=1))
+                roots.append(offset)
+                owners.append(s)
+                offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+        empty = np.zeros(0)
+        self._left = np.concatenate(left) if left else empty.astype(np.int64)
+        self._right = np.concatenate(right) if right else empty.astype(np.int64)
+        self._feature = np.concatenate(feature) if feature else empty.astype(np.int64)
+        self._threshold = np.concatenate(threshold) if threshold else empty
+        self._leaf_proba = np.concatenate(leaf_proba) if leaf_proba else empty
+        self._roots = np.asarray(roots, dtype=np.int64)
+        self._owners = np.asarray(owners, dtype=np.int64)
+        self._n_trees = np.asarray(n_trees, dtype=np.float64)
+        self._max_depth = max_depth
+
+    def score(self, X):
+        """Next-bar probability of the positive class for each symbol
+
+        X is (symbols, features) in self.symbols order, each row laid out
+        in that symbol's feature order. Rows containing NaN score NaN.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if not len(self.symbols):
+            return np.zeros(0)
+        # Trees compare float32 features against float64 thresholds
+        X32 = X.astype(np.float32).astype(np.float64)
+        flat = X32.ravel()
+        base = self._owners * X.shape[1]
+
+        node = self._roots.copy()
+        for _ in range(self._max_depth):
+            go_left = flat[base + self._feature[node]] <= self._threshold[node]
+            node = np.where(go_left, self._left[node], self._right[node])
+
+        totals = np.bincount(self._owners, weights=self._leaf_proba[node], minlength=len(self.symbols))
+        proba = totals / self._n_trees
+        proba[np.isnan(X).any(axis=1)] = np.nan
+        return proba
+
+    def feature_matrix(self, frames, feature_store=None):
+        """Latest feature row of every loaded symbol from its OHLCV frame
+
+        The rows are built for all symbols at once with latest_feature_rows;
+        with a feature_store they are read from each symbol's cached matrix.
+        """
+        X = np.full((len(self.symbols), self.width), np.nan)
+        frames = {symbol: frames.get(symbol) for symbol in self.symbols}
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+        if feature_store is not None:
+            for s, symbol in enumerate(self.symbols):
+                if symbol in frames:
+                    features = self.features[symbol]
+                    row = feature_store.frame(symbol, frames[symbol])[features].iloc[-1]
+                    X[s, :len(features)] = row.to_numpy(dtype=np.float64)
+            return X
+        if not frames:
+            return X
+        rows = latest_feature_rows(frames).reindex(self.symbols)
+        # Symbols sharing a feature list are copied in one slice
+        groups = {}
+        for s, symbol in enumerate(self.symbols):
+            groups.setdefault(tuple(self.features[symbol]), []).append(s)
+        for features, members in groups.items():
+            X[members, :len(features)] = rows[list(features)].to_numpy(dtype=np.float64)[members]
+        return X
+
+    def score_frames(self, frames, feature_store=None):
+        """Build the latest feature rows and score them as a Series by symbol"""
+        start = time.perf_counter()
+        X = self.feature_matrix(frames, feature_store)
+        built = time.perf_counter()
+        proba = self.score(X)
+        logging.info(f"🎯 Scored {len(self.symbols)} symbols | Features: {(built - start) * 1000:.1f}ms "
+                     f"| Inference: {(time.perf_counter() - built) * 1000:.1f}ms")
+        return pd.Series(proba, index=self.symbols, name='probability')
@@ -0,0 +1,201 @@
+import os
+import re
+import csv
+import logging
+
+from modules.fills import PRESETS
+from modules.strategy import SIGNAL_PARAMS
+
+# Google Sheet the run and `cli publish` write to, kept here so the CLI
+# can read it without importing main
+SPREADSHEET_ID = '1OJW19vsYGIj-ZEHvuF5G1hEPqmNixC3VUhEIQ9eMQaw'
+
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9&._=^-]*$")
+MAX_REPORTED_ERRORS = 20
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _text(value):
+    return isinstance(value, str) and value != ""
+
+# Every key a settings file may set, with a check of its value. Keys are
+# main.py's constants in lower case (see main.apply_settings).
+FIELDS = {
+    'spreadsheet_id': (_text, "a non-empty string"),
+    'universe': (lambda v: _text(v) or (isinstance(v, list) and all(_text(s) for s in v)),
+                 "a CSV path or a list of symbols"),
+    'universe_column': (_text, "a column name"),
+    'symbol_suffix': (lambda v: isinstance(v, str), "a string such as '.NS'"),
+    'chunk_size': (lambda v: _integer(v) and v > 0, "a positive integer"),
+    'initial_capital': (lambda v: _number(v) and v > 0, "a positive number"),
+    'min_accuracy': (lambda v: _number(v) and 0 <= v <= 1, "a number from 0 to 1"),
+    'signals': (lambda v: isinstance(v, dict) and set(v) <= set(SIGNAL_PARAMS)
+                and all(_number(x) for x in v.values()),
+                f"a table of numbers with keys from {sorted(SIGNAL_PARAMS)}"),
+    'offline_mode': (lambda v: isinstance(v, bool), "true or false"),
+    'parallel_mode': (lambda v: isinstance(v, bool), "true or false"),
+    'panel_mode': (lambda v: isinstance(v, bool), "true or false"),
+    'distributed_mode': (lambda v: isinstance(v, bool), "true or false"),
+    'low_memory': (lambda v: isinstance(v, bool), "true or false"),
+    'feature_store': (lambda v: isinstance(v, bool), "true or false"),
+    'memo_cache': (lambda v: isinstance(v, bool), "true or false"),
+    'export_symbol_csv': (lambda v: isinstance(v, bool), "true or false"),
+    'max_workers': (lambda v: v is None or (_integer(v) and v > 0), "a positive integer or null"),
+    'local_workers': (lambda v: _integer(v) and v >= 0, "a non-negative integer"),
+    'fetch_concurrency': (lambda v: _integer(v) and v > 0, "a positive integer"),
+    'fetch_rate': (lambda v: _number(v) and v > 0, "a positive number"),
+    'train_mode': (lambda v: v in ("split", "walk_forward"), "'split' or 'walk_forward'"),
+    'fill_model': (lambda v: v is None or v in PRESETS, f"null or one of {sorted(PRESETS)}"),
+    'robustness_paths': (lambda v: _integer(v) and v >= 0, "a non-negative integer"),
+    'profile_stage': (lambda v: v is None or _text(v), "a stage name or null"),
+    'cache_dir': (_text, "a directory"),
+    'feature_dir': (_text, "a directory"),
+    'memo_dir': (_text, "a directory"),
+    'metrics_dir': (_text, "a directory"),
+    'trade_db': (_text, "a file path"),
+    'queue_db': (_text, "a file path"),
+}
+
+class Universe:
+    """Symbols to run: a list, or a CSV file read a chunk at a time
+
+    A CSV needs a header with column (matched case-insensitively, so NSE's
+    EQUITY_L.csv works with column="SYMBOL"); suffix is appended to each
+    symbol, e.g. ".NS" for Yahoo tickers. The file is only read row by
+    row, by validate() and on each iteration.
+    """
+    def __init__(self, symbols=None, path=None, column="symbol", suffix=""):
+        if (symbols is None) == (path is None):
+            raise ValueError("Universe needs either symbols or a path")
+        self.symbols = list(symbols) if symbols is not None else None
+        self.path = path
+        self.column = column
+        self.suffix = suffix
+        self._count = len(self.symbols) if symbols is not None else None
+
+    def _rows(self):
+        """(line number, symbol) pairs"""
+        if self.symbols is not None:
+            for i, symbol in enumerate(self.symbols, 1):
+                yield i, symbol + self.suffix
+            return
+        with open(self.path, newline="") as f:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader, [])]
+            if self.column.lower() not in header:
+                raise ValueError(f"{self.path} has no '{self.column}' column")
+            col = header.index(self.column.lower())
+            for i, row in enumerate(reader, 2):
+                if any(cell.strip() for cell in row):
+                    yield i, (row[col].strip() + self.suffix if col < len(row) else "")
+
+    def __iter__(self):
+        for _, symbol in self._rows():
+            yield symbol
+
+    def __len__(self):
+        if self._count is None:
+            self.validate()
+        return self._count
+
+    def chunks(self, size):
+        """Lists of at most size symbols, in file order"""
+        chunk = []
+        for symbol in self:
+            chunk.append(symbol)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def validate(self):
+        """Problems with the symbols (bad format, duplicates, none at all) as messages"""
+        where = self.path or "universe"
+        errors, seen, count = [], set(), 0
+        try:
+            for line, symbol in self._rows():
+                count += 1
+                if not SYMBOL_PATTERN.match(symbol):
+                    errors.append(f"{where}:{line}: invalid symbol {symbol!r}")
+                elif symbol in seen:
+                    errors.append(f"{where}:{line}: duplicate symbol {symbol!r}")
+                seen.add(symbol)
+        except (OSError, ValueError) as e:
+            return [str(e)]
+        if not count:
+            errors.append(f"{where}: no symbols")
+        self._count = count
+        return errors
+
+    def __repr__(self):
+        source = self.path or f"{self._count} symbols"
+        return f"Universe({source})"
+
+def read_file(path):
+    """The raw settings in a .yaml/.yml, .toml or .csv file, as a dict
+
+    A CSV file is a universe on its own: {'universe': path}.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return {'universe': path}
+    if ext == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("YAML settings need PyYAML (pip install pyyaml)") from e
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    raise ValueError(f"Unsupported settings file {path}: use .yaml, .toml or .csv")
+
+def load_settings(path):
+    """Validated settings from path, raising ValueError listing every problem
+
+    A universe given as a path is resolved relative to the settings file
+    and returned as a Universe (checked in one pass over the file, not
+    loaded); a list becomes a Universe too.
+    """
+    raw = read_file(path)
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: expected a table of settings")
+    errors, invalid = [], set()
+    for key, value in raw.items():
+        if key not in FIELDS:
+            errors.append(f"{path}: unknown setting '{key}'")
+            continue
+        check, expected = FIELDS[key]
+        if not check(value):
+            errors.append(f"{path}: '{key}' must be {expected}, got {value!r}")
+            invalid.add(key)
+
+    settings = {k: v for k, v in raw.items() if k in FIELDS}
+    universe = settings.pop('universe', None)
+    column = settings.pop('universe_column', "symbol")
+    suffix = settings.pop('symbol_suffix', "")
+    if universe is not None and not invalid & {'universe', 'universe_column', 'symbol_suffix'}:
+        if isinstance(universe, list):
+            universe = Universe(universe, suffix=suffix)
+        else:
+            if path != universe:
+                universe = os.path.join(os.path.dirname(path), universe)
+            universe = Universe(path=universe, column=column, suffix=suffix)
+        errors.extend(universe.validate())
+        settings['universe'] = universe
+
+    if errors:
+        shown = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(shown)
+        raise ValueError("Invalid settings:\n  " + "\n  ".join(shown)
+                         + (f"\n  ... and {more} more" if more else ""))
+    if 'universe' in settings:
+        logging.info(f"⚙️ Loaded {path}: {len(settings['universe'])} symbols")
+    return settings
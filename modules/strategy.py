@@ -1,36 +1,47 @@
+import json
+import math
+import logging
 import pandas as pd
 import numpy as np
 
-def calculate_indicators(df):
-    """Calculate technical indicators with robust handling"""
+from modules.kernels import macd, rolling_mean, wilder_rsi
+
+INDICATOR_COLUMNS = ['rsi', 'ma20', 'ma50', 'macd', 'signal']
+
+def ma_min_periods(window):
+    """Bars a moving average needs before it has a value: a quarter of the window, at most 10"""
+    return min(max(1, window // 4), 10)
+
+def calculate_indicators(df, low_memory=False):
+    """Calculate technical indicators with robust handling
+
+    low_memory stores the indicators as float32 and back/forward-fills only
+    the indicator columns in place instead of copying the whole frame twice
+    (see modules/memory.py for the tolerance this implies).
+    """
+    store = (lambda values: values.astype(np.float32)) if low_memory else (lambda values: values)
     try:
-        # 1. RSI Calculation with proper smoothing
-        delta = df['close'].diff(1)
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        
-        # Use Wilder's smoothing (EMA with alpha=1/14)
-        avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-        avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-        
-        # Avoid division by zero
-        rs = avg_gain / avg_loss.replace(0, 1e-10)
-        rsi = 100 - (100 / (1 + rs))
-        
-        df['rsi'] = rsi
-        
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        # 1. RSI with Wilder's smoothing (EMA with alpha=1/14)
+        df['rsi'] = store(wilder_rsi(close, 14))
+
         # 2. Moving Averages with min_periods
-        df['ma20'] = df['close'].rolling(window=20, min_periods=5).mean()
-        df['ma50'] = df['close'].rolling(window=50, min_periods=10).mean()
-        
+        df['ma20'] = store(rolling_mean(close, 20, min_periods=ma_min_periods(20)))
+        df['ma50'] = store(rolling_mean(close, 50, min_periods=ma_min_periods(50)))
+
         # 3. MACD for additional confirmation
-        ema12 = df['close'].ewm(span=12, adjust=False).mean()
-        ema26 = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = ema12 - ema26
-        df['signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        
+        line, signal = macd(close, 12, 26, 9)
+        df['macd'] = store(line)
+        df['signal'] = store(signal)
+
         # Fill NaN values
-        df = df.fillna(method='bfill').fillna(method='ffill')
+        if low_memory:
+            for col in INDICATOR_COLUMNS:
+                if df[col].isna().any():
+                    df[col] = df[col].bfill().ffill()
+        else:
+            df = df.bfill().ffill()
         
         # Cap RSI values between 0-100
         df['rsi'] = df['rsi'].clip(0, 100)
@@ -40,31 +51,178 @@ def calculate_indicators(df):
         logging.error(f"❌ Indicator calculation failed: {str(e)}")
         return df
 
-def generate_signals(df):
-    """Generate trading signals with multiple conditions"""
+# Thresholds used by signal_conditions
+SIGNAL_PARAMS = {
+    'rsi_buy': 35,
+    'rsi_buy_macd': 40,
+    'rsi_buy_dip': 45,
+    'dip_factor': 0.98,
+    'rsi_sell': 65,
+    'rsi_sell_macd': 60
+}
+
+def signal_conditions(close, rsi, ma20, ma50, macd, signal, params=None):
+    """Buy/sell rules shared by generate_signals and IncrementalIndicators
+
+    Works on Series as well as on scalars for a single bar. Thresholds come
+    from SIGNAL_PARAMS unless overridden; NumPy arrays shaped (params, 1)
+    broadcast against (bars,) indicators to evaluate many settings at once.
+    """
+    p = SIGNAL_PARAMS if params is None else {**SIGNAL_PARAMS, **params}
+
+    # 1. Buy Conditions
+    condition1 = (rsi < p['rsi_buy']) & (ma20 > ma50)  # Original condition
+    condition2 = (rsi < p['rsi_buy_macd']) & (macd > signal) & (ma20 > ma50)  # MACD confirmation
+    condition3 = (close < ma20 * p['dip_factor']) & (rsi < p['rsi_buy_dip'])  # Dip buying
+    
+    buy_signal = condition1 | condition2 | condition3
+    
+    # 2. Sell Conditions
+    sell_condition1 = (rsi > p['rsi_sell'])  # Overbought
+    sell_condition2 = (ma20 < ma50)  # Death cross
+    sell_condition3 = (macd < signal) & (rsi > p['rsi_sell_macd'])  # MACD bearish
+    
+    sell_signal = sell_condition1 | sell_condition2 | sell_condition3
+    return buy_signal, sell_signal
+
+def generate_signals(df, params=None):
+    """Generate trading signals with multiple conditions (params: see signal_conditions)"""
     try:
         # Ensure indicators exist
         for col in ['rsi', 'ma20', 'ma50', 'macd', 'signal']:
             if col not in df.columns:
                 df[col] = 0
     
-        # 1. Buy Conditions
-        condition1 = (df['rsi'] < 35) & (df['ma20'] > df['ma50'])  # Original condition
-        condition2 = (df['rsi'] < 40) & (df['macd'] > df['signal']) & (df['ma20'] > df['ma50'])  # MACD confirmation
-        condition3 = (df['close'] < df['ma20'] * 0.98) & (df['rsi'] < 45)  # Dip buying
-        
-        df['buy_signal'] = condition1 | condition2 | condition3
-        
-        # 2. Sell Conditions
-        sell_condition1 = (df['rsi'] > 65)  # Overbought
-        sell_condition2 = (df['ma20'] < df['ma50'])  # Death cross
-        sell_condition3 = (df['macd'] < df['signal']) & (df['rsi'] > 60)  # MACD bearish
-        
-        df['sell_signal'] = sell_condition1 | sell_condition2 | sell_condition3
+        df['buy_signal'], df['sell_signal'] = signal_conditions(
+            df['close'], df['rsi'], df['ma20'], df['ma50'], df['macd'], df['signal'], params
+        )
         
         return df
     except Exception as e:
         logging.error(f"❌ Signal generation failed: {str(e)}")
         df['buy_signal'] = False
         df['sell_signal'] = False
-        return df
\ No newline at end of file
+        return df
+
+class IncrementalIndicators:
+    """Streaming counterpart of calculate_indicators + generate_signals
+
+    Each update() consumes one close and returns the new rsi, ma20, ma50,
+    macd, signal, buy_signal and sell_signal in O(1): Wilder averages and
+    EMAs are carried as recursive state and the moving averages use ring
+    buffers with running sums, recomputed exactly every RESUM_EVERY updates
+    so rounding error does not build up over a long session. After the
+    warm-up bars the values equal the batch path; during warm-up they stay
+    NaN instead of being back-filled from future bars as
+    calculate_indicators does.
+    """
+    RSI_PERIOD = 14
+    MA_WINDOWS = {'ma20': (20, ma_min_periods(20)), 'ma50': (50, ma_min_periods(50))}  # window, min_periods
+    MACD_SPANS = (12, 26, 9)
+    RESUM_EVERY = 1000
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.ema_signal = None
+        self.buffers = {name: [0.0] * window for name, (window, _) in self.MA_WINDOWS.items()}
+        self.sums = {name: 0.0 for name in self.MA_WINDOWS}
+
+    @classmethod
+    def from_history(cls, closes):
+        """Seed the state from historical closes (oldest first)"""
+        engine = cls()
+        for close in np.asarray(closes, dtype=float):
+            engine.update(close)
+        return engine
+
+    @property
+    def ready(self):
+        """True once every indicator is past its warm-up period"""
+        return self.count >= self.RSI_PERIOD
+
+    def update(self, close):
+        """Add one bar and return the indicator and signal values for it"""
+        close = float(close)
+        alpha = 1 / self.RSI_PERIOD
+
+        # Wilder RSI: the first bar has no change and counts as zero gain/loss
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if self.count == 0:
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            self.avg_gain += alpha * (gain - self.avg_gain)
+            self.avg_loss += alpha * (loss - self.avg_loss)
+        self.prev_close = close
+        slot = self.count
+        self.count += 1
+
+        if self.count >= self.RSI_PERIOD:
+            rs = self.avg_gain / (self.avg_loss if self.avg_loss != 0 else 1e-10)
+            rsi = min(max(100 - (100 / (1 + rs)), 0.0), 100.0)
+        else:
+            rsi = math.nan
+
+        # Moving averages over ring buffers
+        values = {'close': close, 'rsi': rsi}
+        for name, (window, min_periods) in self.MA_WINDOWS.items():
+            buffer = self.buffers[name]
+            self.sums[name] += close - buffer[slot % window]
+            buffer[slot % window] = close
+            if self.count % self.RESUM_EVERY == 0:
+                self.sums[name] = math.fsum(buffer)
+            filled = min(self.count, window)
+            values[name] = self.sums[name] / filled if filled >= min_periods else math.nan
+
+        # MACD: EMAs with adjust=False start from the first observation
+        fast, slow, sig = (2 / (span + 1) for span in self.MACD_SPANS)
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+        else:
+            self.ema_fast += fast * (close - self.ema_fast)
+            self.ema_slow += slow * (close - self.ema_slow)
+        macd = self.ema_fast - self.ema_slow
+        self.ema_signal = macd if self.ema_signal is None else self.ema_signal + sig * (macd - self.ema_signal)
+        values['macd'] = macd
+        values['signal'] = self.ema_signal
+
+        buy, sell = signal_conditions(values['close'], values['rsi'], values['ma20'],
+                                      values['ma50'], values['macd'], values['signal'])
+        values['buy_signal'] = bool(buy)
+        values['sell_signal'] = bool(sell)
+        return values
+
+    def get_state(self):
+        """JSON-serialisable snapshot of the indicator state"""
+        return {
+            'count': self.count,
+            'prev_close': self.prev_close,
+            'avg_gain': self.avg_gain,
+            'avg_loss': self.avg_loss,
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'ema_signal': self.ema_signal,
+            'buffers': self.buffers,
+            'sums': self.sums
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls()
+        for key, value in state.items():
+            setattr(engine, key, value)
+        return engine
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.get_state(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_state(json.load(f))
@@ -0,0 +1,231 @@
+import csv
+import time
+import socket
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules.strategy import IncrementalIndicators
+
+TRADE_FIELDS = ['ts', 'symbol', 'price', 'size']
+BAR_FIELDS = ['ts', 'symbol', 'open', 'high', 'low', 'close', 'volume']
+
+class BarAggregator:
+    """Roll trades up into fixed-interval OHLCV bars per symbol
+
+    A bar is complete once a trade for a later interval arrives, from any
+    symbol: feeds are time ordered, so that interval is over for everyone.
+    Bars are stamped with the start of their interval (int64 nanoseconds).
+    """
+    def __init__(self, interval="1min"):
+        self.interval_ns = pd.Timedelta(interval).value
+        self.bars = {}
+        self.bucket = None
+
+    def add(self, trade):
+        """Add one trade and return the bars it completed (usually none)"""
+        bucket = trade['ts'] // self.interval_ns
+        done = []
+        if self.bucket is not None and bucket > self.bucket:
+            done = self.flush()
+        self.bucket = bucket if self.bucket is None else max(self.bucket, bucket)
+
+        symbol, price = trade['symbol'], trade['price']
+        bar = self.bars.get(symbol)
+        if bar is None:
+            self.bars[symbol] = {'ts': bucket * self.interval_ns, 'symbol': symbol, 'open': price,
+                                 'high': price, 'low': price, 'close': price,
+                                 'volume': trade['size']}
+        else:
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+            bar['volume'] += trade['size']
+        return done
+
+    def flush(self):
+        """Close and return every open bar"""
+        done = sorted(self.bars.values(), key=lambda bar: bar['symbol'])
+        self.bars = {}
+        return done
+
+class StreamingRunner:
+    """Turn a feed of trades or bars into orders, one event at a time
+
+    Each symbol gets an IncrementalIndicators engine (seeded from history
+    closes when given) and its own cash account trading by the same rules
+    as Backtester: the stop is checked first, then a buy while flat or a
+    sell while long. Orders are appended to .orders and passed to on_order
+    as soon as they are decided. The latency of every event, from being
+    read off the feed to the runner finishing with it, is kept in
+    .latencies (nanoseconds).
+    """
+    def __init__(self, interval="1min", initial_capital=100000, stop_loss_pct=0.05,
+                 max_position=10, history=None, on_order=None):
+        self.aggregator = BarAggregator(interval)
+        self.initial_capital = initial_capital
+        self.stop_loss_pct = stop_loss_pct
+        self.max_position = max_position
+        self.on_order = on_order
+        self.engines = {symbol: IncrementalIndicators.from_history(closes)
+                        for symbol, closes in (history or {}).items()}
+        self.accounts = {}
+        self.orders = []
+        self.latencies = []
+        self.bars = 0
+
+    def on_event(self, kind, event, received_ns=None):
+        """Process one 'trade' or 'bar' event and return the orders it caused"""
+        received_ns = received_ns or time.perf_counter_ns()
+        bars = self.aggregator.add(event) if kind == 'trade' else [event]
+        orders = []
+        for bar in bars:
+            orders.extend(self.on_bar(bar))
+        self.latencies.append(time.perf_counter_ns() - received_ns)
+        return orders
+
+    def on_bar(self, bar):
+        """Update the symbol's indicators with a completed bar and decide orders"""
+        symbol, close = bar['symbol'], bar['close']
+        self.bars += 1
+        engine = self.engines.get(symbol)
+        if engine is None:
+            engine = self.engines[symbol] = IncrementalIndicators()
+        values = engine.update(close)
+
+        account = self.accounts.get(symbol)
+        if account is None:
+            account = self.accounts[symbol] = {'capital': self.initial_capital, 'position': 0,
+                                               'entry_price': 0.0, 'stop': 0.0}
+        orders = []
+        if account['position'] > 0 and close < account['stop']:
+            orders.append(self._close(account, bar, 'stop'))
+        if values['buy_signal'] and account['position'] == 0 and account['capital'] > close:
+            quantity = min(self.max_position, account['capital'] // close)
+            account.update(position=quantity, entry_price=close,
+                           stop=close * (1 - self.stop_loss_pct))
+            account['capital'] -= quantity * close
+            orders.append(self._order(bar, 'BUY', quantity, 'signal'))
+        elif values['sell_signal'] and account['position'] > 0:
+            orders.append(self._close(account, bar, 'signal'))
+
+        for order in orders:
+            self.orders.append(order)
+            if self.on_order is not None:
+                self.on_order(order)
+        return orders
+
+    def _close(self, account, bar, reason):
+        quantity = account['position']
+        account['capital'] += quantity * bar['close']
+        account['position'] = 0
+        return self._order(bar, 'SELL', quantity, reason)
+
+    def _order(self, bar, side, quantity, reason):
+        return {'ts': bar['ts'], 'symbol': bar['symbol'], 'side': side,
+                'quantity': int(quantity), 'price': bar['close'], 'reason': reason}
+
+    def run(self, feed):
+        """Consume a feed of (kind, event, received_ns) and return all orders"""
+        start = time.perf_counter()
+        for kind, event, received_ns in feed:
+            self.on_event(kind, event, received_ns)
+        for bar in self.aggregator.flush():
+            self.on_bar(bar)
+        self.elapsed = time.perf_counter() - start
+        return self.orders
+
+    def latency_report(self):
+        """Event count, throughput and latency percentiles in microseconds"""
+        if not self.latencies:
+            return {'events': 0}
+        lat = np.asarray(self.latencies) / 1000
+        report = {'events': len(lat), 'bars': self.bars, 'orders': len(self.orders)}
+        report.update({f"p{q}_us": float(np.percentile(lat, q)) for q in (50, 95, 99)})
+        report['max_us'] = float(lat.max())
+        if getattr(self, 'elapsed', 0):
+            report['events_per_s'] = len(lat) / self.elapsed
+        return report
+
+def _parse_ts(value):
+    return int(value) if value.lstrip('-').isdigit() else pd.Timestamp(value).value
+
+def read_events(lines, speed=None):
+    """Yield (kind, event, received_ns) from CSV lines with a trade or bar header
+
+    speed=None replays as fast as possible; speed=1.0 keeps the original
+    spacing between event timestamps, 60.0 plays a minute per second.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [h.strip() for h in header]
+    if header == TRADE_FIELDS:
+        kind, numeric = 'trade', TRADE_FIELDS[2:]
+    elif header == BAR_FIELDS:
+        kind, numeric = 'bar', BAR_FIELDS[2:]
+    else:
+        raise ValueError(f"Unknown event header: {header}")
+
+    first_ts = start = None
+    for row in reader:
+        if not row:
+            continue
+        received = time.perf_counter_ns()
+        event = {'ts': _parse_ts(row[0]), 'symbol': row[1]}
+        for name, value in zip(numeric, row[2:]):
+            event[name] = float(value)
+        if speed:
+            if first_ts is None:
+                first_ts, start = event['ts'], time.perf_counter()
+            delay = (event['ts'] - first_ts) / 1e9 / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+                received = time.perf_counter_ns()
+        yield kind, event, received
+
+def replay_file(path, speed=None):
+    """Replay a CSV event file written by write_replay (or any trade/bar CSV)"""
+    with open(path, newline="") as f:
+        yield from read_events(f, speed)
+
+def socket_feed(host, port, timeout=10.0):
+    """Read CSV events from a TCP socket, e.g. one opened by serve_replay"""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        with sock.makefile("r", newline="") as f:
+            yield from read_events(f)
+
+def serve_replay(path, host="127.0.0.1", port=0):
+    """Stand-in for a live feed: stream a replay file to the first client
+
+    Returns (thread, port); the server thread exits once the file is sent.
+    """
+    server = socket.create_server((host, port))
+    port = server.getsockname()[1]
+
+    def serve():
+        with server:
+            conn, _ = server.accept()
+            with conn, open(path, "rb") as f:
+                while chunk := f.read(65536):
+                    conn.sendall(chunk)
+        logging.info(f"📡 Replayed {path} on port {port}")
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread, port
+
+def write_replay(path, frames):
+    """Write {symbol: OHLCV frame} as one time-ordered bar event file"""
+    parts = []
+    for symbol, df in frames.items():
+        part = df[['open', 'high', 'low', 'close', 'volume']].copy()
+        part.insert(0, 'symbol', symbol)
+        part.insert(0, 'ts', df.index.values.astype('datetime64[ns]').view(np.int64))
+        parts.append(part)
+    events = pd.concat(parts).sort_values(['ts', 'symbol'], kind='stable')
+    events.to_csv(path, index=False, columns=BAR_FIELDS)
+    return len(events)
@@ -0,0 +1,123 @@
+import itertools
+import logging
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from modules.kernels import rolling_mean
+from modules.strategy import SIGNAL_PARAMS, calculate_indicators, ma_min_periods, signal_conditions
+from modules.backtester import simulate_trades
+
+# Settings the sweep can vary besides the signal thresholds
+BACKTEST_PARAMS = {
+    'ma_short': 20,
+    'ma_long': 50,
+    'stop_loss_pct': 0.05,
+    'max_position': 10
+}
+DEFAULT_PARAMS = {**SIGNAL_PARAMS, **BACKTEST_PARAMS}
+
+def expand_grid(grid):
+    """Cartesian product of a {param: values} grid, one row per combination
+
+    Parameters missing from the grid keep their default value.
+    """
+    unknown = set(grid) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    names = list(DEFAULT_PARAMS)
+    values = [list(grid.get(name, [DEFAULT_PARAMS[name]])) for name in names]
+    return pd.DataFrame(list(itertools.product(*values)), columns=names)
+
+def _moving_averages(close, windows):
+    """One filled moving-average array per window, stacked as (windows, bars)"""
+    windows = sorted({int(window) for window in windows})
+    values = close.to_numpy(dtype=np.float64)
+    rows = []
+    for window in windows:
+        ma = pd.Series(rolling_mean(values, window, min_periods=ma_min_periods(window)))
+        rows.append(ma.bfill().ffill().to_numpy())
+    return {window: i for i, window in enumerate(windows)}, np.vstack(rows)
+
+def _max_drawdown(pnl, initial_capital):
+    """Largest peak-to-trough fall of realised equity, as a fraction"""
+    if not len(pnl):
+        return 0.0
+    equity = initial_capital + np.concatenate(([0.0], np.cumsum(pnl)))
+    peak = np.maximum.accumulate(equity)
+    return float(np.max((peak - equity) / peak))
+
+def sweep_symbol(df, combos, initial_capital=100000, chunk_size=1024, indicators=None, fill_model=None):
+    """Evaluate every parameter combination in combos on one OHLCV frame
+
+    Indicators are computed once; the signal rules are evaluated as
+    (combinations x bars) boolean matrices, chunk_size rows at a time, and
+    each row is backtested with simulate_trades. indicators can pass a
+    precomputed calculate_indicators frame, e.g. from a FeatureStore.
+    A fill_model's per-bar fill prices are prepared once and shared by
+    every combination.
+    """
+    ind = calculate_indicators(df.copy()) if indicators is None else indicators
+    close = ind['close'].to_numpy(dtype=np.float64)
+    fills = fill_model.prepare(df) if fill_model is not None else None
+    rsi = ind['rsi'].to_numpy()
+    macd = ind['macd'].to_numpy()
+    signal = ind['signal'].to_numpy()
+    slot, ma_matrix = _moving_averages(ind['close'], set(combos['ma_short']) | set(combos['ma_long']))
+
+    metrics = np.zeros((len(combos), 4))
+    seen = {}  # Different thresholds often yield identical signal rows
+    for start in range(0, len(combos), chunk_size):
+        chunk = combos.iloc[start:start + chunk_size]
+        ma_short = ma_matrix[[slot[int(w)] for w in chunk['ma_short']]]
+        ma_long = ma_matrix[[slot[int(w)] for w in chunk['ma_long']]]
+        params = {name: chunk[name].to_numpy()[:, None] for name in SIGNAL_PARAMS}
+        buy, sell = signal_conditions(close, rsi, ma_short, ma_long, macd, signal, params)
+
+        stops = chunk['stop_loss_pct'].to_numpy()
+        sizes = chunk['max_position'].to_numpy()
+        for row in range(len(chunk)):
+            key = (np.packbits(buy[row]).tobytes(), np.packbits(sell[row]).tobytes(),
+                   stops[row], sizes[row])
+            if key not in seen:
+                pnl = simulate_trades(close, buy[row], sell[row], initial_capital,
+                                      stop_loss_pct=stops[row], max_position=sizes[row],
+                                      fills=fills)['pnl']
+                seen[key] = (pnl.sum(), len(pnl), (pnl > 0).sum(),
+                             _max_drawdown(pnl, initial_capital))
+            metrics[start + row] = seen[key]
+
+    return pd.DataFrame(metrics, columns=['pnl', 'trades', 'wins', 'max_drawdown'], index=combos.index)
+
+def run_sweep(frames, grid, initial_capital=100000, n_jobs=1, chunk_size=1024, rank_by='pnl',
+              feature_store=None, fill_model=None):
+    """Grid-search the strategy parameters across a universe of symbols
+
+    frames maps symbol -> OHLCV DataFrame. Returns one row per combination
+    with total P&L, trade count, win rate and the worst per-symbol drawdown,
+    sorted by rank_by (highest first, lowest first for max_drawdown).
+    With a feature_store, indicators are read from its cached matrices;
+    fill_model (modules/fills.py) puts costs and slippage into the P&L.
+    """
+    combos = expand_grid(grid)
+    logging.info(f"🧪 Sweeping {len(combos)} parameter sets over {len(frames)} symbols")
+
+    per_symbol = Parallel(n_jobs=n_jobs)(
+        delayed(sweep_symbol)(df, combos, initial_capital, chunk_size,
+                              feature_store.frame(symbol, df) if feature_store else None,
+                              fill_model)
+        for symbol, df in frames.items()
+    )
+    if not per_symbol:
+        return combos
+
+    totals = sum(result[['pnl', 'trades', 'wins']] for result in per_symbol)
+    table = combos.copy()
+    table['pnl'] = totals['pnl']
+    table['trades'] = totals['trades'].astype(int)
+    table['win_rate'] = np.where(totals['trades'] > 0, totals['wins'] / totals['trades'].clip(lower=1), 0.0)
+    table['max_drawdown'] = np.max([result['max_drawdown'] for result in per_symbol], axis=0)
+
+    table = table.sort_values(rank_by, ascending=(rank_by == 'max_drawdown'), kind='stable')
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
@@ -0,0 +1,111 @@
+import time
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from modules.async_fetcher import AsyncFetcher, TokenBucket, iter_frames
+from modules.data_fetcher import fetch_data, load_cache
+
+def make_bars(start, periods):
+    index = pd.bdate_range(start, periods=periods, name='Date')
+    close = np.linspace(100, 120, periods)
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.arange(1, periods + 1, dtype=np.int64) * 1000
+    }, index=index)
+
+class FlakyDownloader:
+    """Async stub that fails the first few calls per symbol and can be slow"""
+    def __init__(self, history, failures=0, delays=None):
+        self.history = history
+        self.failures = failures
+        self.delays = delays or {}
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def __call__(self, symbol, period=None, interval="1d", start=None):
+        self.calls.append((symbol, time.monotonic()))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(symbol, 0.01))
+            if sum(1 for s, _ in self.calls if s == symbol) <= self.failures:
+                raise ConnectionError("429 Too Many Requests")
+            if start is not None:
+                return self.history[self.history.index >= start]
+            return self.history
+        finally:
+            self.in_flight -= 1
+
+def test_token_bucket_spaces_requests():
+    async def take(n):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # Two tokens are available at once, the other four arrive at 20/s
+    assert 0.18 <= asyncio.run(take(6)) < 0.5
+
+def test_retries_with_backoff_then_caches(tmp_path):
+    history = make_bars("2020-01-01", 300)
+    stub = FlakyDownloader(history, failures=2)
+    fetcher = AsyncFetcher(downloader=stub, rate=None, retries=3, backoff=0.01,
+                           cache_dir=str(tmp_path))
+
+    df = asyncio.run(fetcher.fetch("TEST.NS"))
+    pdt.assert_frame_equal(df, history, check_freq=False)
+    assert len(stub.calls) == 3
+    assert len(load_cache("TEST.NS", cache_dir=str(tmp_path))) == 300
+
+    # The cache is shared with fetch_data
+    offline = fetch_data("TEST.NS", offline=True, cache_dir=str(tmp_path))
+    pdt.assert_frame_equal(offline, history, check_freq=False)
+
+def test_gives_up_after_retries(tmp_path):
+    stub = FlakyDownloader(make_bars("2020-01-01", 300), failures=10)
+    fetcher = AsyncFetcher(downloader=stub, rate=None, retries=2, backoff=0.01,
+                           cache_dir=str(tmp_path))
+    assert asyncio.run(fetcher.fetch("TEST.NS")).empty
+    assert len(stub.calls) == 3
+
+def test_sync_downloader_and_concurrency_limit(tmp_path):
+    history = make_bars("2020-01-01", 300)
+    calls = []
+
+    def download(symbol, period=None, interval="1d", start=None):
+        calls.append(symbol)
+        return history
+
+    symbols = [f"S{i}.NS" for i in range(6)]
+    fetcher = AsyncFetcher(downloader=download, rate=None, cache_dir=str(tmp_path))
+    frames = dict(iter_frames(symbols, fetcher))
+    assert sorted(frames) == sorted(symbols) and sorted(calls) == sorted(symbols)
+
+    stub = FlakyDownloader(history, delays={s: 0.05 for s in symbols})
+    fetcher = AsyncFetcher(downloader=stub, rate=None, max_concurrency=2, cache_dir=str(tmp_path),
+                           use_cache=False)
+    list(iter_frames(symbols, fetcher))
+    assert stub.max_in_flight == 2
+
+def test_frames_are_handed_over_as_they_arrive(tmp_path):
+    history = make_bars("2020-01-01", 300)
+    stub = FlakyDownloader(history, delays={'SLOW.NS': 0.3})
+    fetcher = AsyncFetcher(downloader=stub, rate=None, cache_dir=str(tmp_path))
+    symbols = ['SLOW.NS', 'A.NS', 'B.NS']
+
+    arrived = [symbol for symbol, _ in iter_frames(symbols, fetcher)]
+    assert arrived[-1] == 'SLOW.NS'
+
+    ordered = [symbol for symbol, _ in iter_frames(symbols, fetcher, ordered=True)]
+    assert ordered == symbols
+
+def test_rate_limit_applies_across_symbols(tmp_path):
+    stub = FlakyDownloader(make_bars("2020-01-01", 300))
+    fetcher = AsyncFetcher(downloader=stub, rate=10, burst=1, cache_dir=str(tmp_path))
+    list(iter_frames([f"S{i}.NS" for i in range(4)], fetcher))
+    starts = sorted(t for _, t in stub.calls)
+    assert starts[-1] - starts[0] >= 0.25
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from modules.backtester import Backtester, backtest_strategy, simulate_trades
+
+def make_signals(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'close': close,
+        'buy_signal': rng.random(n) < 0.08,
+        'sell_signal': rng.random(n) < 0.05
+    }, index=pd.bdate_range("2010-01-01", periods=n))
+
+def test_vectorized_matches_loop():
+    for seed in range(5):
+        df = make_signals(seed=seed)
+        expected = Backtester(100000, engine="loop").run_backtest(df)
+        result = Backtester(100000, engine="vectorized").run_backtest(df)
+        pdt.assert_frame_equal(result, expected)
+
+def test_stop_loss_reentry_and_close_out():
+    # Stop hit on bar 2 with a buy on the same bar, then held to the end
+    df = pd.DataFrame({
+        'close': [100.0, 101.0, 90.0, 92.0, 95.0],
+        'buy_signal': [True, False, True, False, False],
+        'sell_signal': [False, False, True, False, False]
+    }, index=pd.bdate_range("2024-01-01", periods=5))
+    expected = Backtester(1000, engine="loop").run_backtest(df)
+    result = Backtester(1000, engine="vectorized").run_backtest(df)
+    pdt.assert_frame_equal(result, expected)
+    assert result['stop_loss'].iloc[0] is True
+    assert result['open_at_end'].iloc[1] is True
+
+def test_engines_agree_without_stops():
+    df = pd.DataFrame({
+        'close': [100.0, 101.0, 103.0, 102.0, 104.0],
+        'buy_signal': [True, False, False, True, False],
+        'sell_signal': [False, False, True, False, False]
+    }, index=pd.bdate_range("2024-01-01", periods=5))
+    for stop_loss_pct in (0.05, 0.1):
+        expected = Backtester(1000, engine="loop", stop_loss_pct=stop_loss_pct).run_backtest(df)
+        result = Backtester(1000, engine="vectorized", stop_loss_pct=stop_loss_pct).run_backtest(df)
+        pdt.assert_frame_equal(result, expected)
+        assert result['stop_loss'].dtype == np.float64
+        assert result['stop_loss'].iloc[0] == 100.0 * (1 - stop_loss_pct)
+
+def test_position_capped_by_capital():
+    out = simulate_trades([300.0, 310.0], [True, False], [False, True], initial_capital=1000)
+    assert out['position'] == [3.0]
+
+def test_backtest_strategy_engines_agree():
+    df = make_signals(seed=7)
+    pdt.assert_frame_equal(
+        backtest_strategy(df, 'TEST.NS', 100000, engine="vectorized"),
+        backtest_strategy(df, 'TEST.NS', 100000, engine="loop")
+    )
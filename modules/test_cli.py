@@ -0,0 +1,68 @@
+import os
+import sys
+import subprocess
+
+import pandas as pd
+
+from modules import cli
+from modules.data_fetcher import save_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('sklearn', 'yfinance', 'gspread', 'oauth2client')
+# Generous: pandas alone takes most of it, sklearn would add about a second
+IMPORT_BUDGET_S = 3.0
+
+def run_python(code, cwd=ROOT):
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+def imported(stderr):
+    """{module: cumulative import microseconds} from -X importtime output"""
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+def test_main_and_cli_import_without_heavy_dependencies():
+    times = imported(run_python("import main, modules.cli").stderr)
+    loaded = {name.split('.')[0] for name in times}
+    assert not loaded & set(HEAVY)
+    assert times['main'] / 1e6 < IMPORT_BUDGET_S
+
+def test_backtest_from_cache_loads_no_heavy_dependencies(tmp_path, make_ohlcv):
+    save_cache('AAA.NS', make_ohlcv(), cache_dir=str(tmp_path / "data" / "cache"), period="5y")
+    result = run_python(
+        "import sys\n"
+        "from modules import cli\n"
+        "cli.main(['backtest', 'AAA.NS', '--offline', '--out', 'trades.csv'])\n"
+        f"print(sorted(m for m in {HEAVY!r} if m in sys.modules))\n", cwd=tmp_path)
+    assert result.stdout.splitlines()[-1] == "[]"
+    assert "AAA.NS" in result.stdout
+    trades = pd.read_csv(tmp_path / "trades.csv")
+    assert (trades['symbol'] == 'AAA.NS').all()
+
+def test_train_then_score(tmp_path, monkeypatch, capsys, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    save_cache('AAA.NS', make_ohlcv(), period="5y")
+    # Split-mode training saves nothing to score with
+    assert cli.main(['train', 'AAA.NS', '--offline']) == 0
+    assert cli.main(['score', '--offline']) == 1
+    assert "only walk_forward training saves them" in capsys.readouterr().out
+    assert cli.main(['train', 'AAA.NS', '--offline', '--mode', 'walk_forward']) == 0
+    assert os.listdir(tmp_path / "models" / "AAA.NS")
+    assert cli.main(['score', '--offline']) == 0
+    out = capsys.readouterr().out
+    assert "AAA.NS" in out and "p_up=" in out
+
+def test_publish_without_runs(tmp_path, capsys, monkeypatch):
+    assert cli.main(['publish', '--db', str(tmp_path / "trades.db"), '--spreadsheet-id', 'x']) == 1
+    assert "No runs" in capsys.readouterr().out
+
+    # The default spreadsheet comes from settings, not from importing main
+    monkeypatch.delitem(sys.modules, 'main', raising=False)
+    assert cli.main(['publish', '--db', str(tmp_path / "trades.db")]) == 1
+    assert 'main' not in sys.modules
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from modules import data_fetcher
+from modules.data_fetcher import fetch_data, load_cache
+
+def make_bars(start, periods):
+    index = pd.bdate_range(start, periods=periods, name='Date')
+    close = np.linspace(100, 120, periods)
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.arange(1, periods + 1, dtype=np.int64) * 1000
+    }, index=index)
+
+class StubDownloader:
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, symbol, period=None, interval="1d", start=None):
+        self.calls.append({'period': period, 'start': start})
+        if start is not None:
+            return self.history[self.history.index >= start]
+        return self.history
+
+def test_incremental_refresh_appends_new_bars(tmp_path, monkeypatch):
+    history = make_bars("2020-01-01", 300)
+    stub = StubDownloader(history.iloc[:250])
+    monkeypatch.setattr(data_fetcher, "_download", stub)
+
+    first = fetch_data("TEST.NS", period="5y", cache_dir=str(tmp_path))
+    pdt.assert_frame_equal(first, history.iloc[:250], check_freq=False)
+
+    stub.history = history
+    second = fetch_data("TEST.NS", period="5y", cache_dir=str(tmp_path))
+    assert stub.calls[-1]['start'] == history.index[249].strftime('%Y-%m-%d')
+    pdt.assert_frame_equal(second, history, check_freq=False)
+    assert len(load_cache("TEST.NS", cache_dir=str(tmp_path))) == 300
+
+def test_longer_period_triggers_full_download(tmp_path, monkeypatch):
+    stub = StubDownloader(make_bars("2020-01-01", 100))
+    monkeypatch.setattr(data_fetcher, "_download", stub)
+    fetch_data("TEST.NS", period="1y", cache_dir=str(tmp_path))
+    fetch_data("TEST.NS", period="5y", cache_dir=str(tmp_path))
+    assert [call['period'] for call in stub.calls] == ["1y", "5y"]
+
+def test_offline_reads_cache_without_downloading(tmp_path, monkeypatch):
+    history = make_bars("2020-01-01", 50)
+    data_fetcher.save_cache("TEST.NS", history, cache_dir=str(tmp_path), period="5y")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("network access in offline mode")
+    monkeypatch.setattr(data_fetcher, "_download", fail)
+
+    df = fetch_data("TEST.NS", offline=True, cache_dir=str(tmp_path))
+    pdt.assert_frame_equal(df, history, check_freq=False)
+    assert fetch_data("MISSING.NS", offline=True, cache_dir=str(tmp_path)).empty
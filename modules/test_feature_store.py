@@ -0,0 +1,60 @@
+import os
+
+import pandas.testing as pdt
+
+from modules.feature_store import FeatureStore
+from modules.ml_model import prepare_features
+from modules.pipeline import process_symbol
+from modules.strategy import calculate_indicators
+from modules.sweep import run_sweep
+
+def expected_features(df):
+    return prepare_features(calculate_indicators(df.copy()))
+
+def test_appends_match_a_full_rebuild(tmp_path, make_ohlcv):
+    full = make_ohlcv(1500)
+    store = FeatureStore(str(tmp_path))
+    pdt.assert_frame_equal(store.features('AAA.NS', full.iloc[:1000]),
+                           expected_features(full.iloc[:1000]), check_freq=False)
+
+    for end in (1001, 1002, 1300, 1500):
+        df = full.iloc[:end]
+        pdt.assert_frame_equal(store.features('AAA.NS', df), expected_features(df),
+                               check_freq=False, rtol=1e-9)
+
+    # A refreshed last bar is recomputed rather than appended
+    df = full.copy()
+    df.iloc[-1, df.columns.get_loc('close')] *= 1.05
+    pdt.assert_frame_equal(store.features('AAA.NS', df), expected_features(df),
+                           check_freq=False, rtol=1e-9)
+
+    path = tmp_path / "v1" / "AAA.NS_1d"
+    assert os.path.getsize(path / "close.bin") == 8 * len(full)
+
+def test_windows_versions_and_earlier_history(tmp_path, make_ohlcv):
+    full = make_ohlcv(1500)
+    store = FeatureStore(str(tmp_path))
+    store.frame('AAA.NS', full.iloc[200:])
+
+    # A later window is served from the stored rows
+    window = store.frame('AAA.NS', full.iloc[500:900])
+    assert window.index[0] == full.index[500] and window.index[-1] == full.index[899]
+    pdt.assert_frame_equal(window, store.frame('AAA.NS', full.iloc[200:]).iloc[300:700])
+
+    # Earlier history or a new feature version rebuilds the matrix
+    pdt.assert_frame_equal(store.features('AAA.NS', full), expected_features(full), check_freq=False)
+    v2 = FeatureStore(str(tmp_path), version=2)
+    pdt.assert_frame_equal(v2.features('AAA.NS', full), expected_features(full), check_freq=False)
+    assert sorted(os.listdir(tmp_path)) == ['v1', 'v2']
+
+def test_training_and_sweeps_read_the_store(tmp_path, make_ohlcv):
+    df = make_ohlcv(600)
+    store = FeatureStore(str(tmp_path))
+    cached = process_symbol('AAA.NS', df.copy(), 100000, feature_store=store)
+    fresh = process_symbol('AAA.NS', df.copy(), 100000)
+    assert cached['accuracy'] == fresh['accuracy']
+    assert os.path.exists(tmp_path / "v1" / "AAA.NS_1d" / "meta.json")
+
+    grid = {'rsi_buy': [30, 35], 'ma_short': [20], 'ma_long': [50]}
+    frames = {'AAA.NS': df}
+    pdt.assert_frame_equal(run_sweep(frames, grid, feature_store=store), run_sweep(frames, grid))
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from modules.backtester import EXIT_STOP, Backtester, simulate_trades
+from modules.fills import FillModel
+from modules.sweep import run_sweep
+
+def add_signals(df, seed=0):
+    rng = np.random.default_rng(seed + 100)
+    df['buy_signal'] = rng.random(len(df)) < 0.08
+    df['sell_signal'] = rng.random(len(df)) < 0.05
+    return df
+
+def bars(close, open_=None, low=None, buy=(), sell=()):
+    n = len(close)
+    return pd.DataFrame({
+        'open': open_ or close, 'high': close, 'low': low or close, 'close': close,
+        'volume': [1000] * n,
+        'buy_signal': [i in buy for i in range(n)], 'sell_signal': [i in sell for i in range(n)]
+    }, index=pd.bdate_range("2024-01-01", periods=n))
+
+def test_default_model_matches_no_model(make_ohlcv):
+    for seed in range(3):
+        df = add_signals(make_ohlcv(seed=seed), seed)
+        expected = Backtester(100000).run_backtest(df)
+        result = Backtester(100000, fill_model=FillModel()).run_backtest(df)
+        assert (result.pop('costs') == 0).all() and (result.pop('entry_costs') == 0).all()
+        pdt.assert_frame_equal(result, expected)
+
+def test_next_open_fills_on_the_following_bar():
+    df = bars([100.0, 101.0, 103.0, 104.0, 106.0], open_=[100.0, 100.5, 102.0, 105.0, 105.5],
+              buy=[0, 4], sell=[2])
+    trades = Backtester(1000, fill_model=FillModel(timing="next_open")).run_backtest(df)
+    # The buy on the last bar has no next open to fill on
+    assert len(trades) == 1
+    assert trades['entry_date'].iloc[0] == df.index[1] and trades['entry_price'].iloc[0] == 100.5
+    assert trades['exit_date'].iloc[0] == df.index[3] and trades['exit_price'].iloc[0] == 105.0
+
+def test_intrabar_stop_fills_at_the_stop_or_the_gap():
+    model = FillModel(stop_fill="intrabar")
+    # Bar 2's low touches the 95 stop from a 99 open: filled at the stop
+    touched = bars([100.0, 99.0, 98.0, 97.0], low=[100.0, 98.0, 94.0, 96.0], buy=[0])
+    out = simulate_trades(touched['close'], touched['buy_signal'], touched['sell_signal'], 1000,
+                          fills=model.prepare(touched))
+    assert out['exit_reason'][0] == EXIT_STOP and out['exit_idx'][0] == 2
+    assert out['exit_price'][0] == pytest.approx(95.0)
+    # Bar 2 opens at 90, below the stop: filled at the open
+    gapped = bars([100.0, 99.0, 91.0, 92.0], open_=[100.0, 99.0, 90.0, 91.0],
+                  low=[100.0, 98.0, 89.0, 90.0], buy=[0])
+    out = simulate_trades(gapped['close'], gapped['buy_signal'], gapped['sell_signal'], 1000,
+                          fills=model.prepare(gapped))
+    assert out['exit_price'][0] == 90.0
+    # Closes alone never go below 95 on bar 2 of the first case
+    out = simulate_trades(touched['close'], touched['buy_signal'], touched['sell_signal'], 1000)
+    assert out['exit_reason'][0] != EXIT_STOP
+
+def test_costs_and_slippage():
+    model = FillModel(brokerage_fixed=20.0, stt_pct=0.001, exchange_pct=0.0001, stamp_pct=0.0002,
+                      gst_pct=0.18, half_spread_pct=0.001, impact_pct=0.1)
+    df = bars([100.0, 102.0, 110.0], buy=[0], sell=[2])
+    out = simulate_trades(df['close'], df['buy_signal'], df['sell_signal'], 100000,
+                          fills=model.prepare(df))
+    entry = 100 * (1 + 0.001 + 0.1 * np.sqrt(10 / 1000))
+    exit_ = 110 * (1 - 0.001 - 0.1 * np.sqrt(10 / 1000))
+    buy_cost = 20 + 0.001 * 10 * entry + 0.0001 * 10 * entry + 0.18 * (20 + 0.0001 * 10 * entry) \
+        + 0.0002 * 10 * entry
+    sell_cost = 20 + 0.001 * 10 * exit_ + 0.0001 * 10 * exit_ + 0.18 * (20 + 0.0001 * 10 * exit_)
+    assert out['entry_price'][0] == pytest.approx(entry)
+    assert out['exit_price'][0] == pytest.approx(exit_)
+    assert out['costs'][0] == pytest.approx(buy_cost + sell_cost)
+    assert out['pnl'][0] == pytest.approx(10 * (exit_ - entry) - buy_cost - sell_cost)
+
+    # Brokerage is capped, and thinner volume means more slippage
+    capped = FillModel(brokerage_pct=0.01, brokerage_cap=20.0)
+    assert capped.order_costs(np.array([1000.0, 10000.0]), buy=True).tolist() == [10.0, 20.0]
+    thin = df.assign(volume=100)
+    assert simulate_trades(df['close'], df['buy_signal'], df['sell_signal'], 100000,
+                           fills=model.prepare(thin))['entry_price'][0] > entry
+
+def test_costs_are_paid_from_cash():
+    model = FillModel(brokerage_fixed=50.0, stt_pct=0.01)
+    df = bars([100.0, 100.0], buy=[0], sell=[1])
+    out = simulate_trades(df['close'], df['buy_signal'], df['sell_signal'], 1000,
+                          fills=model.prepare(df))
+    # 10 shares would cost 1000 plus fees, so only 9 fit
+    assert out['position'] == [9.0]
+    assert simulate_trades(df['close'], df['buy_signal'], df['sell_signal'], 140,
+                           fills=model.prepare(df))['position'] == []
+
+def test_model_checks_columns_and_presets(make_ohlcv):
+    with pytest.raises(ValueError):
+        FillModel(timing="next_open").prepare({'close': [1.0, 2.0]})
+    with pytest.raises(ValueError):
+        FillModel.preset("unknown")
+    with pytest.raises(ValueError):
+        Backtester(engine="loop", fill_model=FillModel()).run_backtest(add_signals(make_ohlcv()))
+
+def test_sweep_pnl_includes_costs(make_ohlcv):
+    frames = {'AAA.NS': make_ohlcv(n=800)}
+    grid = {'rsi_sell': [60, 65, 70]}
+    free = run_sweep(frames, grid).sort_values('rsi_sell')
+    costly = run_sweep(frames, grid, fill_model=FillModel.preset("nse_delivery")).sort_values('rsi_sell')
+    assert (costly['trades'].to_numpy() > 0).all()
+    assert (costly['pnl'].to_numpy() != free['pnl'].to_numpy()).all()
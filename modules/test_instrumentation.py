@@ -0,0 +1,80 @@
+import os
+import json
+import time
+
+import pytest
+
+from modules.instrumentation import Instrumentation, METRIC_FIELDS
+
+def test_stage_records_calls_and_time():
+    instr = Instrumentation()
+    for _ in range(3):
+        with instr.stage('fetch_data', 'AAA'):
+            time.sleep(0.01)
+    with instr.stage('fetch_data', 'BBB'):
+        pass
+
+    records = instr.records()
+    assert [(r['stage'], r['symbol']) for r in records] == [('fetch_data', 'AAA'), ('fetch_data', 'BBB')]
+    assert records[0]['calls'] == 3
+    assert records[0]['wall_seconds'] >= 0.03
+    assert set(records[0]) == set(METRIC_FIELDS)
+
+    summary = instr.summary()
+    assert len(summary) == 1 and summary[0]['calls'] == 4
+
+def test_stage_records_even_when_it_raises():
+    instr = Instrumentation()
+    with pytest.raises(ValueError):
+        with instr.stage('train_model', 'AAA'):
+            raise ValueError("boom")
+    assert instr.records()[0]['calls'] == 1
+
+def test_disabled_records_nothing():
+    instr = Instrumentation(enabled=False)
+    with instr.stage('fetch_data', 'AAA'):
+        pass
+    assert instr.records() == []
+
+def test_merge_and_wrap():
+    worker = Instrumentation()
+    assert worker.wrap('prepare_features', lambda x: x + 1, 'AAA')(1) == 2
+
+    main = Instrumentation()
+    main.merge(worker.records())
+    main.merge(worker.records())
+    assert main.records()[0]['calls'] == 2
+
+def test_exports(tmp_path):
+    instr = Instrumentation()
+    with instr.stage('generate_signals', 'RELI"ANCE'):
+        pass
+    instr.export(str(tmp_path))
+
+    with open(tmp_path / "pipeline_metrics.json") as f:
+        report = json.load(f)
+    assert report['stages'][0]['stage'] == 'generate_signals'
+    assert (tmp_path / "pipeline_metrics.csv").read_text().splitlines()[0] == ",".join(METRIC_FIELDS)
+
+    prom = (tmp_path / "pipeline_metrics.prom").read_text()
+    assert "# TYPE algo_trading_stage_calls_total counter" in prom
+    assert 'algo_trading_stage_calls_total{stage="generate_signals",symbol="RELI\\"ANCE"} 1' in prom
+
+def test_profile_stage_writes_cprofile(tmp_path):
+    instr = Instrumentation(profile_stage='train_model', profile_dir=str(tmp_path))
+    with instr.stage('train_model', 'AAA'):
+        sum(range(1000))
+    with instr.stage('fetch_data', 'AAA'):
+        pass
+    assert os.listdir(tmp_path) == ['train_model_AAA.prof']
+
+def test_profile_stage_tracemalloc():
+    instr = Instrumentation(profile_stage='prepare_features', profile_mode='tracemalloc')
+    with instr.stage('prepare_features', 'AAA'):
+        data = [0] * 100000
+    peak = instr.records()[0]['traced_peak_bytes']
+    assert peak >= 800000
+    prom = instr.to_prometheus()
+    assert "# TYPE algo_trading_stage_traced_peak_bytes gauge" in prom
+    assert f'algo_trading_stage_traced_peak_bytes{{stage="prepare_features",symbol="AAA"}} {peak}' in prom
+    del data
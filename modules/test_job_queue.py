@@ -0,0 +1,118 @@
+import time
+
+import pandas.testing as pdt
+
+from modules import job_queue
+from modules.data_fetcher import save_cache
+from modules.job_queue import JobQueue, coordinate, run_worker
+from modules.pipeline import process_symbol
+from modules.strategy import SIGNAL_PARAMS
+
+def test_enqueue_is_idempotent_and_claims_are_exclusive(tmp_path):
+    with JobQueue(str(tmp_path / "queue.db")) as queue:
+        ids = queue.enqueue("run1", ['AAA.NS', 'BBB.NS'], {'offline': True})
+        assert queue.enqueue("run1", ['AAA.NS', 'BBB.NS'], {'offline': True}) == ids
+        assert queue.counts("run1") == {'pending': 2}
+
+        first, second = queue.claim("w1"), queue.claim("w2")
+        assert (first['symbol'], second['symbol']) == ('AAA.NS', 'BBB.NS')
+        assert first['params'] == {'offline': True}
+        assert queue.claim("w3") is None
+
+        assert not queue.complete(first['job_id'], "w2", {'status': 'ok'})
+        assert queue.complete(first['job_id'], "w1", {'status': 'ok'})
+        # A finished job is not queued again
+        queue.enqueue("run1", ['AAA.NS'], {'offline': True})
+        assert queue.counts("run1") == {'done': 1, 'running': 1}
+
+def test_expired_leases_and_failures_are_retried(tmp_path):
+    with JobQueue(str(tmp_path / "queue.db"), lease_s=0) as queue:
+        queue.enqueue("run1", ['AAA.NS'], max_attempts=3)
+        job = queue.claim("crashed")
+        time.sleep(0.01)
+        retry = queue.claim("w2")
+        assert retry['job_id'] == job['job_id'] and retry['attempt'] == 2
+        # The first worker lost the job, so its late result is ignored
+        assert not queue.complete(job['job_id'], "crashed", {'status': 'ok'})
+
+        assert queue.fail(retry['job_id'], "w2", "boom")
+        assert queue.counts("run1") == {'pending': 1}
+        last = queue.claim("w3")
+        assert last['attempt'] == 3
+        time.sleep(0.01)
+        queue.reap()
+        assert queue.counts("run1") == {'failed': 1}
+        assert queue.results("run1")['AAA.NS']['error'] == "lease expired on the last attempt"
+
+def test_worker_retries_a_failed_attempt(tmp_path, monkeypatch):
+    calls = []
+
+    def flaky(job, feature_store=None, memo=None):
+        calls.append(job['attempt'])
+        if len(calls) == 1:
+            raise RuntimeError("network down")
+        return {'symbol': job['symbol'], 'status': 'ok', 'elapsed': 0.0}
+
+    monkeypatch.setattr(job_queue, "run_job", flaky)
+    path = str(tmp_path / "queue.db")
+    with JobQueue(path) as queue:
+        queue.enqueue("run1", ['AAA.NS'])
+    assert run_worker(path, worker="w1", run_id="run1", poll_s=0.01) == 1
+    assert calls == [1, 2]
+    with JobQueue(path) as queue:
+        assert queue.results("run1")['AAA.NS']['status'] == 'ok'
+        report = queue.throughput("run1")
+    assert report['worker'].tolist() == ["w1"] and report['jobs'].tolist() == [1]
+
+def test_worker_uses_each_runs_stores(tmp_path, monkeypatch):
+    seen = []
+
+    def record(job, feature_store=None, memo=None):
+        seen.append((job['run_id'], feature_store and feature_store.feature_dir, memo and memo.memo_dir))
+        return {'symbol': job['symbol'], 'status': 'ok', 'elapsed': 0.0}
+
+    monkeypatch.setattr(job_queue, "run_job", record)
+    path = str(tmp_path / "queue.db")
+    with JobQueue(path) as queue:
+        queue.enqueue("run1", ['AAA.NS'], {'feature_store': True, 'feature_dir': str(tmp_path / "f1")})
+        queue.enqueue("run2", ['AAA.NS'], {'memo': True, 'memo_dir': str(tmp_path / "m2")})
+        queue.enqueue("run3", ['AAA.NS'], {})
+    assert run_worker(path, worker="w1") == 3
+    assert seen == [("run1", str(tmp_path / "f1"), None), ("run2", None, str(tmp_path / "m2")),
+                    ("run3", None, None)]
+
+def test_jobs_pass_signal_thresholds_without_changing_the_defaults(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    save_cache('AAA.NS', make_ohlcv(), period="5y")
+    defaults = dict(SIGNAL_PARAMS)
+    tuned = job_queue.run_job({'symbol': 'AAA.NS', 'params': {'offline': True, 'signals': {'rsi_buy': 60}}})
+    assert SIGNAL_PARAMS == defaults
+    expected = process_symbol('AAA.NS', make_ohlcv(), 100000, signal_params={'rsi_buy': 60})
+    pdt.assert_frame_equal(tuned['trades'], expected['trades'])
+    plain = job_queue.run_job({'symbol': 'AAA.NS', 'params': {'offline': True}})
+    assert len(plain['trades']) != len(tuned['trades'])
+
+def test_coordinate_matches_local_processing(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    symbols = ['AAA.NS', 'BBB.NS', 'CCC.NS']
+    for seed, symbol in enumerate(symbols):
+        save_cache(symbol, make_ohlcv(seed=seed), period="5y")
+
+    results, report = coordinate(symbols, "run1", {'offline': True}, path="queue.db",
+                                 local_workers=2, poll_s=0.05, timeout_s=120)
+    assert [r['symbol'] for r in results] == symbols
+    assert report['jobs'].sum() == 3 and (report['symbols_per_s'] > 0).all()
+    for seed, result in enumerate(results):
+        expected = process_symbol(symbols[seed], make_ohlcv(seed=seed), 100000)
+        assert result['status'] == expected['status'] == 'ok'
+        pdt.assert_frame_equal(result['trades'], expected['trades'])
+        assert result['accuracy'] == expected['accuracy']
+
+    # Coordinating the same run again reuses the finished jobs
+    again, _ = coordinate(symbols, "run1", {'offline': True}, path="queue.db", local_workers=0)
+    pdt.assert_frame_equal(again[0]['trades'], results[0]['trades'])
+
+    # Paged, the results come back a page at a time in symbol order
+    pages, _ = coordinate(symbols, "run1", {'offline': True}, path="queue.db", local_workers=0,
+                          page_size=2)
+    assert [[r['symbol'] for r in page] for page in pages] == [symbols[:2], symbols[2:]]
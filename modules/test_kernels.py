@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import kernels
+from modules.indicators import compute_macd, compute_moving_averages, compute_rsi
+from modules.strategy import calculate_indicators
+
+RTOL = 1e-9
+
+def make_prices(n=800, m=4, seed=0):
+    """(bars, symbols) closes with a late listing, a delisting and a gap"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, m)), axis=0))
+    close[:37, 1] = np.nan
+    close[-20:, 2] = np.nan
+    close[300:310, 3] = np.nan
+    return close
+
+def by_observation(x, func):
+    """Apply a pandas Series function to each column's observed bars only"""
+    out = np.full(x.shape, np.nan)
+    for j in range(x.shape[1]):
+        rows = ~np.isnan(x[:, j])
+        out[rows, j] = func(pd.Series(x[rows, j])).to_numpy()
+    return out
+
+def held(values, x):
+    """Hold each column's last value through missing bars (ema semantics)"""
+    return pd.DataFrame(values).ffill().where(pd.DataFrame(x).notna().cummax()).to_numpy()
+
+def assert_close(actual, expected, rtol=RTOL):
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=rtol)
+
+@pytest.fixture(params=["numpy", "python"] + (["numba"] if kernels.BACKEND == "numba" else []))
+def backend(request, monkeypatch):
+    monkeypatch.setattr(kernels, "BACKEND", request.param)
+    return request.param
+
+def test_ema_matches_pandas(backend):
+    x = make_prices()
+    for span, min_periods in ((12, 0), (26, 5), (9, 30)):
+        expected = held(by_observation(
+            x, lambda s: s.ewm(span=span, adjust=False, min_periods=min_periods).mean()), x)
+        assert_close(kernels.ema(x, span=span, min_periods=min_periods), expected)
+    assert_close(kernels.ema(x[:, 0], alpha=1 / 14),
+                 pd.Series(x[:, 0]).ewm(alpha=1 / 14, adjust=False).mean().to_numpy())
+
+def test_rolling_mean_and_std_match_pandas(backend):
+    # Windows are counted in rows, so a gap shortens the windows across it
+    x = make_prices()
+    frame = pd.DataFrame(x)
+    assert_close(kernels.rolling_mean(x, 20, min_periods=5),
+                 frame.rolling(20, min_periods=5).mean().where(frame.notna()).to_numpy())
+    assert_close(kernels.rolling_std(x, 14), frame.rolling(14).std().where(frame.notna()).to_numpy(),
+                 rtol=1e-7)
+    assert_close(kernels.rolling_std(x[:, 0], 20, ddof=0),
+                 pd.Series(x[:, 0]).rolling(20).std(ddof=0).to_numpy(), rtol=1e-7)
+
+def test_rsi_macd_atr_bollinger_match_pandas(backend, make_ohlcv):
+    df = make_ohlcv(800)
+    close = df['close']
+    delta = close.diff(1)
+    gain, loss = delta.where(delta > 0, 0), -delta.where(delta < 0, 0)
+    avg_gain = gain.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss.replace(0, 1e-10))
+    assert_close(kernels.wilder_rsi(close), rsi.to_numpy())
+
+    line, signal = kernels.macd(close)
+    expected = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    assert_close(line, expected.to_numpy())
+    assert_close(signal, expected.ewm(span=9, adjust=False).mean().to_numpy())
+
+    prev = close.shift(1)
+    true_range = pd.concat([df['high'] - df['low'], (df['high'] - prev).abs(), (df['low'] - prev).abs()],
+                           axis=1).max(axis=1)
+    assert_close(kernels.atr(df['high'], df['low'], close),
+                 true_range.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean().to_numpy())
+
+    middle, upper, lower = kernels.bollinger(close)
+    std = close.rolling(20).std(ddof=0)
+    assert_close(middle, close.rolling(20).mean().to_numpy())
+    assert_close(upper, (close.rolling(20).mean() + 2 * std).to_numpy(), rtol=1e-7)
+    assert_close(lower, (close.rolling(20).mean() - 2 * std).to_numpy(), rtol=1e-7)
+
+def test_kernels_are_column_independent():
+    x = make_prices()
+    for func in (lambda a: kernels.ema(a, span=12), lambda a: kernels.rolling_mean(a, 20, 5),
+                 kernels.wilder_rsi):
+        together = func(x)
+        for j in range(x.shape[1]):
+            assert_close(together[:, j], func(x[:, j]))
+
+def test_calculate_indicators_matches_pandas(make_ohlcv):
+    df = make_ohlcv(800)
+    out = calculate_indicators(df.copy())
+    close = df['close']
+    delta = close.diff(1)
+    gain, loss = delta.where(delta > 0, 0), -delta.where(delta < 0, 0)
+    avg_gain = gain.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    expected = pd.DataFrame({
+        'rsi': 100 - 100 / (1 + avg_gain / avg_loss.replace(0, 1e-10)),
+        'ma20': close.rolling(20, min_periods=5).mean(),
+        'ma50': close.rolling(50, min_periods=10).mean(),
+        'macd': close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean(),
+    })
+    expected['signal'] = expected['macd'].ewm(span=9, adjust=False).mean()
+    expected = expected.bfill().ffill()
+    expected['rsi'] = expected['rsi'].clip(0, 100)
+    for col in expected:
+        np.testing.assert_allclose(out[col], expected[col], rtol=RTOL)
+
+def test_indicators_module_matches_pandas(make_ohlcv):
+    data = make_ohlcv(800).rename(columns={'close': 'Close'})
+    close = data['Close']
+    delta = close.diff()
+    rs = delta.where(delta > 0, 0).rolling(14).mean() / (-delta.where(delta < 0, 0)).rolling(14).mean()
+    np.testing.assert_allclose(compute_rsi(data), 100 - 100 / (1 + rs), rtol=RTOL)
+
+    data = compute_macd(compute_moving_averages(data))
+    np.testing.assert_allclose(data['20_DMA'], close.rolling(20).mean(), rtol=RTOL)
+    np.testing.assert_allclose(data['50_DMA'], close.rolling(50).mean(), rtol=RTOL)
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    np.testing.assert_allclose(data['MACD'], macd, rtol=RTOL)
+    np.testing.assert_allclose(data['Signal_Line'], macd.ewm(span=9, adjust=False).mean(), rtol=RTOL)
@@ -0,0 +1,109 @@
+import os
+import time
+
+import numpy as np
+import pandas.testing as pdt
+
+from modules import pipeline, strategy
+from modules.memo import MemoCache, frame_fingerprint, stage_key
+from modules.pipeline import process_symbol
+
+def computed(result):
+    return sorted(m['stage'] for m in result['metrics'] if m['stage'] != 'prepare_features')
+
+def test_fingerprint_follows_the_data(make_ohlcv):
+    df = make_ohlcv()
+    assert frame_fingerprint(df) == frame_fingerprint(df.copy())
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc('close')] += 0.01
+    assert frame_fingerprint(changed) != frame_fingerprint(df)
+    assert frame_fingerprint(df.iloc[:-1]) != frame_fingerprint(df)
+    assert frame_fingerprint(df.astype({'volume': 'float64'})) != frame_fingerprint(df)
+    assert stage_key('generate_signals', 'a', params={'x': 1}) != stage_key('generate_signals', 'a',
+                                                                            params={'x': 2})
+
+def test_unchanged_symbol_is_served_from_the_memo(tmp_path, make_ohlcv):
+    df = make_ohlcv()
+    memo = MemoCache(str(tmp_path))
+    first = process_symbol('AAA.NS', df.copy(), 100000, memo=memo)
+    assert first['cached'] == []
+    assert computed(first) == ['backtest_strategy', 'calculate_indicators', 'generate_signals',
+                               'train_model']
+
+    start = time.perf_counter()
+    second = process_symbol('AAA.NS', df.copy(), 100000, memo=memo)
+    elapsed = time.perf_counter() - start
+    assert sorted(second['cached']) == ['backtest_strategy', 'train_model']
+    assert computed(second) == []
+    assert elapsed < first['elapsed']
+    pdt.assert_frame_equal(second['trades'], first['trades'])
+    np.testing.assert_array_equal(second['returns'], first['returns'])
+    assert second['accuracy'] == first['accuracy']
+    assert second['period_signals'] == first['period_signals']
+
+    # The same frame without a memo gives the same results
+    plain = process_symbol('AAA.NS', df.copy(), 100000)
+    pdt.assert_frame_equal(plain['trades'], first['trades'])
+    assert plain['accuracy'] == first['accuracy']
+
+def test_only_stages_downstream_of_a_change_rerun(tmp_path, monkeypatch, make_ohlcv):
+    df = make_ohlcv()
+    memo = MemoCache(str(tmp_path))
+    process_symbol('AAA.NS', df.copy(), 100000, memo=memo)
+
+    monkeypatch.setitem(strategy.SIGNAL_PARAMS, 'rsi_sell', 70)
+    result = process_symbol('AAA.NS', df.copy(), 100000, memo=memo)
+    assert sorted(result['cached']) == ['calculate_indicators', 'train_model']
+    assert computed(result) == ['backtest_strategy', 'generate_signals']
+
+    # A different capital only reruns the backtest
+    result = process_symbol('AAA.NS', df.copy(), 50000, memo=memo)
+    assert computed(result) == ['backtest_strategy']
+
+    # New data reruns everything
+    result = process_symbol('AAA.NS', make_ohlcv(seed=1), 100000, memo=memo)
+    assert result['cached'] == []
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    memo = MemoCache(str(tmp_path), max_bytes=3 * 1100)
+    for i in range(3):
+        memo.put(f"k{i}", b"x" * 1000)
+        # mtime resolution differs between filesystems
+        os.utime(memo._path(f"k{i}"), ns=(i * 10 ** 9, i * 10 ** 9))
+    assert memo.get("k0")[0]
+    memo.put("k3", b"x" * 1000)
+    assert memo.size() <= memo.max_bytes
+    assert [memo.get(f"k{i}")[0] for i in range(4)] == [True, False, True, True]
+
+def test_cached_reports_hits(tmp_path):
+    memo = MemoCache(str(tmp_path))
+    calls = []
+    assert memo.cached("k", lambda: calls.append(1) or 42) == (42, False)
+    assert memo.cached("k", lambda: calls.append(1) or 42) == (42, True)
+    assert calls == [1]
+
+def test_stale_entries_are_misses(tmp_path):
+    memo = MemoCache(str(tmp_path))
+    for key, blob in (("gone", b"cno_such_module\nThing\n."), ("moved", b"cmodules.memo\nNoSuchClass\n."),
+                      ("cut", b"\x80\x05")):
+        os.makedirs(os.path.dirname(memo._path(key)), exist_ok=True)
+        with open(memo._path(key), "wb") as f:
+            f.write(blob)
+        assert memo.get(key) == (False, None)
+
+def test_indicators_are_not_timed_inside_prepare_features(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    df = make_ohlcv()
+    memo = MemoCache(str(tmp_path / "memo"))
+    process_symbol('AAA.NS', df.copy(), 100000, memo=memo)
+
+    # The indicators were evicted and the model misses, so the indicators
+    # are computed for the features while the backtest is served
+    os.remove(memo._path(stage_key('calculate_indicators', frame_fingerprint(df), low_memory=False,
+                                   panel=False)))
+    slow = strategy.calculate_indicators
+    monkeypatch.setattr(pipeline, "calculate_indicators", lambda *a, **k: time.sleep(0.3) or slow(*a, **k))
+    result = process_symbol('AAA.NS', df.copy(), 100000, train_mode="walk_forward", memo=memo)
+    assert result['cached'] == ['backtest_strategy']
+    wall = {m['stage']: m['wall_seconds'] for m in result['metrics']}
+    assert wall['calculate_indicators'] >= 0.3 > wall['prepare_features']
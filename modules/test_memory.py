@@ -0,0 +1,50 @@
+import numpy as np
+import pandas.testing as pdt
+
+from modules.memory import (INDICATOR_RTOL, SIGNAL_TOLERANCE, downcast_prices, memory_report,
+                            pack_signals, unpack_signals)
+from modules.ml_model import prepare_features
+from modules.pipeline import process_symbol
+from modules.strategy import calculate_indicators, generate_signals
+
+def test_low_memory_stays_within_tolerance(make_ohlcv):
+    for seed in range(5):
+        df = make_ohlcv(1500, seed)
+        base = generate_signals(calculate_indicators(df.copy()))
+        low = generate_signals(calculate_indicators(downcast_prices(df.copy()), low_memory=True))
+
+        for col in ('rsi', 'ma20', 'ma50', 'macd', 'signal'):
+            assert low[col].dtype == np.float32
+        for col in ('rsi', 'ma20', 'ma50'):
+            np.testing.assert_allclose(low[col], base[col], rtol=INDICATOR_RTOL)
+        for col in ('buy_signal', 'sell_signal'):
+            assert low[col].dtype == bool
+            assert (low[col] != base[col]).mean() <= SIGNAL_TOLERANCE
+
+def test_low_memory_features_are_a_view_of_the_frame(make_ohlcv):
+    df = calculate_indicators(downcast_prices(make_ohlcv(1500)), low_memory=True)
+    features = prepare_features(df, low_memory=True)
+    expected = prepare_features(calculate_indicators(make_ohlcv(1500)).copy())
+    assert features['target'].dtype == np.int8
+    pdt.assert_index_equal(features.index, expected.index)
+    assert np.shares_memory(features['returns'].to_numpy(), df['returns'].to_numpy())
+
+def test_pack_signals_round_trip(make_ohlcv):
+    df = generate_signals(calculate_indicators(make_ohlcv(1001)))
+    packed = pack_signals(df)
+    assert all(len(bits) == 126 for bits in packed.values())
+    pdt.assert_frame_equal(unpack_signals(packed, df.index), df[['buy_signal', 'sell_signal']])
+
+def test_memory_report_shows_savings(make_ohlcv):
+    report = memory_report(make_ohlcv(5000))
+    assert report['low_memory_peak_bytes'] < report['default_peak_bytes']
+    assert report['low_memory_frame_bytes'] < report['default_frame_bytes']
+    assert report['signal_flips'] <= SIGNAL_TOLERANCE * 2 * report['bars']
+
+def test_process_symbol_low_memory_matches_default(make_ohlcv):
+    df = make_ohlcv(600)
+    base = process_symbol('AAA.NS', df.copy(), 100000)
+    low = process_symbol('AAA.NS', df.copy(), 100000, low_memory=True)
+    assert low['status'] == base['status'] == 'ok'
+    assert len(low['trades']) == len(base['trades'])
+    np.testing.assert_allclose(low['trades']['pnl'], base['trades']['pnl'], rtol=1e-4, atol=1e-3)
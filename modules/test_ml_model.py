@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from modules.ml_model import load_latest_model, prepare_features, walk_forward_splits, walk_forward_train
+from modules.strategy import calculate_indicators
+
+PARAMS = {'n_estimators': 10}
+
+def make_features(n=700, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    df = pd.DataFrame({'close': close, 'volume': rng.integers(100000, 1000000, n)},
+                      index=pd.bdate_range("2020-01-01", periods=n))
+    return prepare_features(calculate_indicators(df))
+
+def test_walk_forward_splits_are_chronological():
+    expanding = walk_forward_splits(600, n_splits=4, min_train=200)
+    assert [(t.start, t.stop, v.start, v.stop) for t, v in expanding] == [
+        (0, 200, 200, 300), (0, 300, 300, 400), (0, 400, 400, 500), (0, 500, 500, 600)]
+    rolling = walk_forward_splits(600, n_splits=4, window="rolling", min_train=200)
+    assert [(t.start, t.stop) for t, _ in rolling] == [(0, 200), (100, 300), (200, 400), (300, 500)]
+
+def test_models_are_persisted_reused_and_warm_started(tmp_path):
+    features = make_features()
+    old, new = features.iloc[:-20], features
+
+    model, accuracy = walk_forward_train(old, "TEST.NS", n_jobs=1, model_dir=str(tmp_path),
+                                         model_params=PARAMS)
+    assert model.n_estimators == 10 and 0 < accuracy < 1
+    bundle = load_latest_model("TEST.NS", model_dir=str(tmp_path))
+    assert bundle['end_date'] == old.index[-2]
+
+    reused, _ = walk_forward_train(old, "TEST.NS", n_jobs=1, model_dir=str(tmp_path),
+                                   model_params=PARAMS)
+    assert len(reused.estimators_) == 10
+
+    # One new bar: its hit or miss is blended into the walk-forward accuracy
+    warm, warm_accuracy = walk_forward_train(features.iloc[:-19], "TEST.NS", n_jobs=1,
+                                             model_dir=str(tmp_path), model_params=PARAMS,
+                                             warm_start_trees=5)
+    assert len(warm.estimators_) == 15
+    tested = bundle['n_tested']
+    assert warm_accuracy in (accuracy * tested / (tested + 1), (accuracy * tested + 1) / (tested + 1))
+    assert load_latest_model("TEST.NS", model_dir=str(tmp_path))['n_tested'] == tested + 1
+
+    warm, _ = walk_forward_train(new, "TEST.NS", n_jobs=1, model_dir=str(tmp_path),
+                                 model_params=PARAMS, warm_start_trees=5)
+    assert len(warm.estimators_) == 20
+    assert load_latest_model("TEST.NS", model_dir=str(tmp_path))['end_date'] == new.index[-2]
+    assert len(list(tmp_path.glob("TEST.NS/*.joblib"))) == 3
+
+def test_saved_models_are_keyed_by_model_params(tmp_path):
+    features = make_features()
+    walk_forward_train(features, "TEST.NS", n_jobs=1, model_dir=str(tmp_path), model_params=PARAMS)
+    tuned = {**PARAMS, 'max_depth': 3}
+    model, _ = walk_forward_train(features, "TEST.NS", n_jobs=1, model_dir=str(tmp_path), model_params=tuned)
+    assert model.max_depth == 3
+    assert load_latest_model("TEST.NS", model_dir=str(tmp_path), model_params=tuned)['model'].max_depth == 3
+    assert len(list(tmp_path.glob("TEST.NS/*.joblib"))) == 2
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from modules.ml_model import prepare_features
+from modules.panel import Panel
+from modules.strategy import calculate_indicators, generate_signals
+
+def test_panel_matches_per_symbol_pipeline(make_ohlcv):
+    gapped = make_ohlcv(500, 3)
+    frames = {
+        'AAA.NS': make_ohlcv(500, 0),
+        'LATE.NS': make_ohlcv(300, 1, start="2020-09-01"),
+        'SHORT.NS': make_ohlcv(400, 2),
+        'GAP.NS': gapped.drop(gapped.index[[100, 101, 250]]),
+    }
+    # The panel holds every field as float
+    frames = {symbol: df.astype({'volume': float}) for symbol, df in frames.items()}
+    panel = Panel.from_frames(frames).calculate_indicators().generate_signals().prepare_features()
+
+    for symbol, df in frames.items():
+        expected = generate_signals(calculate_indicators(df.copy()))
+        result = panel.frame(symbol, list(expected.columns))
+        pd.testing.assert_frame_equal(result, expected, check_freq=False, rtol=1e-9)
+
+        features = prepare_features(expected.copy())
+        result = panel.frame(symbol, list(features.columns), dropna=True)
+        pd.testing.assert_frame_equal(result, features, check_freq=False, rtol=1e-7)
+
+def test_float32_panel_uses_less_memory(make_ohlcv):
+    frames = {f"S{i}.NS": make_ohlcv(300, i) for i in range(5)}
+    wide = Panel.from_frames(frames).calculate_indicators()
+    narrow = Panel.from_frames(frames, dtype=np.float32).calculate_indicators()
+    assert narrow.nbytes * 2 == wide.nbytes
+    np.testing.assert_allclose(narrow['rsi'], wide['rsi'], rtol=1e-4)
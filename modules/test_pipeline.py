@@ -0,0 +1,40 @@
+import pandas.testing as pdt
+import pytest
+
+from modules.data_fetcher import save_cache
+from modules.pipeline import chunk_panel, process_symbol, run_parallel
+
+def test_parallel_results_match_sequential_in_symbol_order(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    symbols = ['CCC.NS', 'AAA.NS', 'SHORT.NS', 'BBB.NS']
+    for seed, symbol in enumerate(symbols):
+        save_cache(symbol, make_ohlcv(100 if symbol == 'SHORT.NS' else 400, seed), period="5y")
+
+    results = run_parallel(symbols, 100000, offline=True, max_workers=2)
+    assert [r['symbol'] for r in results] == symbols
+    assert results[2]['status'] == 'skipped'
+
+    for seed, (symbol, result) in enumerate(zip(symbols, results)):
+        if symbol == 'SHORT.NS':
+            continue
+        expected = process_symbol(symbol, make_ohlcv(400, seed), 100000)
+        pdt.assert_frame_equal(result['trades'], expected['trades'], check_freq=False)
+        assert result['accuracy'] == expected['accuracy']
+
+def test_chunk_panel_views_match_per_symbol_stages(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    frames = {'AAA.NS': make_ohlcv(400, 0), 'LATE.NS': make_ohlcv(400, 1).iloc[50:],
+              'SHORT.NS': make_ohlcv(100, 2)}
+    for symbol, df in frames.items():
+        save_cache(symbol, df, period="5y")
+
+    panel = chunk_panel(frames)
+    assert panel.symbols == ['AAA.NS', 'LATE.NS']
+    results = run_parallel(list(frames), 100000, offline=True, max_workers=2, use_panel=True)
+    assert results[2]['status'] == 'skipped'
+    for symbol, result in zip(frames, results[:2]):
+        expected = process_symbol(symbol, frames[symbol], 100000)
+        viewed = process_symbol(symbol, frames[symbol], 100000, panel=panel)
+        for got in (result, viewed):
+            pdt.assert_frame_equal(got['trades'], expected['trades'], check_freq=False)
+            assert got['accuracy'] == expected['accuracy']
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.backtester import backtest_strategy
+from modules.panel import Panel
+from modules.portfolio import PortfolioBacktester
+from modules.strategy import calculate_indicators, generate_signals
+
+def test_single_symbol_matches_backtester(make_ohlcv):
+    df = make_ohlcv(600, 0)
+    result = PortfolioBacktester(100000).run({'AAA.NS': df})
+    expected = backtest_strategy(generate_signals(calculate_indicators(df.copy())), 'AAA.NS', 100000)
+
+    trades = result['trades']
+    assert len(trades) == len(expected)
+    assert (trades['entry_date'].values == expected['entry_date'].values).all()
+    assert (trades['exit_date'].values == expected['exit_date'].values).all()
+    np.testing.assert_allclose(trades['pnl'], expected['pnl'])
+    assert result['stats']['final_equity'] == pytest.approx(100000 + expected['pnl'].sum())
+
+def test_shared_cash_and_position_limit(make_ohlcv):
+    frames = {f"S{i}.NS": make_ohlcv(500, i, start="2020-01-01" if i else "2020-03-02") for i in range(6)}
+    panel = Panel.from_frames(frames).calculate_indicators().generate_signals()
+    result = PortfolioBacktester(20000, max_positions=2, allocation="equal_weight", max_shares=None).run(panel)
+
+    equity = result['equity']
+    assert equity['positions'].max() <= 2
+    assert (equity['cash'] >= -1e-6).all()
+    assert ((equity['drawdown'] <= 0) & (equity['exposure'] >= 0) & (equity['exposure'] <= 1 + 1e-9)).all()
+    np.testing.assert_allclose(equity['equity'], equity['cash'] + equity['holdings'])
+
+    # Realised P&L reconciles with the final equity once everything is closed
+    assert result['stats']['final_equity'] == pytest.approx(20000 + result['trades']['pnl'].sum(), rel=1e-9)
+    assert set(result['trades']['exit_reason']) <= {'signal', 'stop', 'end'}
+
+def test_symbol_weights_cap_allocation(make_ohlcv):
+    frames = {"AAA.NS": make_ohlcv(400, 1), "BBB.NS": make_ohlcv(400, 2)}
+    result = PortfolioBacktester(100000, max_shares=None, symbol_weights={"AAA.NS": 0.01}).run(frames)
+    trades = result['trades']
+    aaa = trades[trades['symbol'] == "AAA.NS"]
+    assert ((aaa['position'] * aaa['entry_price']) <= 0.01 * 100000 * 1.5).all()
+
+def test_unaffordable_candidate_does_not_block_cheaper_ones():
+    dates = pd.bdate_range("2020-01-01", periods=5)
+    prices = {"AAA.NS": 90.0, "BBB.NS": 20.0, "CCC.NS": 5.0}
+    panel = Panel.from_frames({symbol: pd.DataFrame({'open': price, 'high': price, 'low': price,
+                                                     'close': price, 'volume': 1000.0}, index=dates)
+                               for symbol, price in prices.items()})
+    buy = np.zeros((5, 3), dtype=bool)
+    buy[0] = True
+    panel['buy_signal'], panel['sell_signal'] = buy, np.zeros_like(buy)
+    result = PortfolioBacktester(1000, max_shares=10).run(panel)
+    # AAA takes 900 of the cash, BBB (200) no longer fits but CCC (50) does
+    assert sorted(result['trades']['symbol']) == ["AAA.NS", "CCC.NS"]
+    assert result['equity']['cash'].iloc[0] == pytest.approx(50)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.backtester import backtest_strategy
+from modules.fills import FillModel
+from modules.pipeline import process_symbol
+from modules.robustness import (METRICS, bar_returns, block_sample, historical_metrics, path_metrics,
+                                run_robustness, simulate)
+from modules.strategy import calculate_indicators, generate_signals
+
+def backtest(df):
+    signals = generate_signals(calculate_indicators(df))
+    return signals, backtest_strategy(signals, "TEST.NS", 100000)
+
+def test_bar_returns_compound_to_trade_pnl(make_ohlcv):
+    signals, trades = backtest(make_ohlcv(1250))
+    assert not trades.empty
+    returns = bar_returns(signals['close'], trades, 100000)
+    assert len(returns) == len(signals) - 1
+    np.testing.assert_allclose(100000 * np.prod(1 + returns), 100000 + trades['pnl'].sum())
+    np.testing.assert_array_equal(bar_returns(signals['close'], pd.DataFrame()), 0.0)
+
+def test_bar_returns_include_fills_and_costs(make_ohlcv):
+    signals = generate_signals(calculate_indicators(make_ohlcv(1250)))
+    signals['open'] = signals['close'].shift(1).fillna(signals['close'].iloc[0]) * 1.002
+    trades = backtest_strategy(signals, "TEST.NS", 100000, fill_model=FillModel.preset("nse_delivery"))
+    assert not trades.empty and (trades['costs'] > 0).all()
+    returns = bar_returns(signals['close'], trades, 100000)
+    np.testing.assert_allclose(100000 * np.prod(1 + returns), 100000 + trades['pnl'].sum())
+
+def test_path_metrics_match_a_loop():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.0005, 0.01, (3, 300))
+    metrics = path_metrics(returns.copy(), 1000, 252)
+    for row, r in enumerate(returns):
+        equity = 1000 * np.cumprod(1 + r)
+        peak = np.maximum(np.maximum.accumulate(equity), 1000)
+        assert metrics['max_drawdown'][row] == pytest.approx(np.max(1 - equity / peak))
+        assert metrics['sharpe'][row] == pytest.approx(r.mean() / r.std() * np.sqrt(252))
+        assert metrics['terminal_equity'][row] == pytest.approx(equity[-1])
+
+def test_block_sample_keeps_contiguous_blocks():
+    base = np.arange(100, dtype=float)
+    sample = block_sample(base, 50, 10, np.random.default_rng(0))
+    assert sample.shape == (50, 100)
+    # Within a block every step is +1, wrapping from 99 back to 0
+    steps = np.diff(sample.reshape(50, 10, 10), axis=2) % 100
+    assert (steps == 1).all()
+
+def test_trade_reshuffle_keeps_terminal_equity(make_ohlcv):
+    _, trades = backtest(make_ohlcv(1250))
+    results = simulate(trades=trades, method="trade_reshuffle", n_paths=500, initial_capital=100000)
+    historical = historical_metrics(trades=trades, method="trade_reshuffle", initial_capital=100000)
+    np.testing.assert_allclose(results['terminal_equity'], 100000 + trades['pnl'].sum())
+    assert historical['terminal_equity'] == pytest.approx(100000 + trades['pnl'].sum())
+    assert results['max_drawdown'].std() > 0
+
+def test_simulate_is_reproducible_and_chunked(monkeypatch, make_ohlcv):
+    signals, trades = backtest(make_ohlcv(1250))
+    returns = bar_returns(signals['close'], trades)
+    first = simulate(returns, n_paths=300, seed=7)
+    np.testing.assert_array_equal(first['sharpe'], simulate(returns, n_paths=300, seed=7)['sharpe'])
+    monkeypatch.setattr("modules.robustness.CHUNK_PATHS", 64)
+    chunked = simulate(returns, n_paths=300, seed=7)
+    assert all(len(chunked[m]) == 300 for m in METRICS)
+    assert abs(np.median(chunked['terminal_equity']) - np.median(first['terminal_equity'])) < \
+        first['terminal_equity'].std()
+
+def test_run_robustness_table(make_ohlcv):
+    inputs = {}
+    for seed, symbol in enumerate(["A.NS", "B.NS"]):
+        signals, trades = backtest(make_ohlcv(1250, seed))
+        inputs[symbol] = (bar_returns(signals['close'], trades), trades)
+    inputs["FLAT.NS"] = (np.zeros(10), pd.DataFrame())
+    table = run_robustness(inputs, n_paths=200, n_jobs=1)
+    assert list(table['symbol'].unique()) == ["A.NS", "B.NS", "FLAT.NS"]
+    assert set(table['metric']) == set(METRICS)
+    assert (table['p5'] <= table['p50']).all() and (table['p50'] <= table['p95']).all()
+    flat = table[table['symbol'] == "FLAT.NS"].set_index('metric')
+    assert flat.loc['terminal_equity', 'p50'] == 100000
+    assert run_robustness(inputs, "trade_bootstrap", n_paths=200, n_jobs=1).equals(
+        run_robustness(inputs, "trade_bootstrap", n_paths=200, n_jobs=2))
+    # Chunks simulated separately give the same table
+    items = list(inputs.items())
+    chunked = pd.concat([run_robustness(dict(items[:2]), n_paths=200, n_jobs=1),
+                         run_robustness(dict(items[2:]), n_paths=200, n_jobs=1, first=2)],
+                        ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, table)
+    with pytest.raises(ValueError):
+        simulate(np.zeros(10), method="unknown", n_paths=1)
+
+def test_process_symbol_returns_bar_returns(make_ohlcv):
+    result = process_symbol("TEST.NS", make_ohlcv(1250), 100000)
+    assert result['status'] == 'ok'
+    np.testing.assert_allclose(100000 * np.prod(1 + result['returns']),
+                               100000 + result['trades']['pnl'].sum())
@@ -0,0 +1,57 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from modules.feature_store import FeatureStore
+from modules.ml_model import FEATURES, prepare_features, save_model
+from modules.scoring import UniverseScorer, latest_feature_row, latest_feature_rows
+from modules.strategy import calculate_indicators
+
+def fit_bundle(df, seed):
+    feats = prepare_features(calculate_indicators(df.copy()))
+    model = RandomForestClassifier(n_estimators=15, random_state=seed, min_samples_split=5)
+    model.fit(feats[FEATURES].to_numpy(), feats['target'].to_numpy())
+    return {'model': model, 'features': FEATURES, 'end_date': feats.index[-1], 'accuracy': 0.5}
+
+def test_scores_match_predict_proba(make_ohlcv):
+    frames = {f"S{seed}.NS": make_ohlcv(seed=seed) for seed in range(4)}
+    bundles = {symbol: fit_bundle(df, seed) for seed, (symbol, df) in enumerate(frames.items())}
+    scorer = UniverseScorer(bundles)
+
+    rng = np.random.default_rng(1)
+    X = np.vstack([prepare_features(calculate_indicators(df.copy()))[FEATURES].to_numpy()[-50:]
+                   for df in frames.values()])
+    X = X[rng.permutation(len(X))[:len(bundles)]]
+    expected = [bundles[s]['model'].predict_proba(X[i:i + 1])[0, 1] for i, s in enumerate(scorer.symbols)]
+    np.testing.assert_allclose(scorer.score(X), expected, rtol=1e-12)
+
+    proba = scorer.score_frames(frames)
+    for seed, (symbol, df) in enumerate(frames.items()):
+        row = latest_feature_row(df, FEATURES)
+        assert proba[symbol] == bundles[symbol]['model'].predict_proba(row[None, :])[0, 1]
+
+def test_latest_feature_row_matches_full_history(make_ohlcv):
+    df = make_ohlcv(1500)
+    full = prepare_features(calculate_indicators(df.copy()))[FEATURES].iloc[-1].to_numpy()
+    np.testing.assert_allclose(latest_feature_row(df, FEATURES), full, rtol=1e-8)
+
+def test_latest_feature_rows_match_one_symbol_at_a_time(make_ohlcv):
+    frames = {'AAA.NS': make_ohlcv(600, 0), 'LATE.NS': make_ohlcv(400, 1, start="2020-06-01"),
+              'NEW.NS': make_ohlcv(40, 2), 'TINY.NS': make_ohlcv(5, 3)}
+    rows = latest_feature_rows(frames)
+    for symbol, df in frames.items():
+        np.testing.assert_allclose(rows.loc[symbol, FEATURES].to_numpy(dtype=float),
+                                   latest_feature_row(df, FEATURES), rtol=1e-9)
+    assert rows.loc['TINY.NS', FEATURES].isna().all()
+
+def test_feature_matrix_from_the_feature_store(tmp_path, make_ohlcv):
+    frames = {f"S{seed}.NS": make_ohlcv(seed=seed) for seed in range(3)}
+    scorer = UniverseScorer({symbol: fit_bundle(df, seed) for seed, (symbol, df) in enumerate(frames.items())})
+    np.testing.assert_allclose(scorer.feature_matrix(frames, FeatureStore(str(tmp_path))),
+                               scorer.feature_matrix(frames), rtol=1e-8)
+
+def test_load_saved_models(tmp_path, make_ohlcv):
+    df = make_ohlcv()
+    save_model(fit_bundle(df, 0), "AAA.NS", model_dir=str(tmp_path))
+    scorer = UniverseScorer.load(model_dir=str(tmp_path))
+    assert scorer.symbols == ["AAA.NS"]
+    assert 0 <= scorer.score_frames({"AAA.NS": df})["AAA.NS"] <= 1
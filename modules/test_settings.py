@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import main
+from modules.data_fetcher import save_cache
+from modules.settings import Universe, load_settings
+from modules.strategy import SIGNAL_PARAMS
+
+def write_universe(path, symbols):
+    path.write_text("SYMBOL,NAME OF COMPANY\n" + "".join(f"{s},{s} Ltd\n" for s in symbols))
+    return path
+
+def test_toml_settings_with_a_csv_universe(tmp_path):
+    write_universe(tmp_path / "equity.csv", ["AAA", "BBB", "CCC"])
+    (tmp_path / "settings.toml").write_text(
+        'universe = "equity.csv"\nuniverse_column = "symbol"\nsymbol_suffix = ".NS"\n'
+        'initial_capital = 50000\nfill_model = "nse_delivery"\n[signals]\nrsi_buy = 30\n')
+    settings = load_settings(str(tmp_path / "settings.toml"))
+    assert isinstance(settings['universe'], Universe)
+    assert list(settings['universe']) == ["AAA.NS", "BBB.NS", "CCC.NS"]
+    assert len(settings['universe']) == 3
+    assert settings['initial_capital'] == 50000 and settings['signals'] == {'rsi_buy': 30}
+
+def test_yaml_and_csv_settings(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "settings.yaml").write_text("universe: [AAA.NS, BBB.NS]\nchunk_size: 1\n")
+    settings = load_settings(str(tmp_path / "settings.yaml"))
+    assert list(settings['universe'].chunks(1)) == [["AAA.NS"], ["BBB.NS"]]
+
+    csv_path = write_universe(tmp_path / "symbols.csv", ["AAA.NS"])
+    assert list(load_settings(str(csv_path))['universe']) == ["AAA.NS"]
+
+def test_every_problem_is_reported_at_once(tmp_path):
+    write_universe(tmp_path / "equity.csv", ["AAA", "bad symbol", "AAA"])
+    (tmp_path / "settings.toml").write_text(
+        'universe = "equity.csv"\nchunk_size = 0\ntrain_mode = "daily"\nmax_wrokers = 2\n'
+        '[signals]\nrsi_buy = "low"\n')
+    with pytest.raises(ValueError) as e:
+        load_settings(str(tmp_path / "settings.toml"))
+    message = str(e.value)
+    for problem in ("'chunk_size' must be", "'train_mode' must be", "unknown setting 'max_wrokers'",
+                    "'signals' must be", "equity.csv:3: invalid symbol 'bad symbol'",
+                    "equity.csv:4: duplicate symbol 'AAA'"):
+        assert problem in message
+
+    (tmp_path / "missing.toml").write_text('universe = "nowhere.csv"\n')
+    with pytest.raises(ValueError, match="nowhere.csv"):
+        load_settings(str(tmp_path / "missing.toml"))
+
+def test_universe_chunks_stream_in_file_order(tmp_path):
+    symbols = [f"S{i:03d}.NS" for i in range(25)]
+    universe = Universe(path=str(write_universe(tmp_path / "u.csv", symbols)), column="SYMBOL")
+    chunks = list(universe.chunks(10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert sum(chunks, []) == symbols
+    assert universe.validate() == [] and len(universe) == 25
+
+def test_apply_settings_drives_an_offline_run(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    for name in ("UNIVERSE", "CHUNK_SIZE", "OFFLINE_MODE", "INITIAL_CAPITAL", "TRADE_DB",
+                 "METRICS_DIR", "ROBUSTNESS_PATHS", "FEATURE_STORE", "MEMO_CACHE"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    monkeypatch.setattr(main, "SIGNAL_PARAMS", SIGNAL_PARAMS)
+    for key, value in SIGNAL_PARAMS.items():
+        monkeypatch.setitem(SIGNAL_PARAMS, key, value)
+    for seed, symbol in enumerate(["AAA.NS", "BBB.NS", "CCC.NS"]):
+        save_cache(symbol, make_ohlcv(seed=seed), period="5y")
+    write_universe(tmp_path / "equity.csv", ["AAA", "BBB", "CCC"])
+    (tmp_path / "settings.toml").write_text(
+        'universe = "equity.csv"\nsymbol_suffix = ".NS"\nchunk_size = 2\noffline_mode = true\n'
+        'robustness_paths = 0\nfeature_store = false\nmemo_cache = false\n[signals]\nrsi_buy = 36\n')
+
+    main.apply_settings(str(tmp_path / "settings.toml"))
+    assert main.CHUNK_SIZE == 2 and main.OFFLINE_MODE and SIGNAL_PARAMS['rsi_buy'] == 36
+    main.run_strategy()
+    summary = pd.read_csv(tmp_path / "data" / "all_trades_summary.csv")
+    assert set(summary['symbol']) <= {"AAA.NS", "BBB.NS", "CCC.NS"} and len(summary) > 0
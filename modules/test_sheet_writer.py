@@ -0,0 +1,77 @@
+import pandas as pd
+
+from modules import gsheet
+from modules.gsheet import (GSpreadBackend, MemoryBackend, SheetWriter, TRADE_HEADERS,
+                            log_model_accuracy, log_summary_to_sheet, log_trades_to_sheet)
+
+def make_trades(symbol, n):
+    entry = pd.bdate_range("2024-01-01", periods=n)
+    return pd.DataFrame({
+        'entry_date': entry, 'entry_price': 100.0, 'position': 10,
+        'exit_date': entry + pd.Timedelta(days=3), 'exit_price': 101.5,
+        'pnl': [15.0 if i % 2 else -5.0 for i in range(n)], 'symbol': symbol,
+        'holding_days': 3, 'return_pct': 1.5
+    })
+
+def test_rows_are_buffered_until_flush():
+    backend = MemoryBackend()
+    writer = SheetWriter(backend=backend)
+    for symbol, n in [('AAA.NS', 3), ('BBB.NS', 2)]:
+        log_trades_to_sheet(make_trades(symbol, n), symbol, None, writer=writer)
+        log_model_accuracy(symbol, 0.55, None, writer=writer)
+    log_summary_to_sheet(pd.concat([make_trades('AAA.NS', 3), make_trades('BBB.NS', 2)]), None, writer=writer)
+    assert backend.calls == []
+    assert writer.pending_rows() == {'TradeLog': 5, 'MLResults': 2}
+
+    writer.flush()
+    assert sorted(backend.calls) == [('append_rows', 'MLResults', 2),
+                                     ('append_rows', 'TradeLog', 5),
+                                     ('replace', 'Summary', 9)]
+    assert backend.worksheets['TradeLog'][0] == TRADE_HEADERS
+    assert backend.worksheets['TradeLog'][1][:3] == ['2024-01-01', 100.0, 10]
+    assert backend.worksheets['MLResults'][-1] == ['BBB.NS', '55.00%']
+    assert dict(backend.worksheets['Summary'][1:])['Total Trades'] == 5
+    assert writer.row_counts == {'TradeLog': 6, 'MLResults': 3, 'Summary': 9}
+    assert writer.pending_rows() == {}
+
+def test_failed_worksheet_keeps_its_rows():
+    class FlakyBackend(MemoryBackend):
+        def append_rows(self, title, headers, rows):
+            if title == 'TradeLog':
+                raise RuntimeError("quota exceeded")
+            return super().append_rows(title, headers, rows)
+
+    writer = SheetWriter(backend=FlakyBackend())
+    writer.add_trades(make_trades('AAA.NS', 2), 'AAA.NS')
+    writer.add_model_accuracy('AAA.NS', 0.6)
+    writer.flush()
+    assert writer.pending_rows() == {'TradeLog': 2}
+
+def test_gspread_backend_reuses_client_and_tracks_rows(monkeypatch):
+    class FakeWorksheet:
+        def __init__(self):
+            self.rows = 1
+            self.reads = 0
+
+        def append_rows(self, rows):
+            first = self.rows + 1
+            self.rows += len(rows)
+            return {'updates': {'updatedRange': f"TradeLog!A{first}:I{self.rows}"}}
+
+        def get_all_values(self):
+            self.reads += 1
+            return [[]] * self.rows
+
+    worksheet = FakeWorksheet()
+    opened = []
+    monkeypatch.setattr(gsheet, "get_sheet_client", lambda sid: opened.append(sid) or object())
+    monkeypatch.setattr(gsheet, "create_worksheet_if_not_exists", lambda sheet, title, headers: worksheet)
+
+    writer = SheetWriter(backend=GSpreadBackend("sheet-id"))
+    writer.add_trades(make_trades('AAA.NS', 4), 'AAA.NS')
+    writer.flush()
+    writer.add_trades(make_trades('BBB.NS', 2), 'BBB.NS')
+    writer.flush()
+    assert opened == ["sheet-id"]
+    assert writer.row_counts['TradeLog'] == 7
+    assert worksheet.reads == 0
@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from modules.strategy import IncrementalIndicators, calculate_indicators, generate_signals
+
+COLUMNS = ['rsi', 'ma20', 'ma50', 'macd', 'signal']
+
+def make_closes(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({'close': close}, index=pd.bdate_range("2020-01-01", periods=n))
+
+def test_incremental_matches_batch_after_warmup():
+    df = make_closes()
+    batch = generate_signals(calculate_indicators(df.copy()))
+    engine = IncrementalIndicators()
+    rows = pd.DataFrame([engine.update(close) for close in df['close']], index=df.index)
+
+    warm = IncrementalIndicators.RSI_PERIOD - 1
+    np.testing.assert_allclose(rows[COLUMNS].iloc[warm:], batch[COLUMNS].iloc[warm:], rtol=1e-9)
+    assert (rows['buy_signal'].iloc[warm:] == batch['buy_signal'].iloc[warm:]).all()
+    assert (rows['sell_signal'].iloc[warm:] == batch['sell_signal'].iloc[warm:]).all()
+    assert rows['rsi'].iloc[:warm].isna().all()
+
+def test_running_sums_do_not_drift():
+    # Large prices early on leave rounding error in running sums
+    closes = make_closes(20 * IncrementalIndicators.RESUM_EVERY)['close'].to_numpy()
+    closes[:2000] *= 1e4
+    engine = IncrementalIndicators()
+    for close in closes:
+        values = engine.update(close)
+
+    batch = calculate_indicators(pd.DataFrame({'close': closes}))
+    np.testing.assert_allclose([values[col] for col in COLUMNS], batch[COLUMNS].iloc[-1], rtol=1e-9)
+    for name, (window, _) in IncrementalIndicators.MA_WINDOWS.items():
+        assert values[name] == math.fsum(closes[-window:]) / window
+
+def test_state_round_trip(tmp_path):
+    closes = make_closes(300)['close'].to_numpy()
+    engine = IncrementalIndicators.from_history(closes[:200])
+    engine.save(tmp_path / "state.json")
+    restored = IncrementalIndicators.load(tmp_path / "state.json")
+
+    for close in closes[200:]:
+        assert restored.update(close) == engine.update(close)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from modules.backtester import simulate_trades, EXIT_STOP
+from modules.strategy import IncrementalIndicators
+from modules.streaming import (BarAggregator, StreamingRunner, read_events, replay_file,
+                               serve_replay, socket_feed, write_replay)
+
+def make_minute_bars(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return pd.DataFrame({
+        'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+        'volume': rng.integers(100, 1000, n).astype(float)
+    }, index=pd.date_range("2024-01-01 09:15", periods=n, freq="min", name='Date'))
+
+def test_aggregator_builds_bars_from_trades():
+    minute = 60 * 10**9
+    trades = [(0, 'A', 10.0, 1), (5, 'B', 20.0, 2), (20, 'A', 12.0, 3), (40, 'A', 9.0, 1),
+              (minute + 1, 'A', 11.0, 5)]
+    agg = BarAggregator("1min")
+    done = []
+    for seconds, symbol, price, size in trades:
+        ts = seconds * 10**9 if seconds < minute else seconds
+        done.extend(agg.add({'ts': ts, 'symbol': symbol, 'price': price, 'size': size}))
+
+    # The first trade of the next minute closes every symbol's bar
+    assert done == [
+        {'ts': 0, 'symbol': 'A', 'open': 10.0, 'high': 12.0, 'low': 9.0, 'close': 9.0, 'volume': 5},
+        {'ts': 0, 'symbol': 'B', 'open': 20.0, 'high': 20.0, 'low': 20.0, 'close': 20.0, 'volume': 2},
+    ]
+    assert agg.flush() == [{'ts': minute, 'symbol': 'A', 'open': 11.0, 'high': 11.0, 'low': 11.0,
+                            'close': 11.0, 'volume': 5}]
+
+def test_orders_follow_backtester_rules():
+    df = make_minute_bars()
+    runner = StreamingRunner()
+    for ts, close in zip(df.index.asi8, df['close']):
+        runner.on_event('bar', {'ts': ts, 'symbol': 'A', 'close': close})
+
+    engine = IncrementalIndicators()
+    signals = [engine.update(c) for c in df['close']]
+    expected = simulate_trades(df['close'].to_numpy(), [s['buy_signal'] for s in signals],
+                               [s['sell_signal'] for s in signals])
+    buys = [o for o in runner.orders if o['side'] == 'BUY']
+    sells = [o for o in runner.orders if o['side'] == 'SELL']
+    assert [o['ts'] for o in buys] == df.index.asi8[expected['entry_idx']].tolist()
+    # simulate_trades closes an open position on the last bar; the stream keeps it open
+    closed = len(sells)
+    assert [o['ts'] for o in sells] == df.index.asi8[expected['exit_idx'][:closed]].tolist()
+    assert [o['reason'] == 'stop' for o in sells] == \
+        (expected['exit_reason'][:closed] == EXIT_STOP).tolist()
+    assert len(runner.latencies) == len(df)
+
+def test_replay_file_and_socket_feed_agree(tmp_path):
+    frames = {f"S{i}.NS": make_minute_bars(300, seed=i) for i in range(3)}
+    path = str(tmp_path / "replay.csv")
+    assert write_replay(path, frames) == 900
+
+    from_file = StreamingRunner().run(replay_file(path))
+    assert from_file
+
+    thread, port = serve_replay(path)
+    runner = StreamingRunner()
+    assert runner.run(socket_feed("127.0.0.1", port)) == from_file
+    thread.join(5)
+
+    report = runner.latency_report()
+    assert report['events'] == report['bars'] == 900
+    assert report['orders'] == len(from_file)
+    assert report['p50_us'] <= report['p99_us'] <= report['max_us']
+
+def test_trade_feed_with_iso_timestamps():
+    lines = ["ts,symbol,price,size",
+             "2024-01-01 09:15:01,A,100,1",
+             "2024-01-01 09:15:30,A,101,2",
+             "2024-01-01 09:16:00,A,99,1"]
+    runner = StreamingRunner()
+    runner.run(read_events(lines))
+    assert runner.bars == 2
+    assert runner.engines['A'].prev_close == 99.0
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.backtester import backtest_strategy
+from modules.strategy import calculate_indicators, generate_signals
+from modules.sweep import _moving_averages, expand_grid, run_sweep
+
+def test_default_parameters_reproduce_backtest(make_ohlcv):
+    frames = {f"S{seed}.NS": make_ohlcv(800, seed) for seed in range(3)}
+    table = run_sweep(frames, {})
+    assert len(table) == 1
+
+    trades = [backtest_strategy(generate_signals(calculate_indicators(df.copy())), symbol, 100000)
+              for symbol, df in frames.items()]
+    trades = pd.concat(trades)
+    assert table.loc[0, 'pnl'] == pytest.approx(trades['pnl'].sum())
+    assert table.loc[0, 'trades'] == len(trades)
+    assert table.loc[0, 'win_rate'] == pytest.approx((trades['pnl'] > 0).mean())
+
+def test_grid_is_ranked_and_matches_single_runs(make_ohlcv):
+    frames = {"A.NS": make_ohlcv(800, 1), "B.NS": make_ohlcv(800, 2)}
+    grid = {'rsi_buy': [30, 35, 40], 'ma_short': [10, 20], 'stop_loss_pct': [0.03, 0.05]}
+    table = run_sweep(frames, grid, n_jobs=2)
+    assert len(table) == len(expand_grid(grid)) == 12
+    assert table['pnl'].is_monotonic_decreasing
+    assert list(table['rank']) == list(range(1, 13))
+
+    best = table.iloc[0]
+    single = run_sweep(frames, {name: [best[name]] for name in grid})
+    assert single.loc[0, 'pnl'] == pytest.approx(best['pnl'])
+
+def test_moving_averages_share_the_indicator_warm_up(make_ohlcv):
+    ind = calculate_indicators(make_ohlcv(800))
+    slot, matrix = _moving_averages(ind['close'], [10, 20, 50])
+    np.testing.assert_allclose(matrix[slot[20]], ind['ma20'])
+    np.testing.assert_allclose(matrix[slot[50]], ind['ma50'])
+    # A 10-bar average needs 2 bars, and the first bar is back-filled from them
+    assert matrix[slot[10]][0] == pytest.approx(ind['close'].iloc[:2].mean())
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        expand_grid({'rsi_typo': [30]})
@@ -0,0 +1,100 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from modules.backtester import backtest_strategy
+from modules.fills import FillModel
+from modules.trade_store import SCHEMA, TradeStore, params_hash
+
+def make_signals(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+    return pd.DataFrame({
+        'close': close,
+        'buy_signal': rng.random(n) < 0.1,
+        'sell_signal': rng.random(n) < 0.05
+    }, index=pd.bdate_range("2021-01-01", periods=n, name='Date'))
+
+def trade_logs():
+    logs = {f"S{seed}.NS": backtest_strategy(make_signals(seed=seed), f"S{seed}.NS", 100000)
+            for seed in range(4)}
+    assert any((log['stop_loss'] == True).any() for log in logs.values())
+    assert any('open_at_end' in log.columns for log in logs.values())
+    return logs
+
+def test_round_trip_matches_trade_logs(tmp_path):
+    logs = trade_logs()
+    with TradeStore(str(tmp_path / "trades.db")) as store:
+        run_id = store.start_run({'rsi_buy': 35})
+        for symbol, log in logs.items():
+            store.add_trades(run_id, symbol, log)
+
+        expected = pd.concat(logs.values(), ignore_index=True)
+        pdt.assert_frame_equal(store.query(run_id=run_id), expected)
+
+        path = tmp_path / "all_trades_summary.csv"
+        store.export_csv(str(path), run_id=run_id)
+        expected_path = tmp_path / "expected.csv"
+        expected.to_csv(expected_path, index=False)
+        assert path.read_text() == expected_path.read_text()
+
+def test_filters_and_sql_summary(tmp_path):
+    logs = trade_logs()
+    with TradeStore(str(tmp_path / "trades.db")) as store:
+        first = store.start_run({'rsi_buy': 35})
+        second = store.start_run({'rsi_buy': 30})
+        for run_id in (first, second):
+            for symbol, log in logs.items():
+                store.add_trades(run_id, symbol, log)
+        # Stored trades are never rewritten: writing a symbol again adds nothing
+        assert store.add_trades(first, "S0.NS", logs["S0.NS"]) == 0
+        with pytest.raises(ValueError):
+            store.start_run({'rsi_buy': 1}, run_id=first)
+
+        one = store.query(run_id=first, symbol="S1.NS")
+        pdt.assert_frame_equal(one, logs["S1.NS"][one.columns])
+
+        start = pd.Timestamp("2021-06-01")
+        dated = store.query(symbol=["S0.NS", "S2.NS"], params_hash=params_hash({'rsi_buy': 30}),
+                            start=start)
+        expected = pd.concat([logs["S0.NS"], logs["S2.NS"]])
+        assert len(dated) == (expected['entry_date'] >= start).sum()
+
+        summary = store.summary(by="symbol", run_id=first).set_index('symbol')
+        for symbol, log in logs.items():
+            assert summary.loc[symbol, 'trades'] == len(log)
+            assert summary.loc[symbol, 'total_pnl'] == pytest.approx(log['pnl'].sum())
+            assert summary.loc[symbol, 'win_rate'] == pytest.approx((log['pnl'] > 0).mean())
+
+        by_params = store.summary(by="params_hash")
+        assert len(by_params) == 2 and by_params['trades'].nunique() == 1
+        assert len(store.runs()) == 2
+
+        with pytest.raises(ValueError):
+            store.summary(by="pnl")
+        with pytest.raises(KeyError):
+            store.add_trades("missing", "S0.NS", logs["S0.NS"])
+
+def test_fill_costs_are_kept(tmp_path):
+    path = str(tmp_path / "trades.db")
+    # A store created before the cost columns existed
+    old_schema = SCHEMA.replace(",\n    costs        REAL,\n    entry_costs  REAL", "")
+    assert old_schema != SCHEMA
+    with sqlite3.connect(path) as conn:
+        conn.executescript(old_schema)
+
+    signals = make_signals()
+    signals = signals.assign(open=signals['close'], low=signals['close'] * 0.99,
+                             volume=1e6)
+    log = backtest_strategy(signals, "S0.NS", 100000, fill_model=FillModel.preset("nse_delivery"))
+    assert (log['costs'] > 0).all()
+    with TradeStore(path) as store:
+        run_id = store.start_run()
+        store.add_trades(run_id, "S0.NS", log)
+        pdt.assert_frame_equal(store.query(run_id=run_id), log)
+
+        with pytest.raises(ValueError):
+            store.add_trades(run_id, "S1.NS", log.assign(slippage=0.0))
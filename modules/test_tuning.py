@@ -0,0 +1,46 @@
+import numpy as np
+
+from modules.ml_model import prepare_features, walk_forward_splits
+from modules.pipeline import process_symbol
+from modules.strategy import calculate_indicators
+from modules.tuning import load_best_params, sample_candidates, successive_halving, tune_symbol
+
+SMALL_SPACE = {'n_estimators': [10, 20], 'max_depth': [2, None], 'min_samples_leaf': [1, 10]}
+
+def test_purged_and_embargoed_splits():
+    for window in ("expanding", "rolling"):
+        for train, test in walk_forward_splits(1000, 4, window, min_train=200, purge=1, embargo=5):
+            assert test.start - train.stop == 6
+            if window == "rolling":
+                assert train.stop - train.start == min(200, train.stop)
+
+def test_successive_halving_prunes_and_reuses_folds():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 4))
+    y = (X[:, 0] + rng.normal(0, 0.5, 600) > 0).astype(int)
+    candidates = sample_candidates(SMALL_SPACE, n_candidates=8)
+    splits = walk_forward_splits(600, 9, min_train=150, purge=1)
+
+    best, scores, rungs = successive_halving(X, y, candidates, splits, eta=3, n_jobs=1)
+    assert [r['candidates'] for r in rungs] == [8, 3, 1]
+    assert [r['folds'] for r in rungs] == [1, 3, 9]
+    # Survivors only fit the folds they had not been scored on
+    assert [r['fits'] for r in rungs] == [8, 6, 6]
+    assert len(scores[best]) == 9
+
+def test_best_config_is_saved_and_used_for_training(tmp_path, monkeypatch, make_ohlcv):
+    monkeypatch.chdir(tmp_path)
+    df = make_ohlcv(900)
+    ml_df = prepare_features(calculate_indicators(df.copy()))
+
+    record = tune_symbol(ml_df, 'AAA.NS', space=SMALL_SPACE, n_candidates=8, n_splits=3, n_jobs=1)
+    assert record['params'] in sample_candidates(SMALL_SPACE, 8)
+    assert load_best_params('AAA.NS') == record['params']
+    assert load_best_params('AAA.NS', features=['rsi', 'macd']) is None
+
+    calls = []
+    import modules.pipeline as pipeline
+    real = pipeline.train_model
+    monkeypatch.setattr(pipeline, 'train_model', lambda d, p=None: calls.append(p) or real(d, p))
+    assert process_symbol('AAA.NS', df, 100000)['status'] == 'ok'
+    assert calls == [record['params']]
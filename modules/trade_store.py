@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+TRADE_DB = os.path.join("data", "trades.db")
+TRADE_COLUMNS = ['entry_date', 'entry_price', 'position', 'stop_loss', 'exit_date',
+                 'exit_price', 'pnl', 'costs', 'entry_costs', 'open_at_end', 'symbol',
+                 'holding_days', 'return_pct']
+# Trade-log columns only present in some logs (costs: with a fill model)
+OPTIONAL_COLUMNS = ['costs', 'entry_costs', 'open_at_end']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  INTEGER NOT NULL,
+    params_hash TEXT NOT NULL,
+    params      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    run_id       TEXT NOT NULL,
+    symbol       TEXT NOT NULL,
+    params_hash  TEXT NOT NULL,
+    entry_date   INTEGER NOT NULL,
+    entry_price  REAL NOT NULL,
+    position     INTEGER NOT NULL,
+    stop_price   REAL,
+    stop_hit     INTEGER NOT NULL,
+    exit_date    INTEGER NOT NULL,
+    exit_price   REAL NOT NULL,
+    pnl          REAL NOT NULL,
+    open_at_end  INTEGER NOT NULL,
+    holding_days INTEGER,
+    return_pct   REAL,
+    costs        REAL,
+    entry_costs  REAL
+);
+CREATE INDEX IF NOT EXISTS trades_by_run ON trades (run_id, symbol);
+CREATE UNIQUE INDEX IF NOT EXISTS trades_unique ON trades (run_id, symbol, entry_date);
+CREATE INDEX IF NOT EXISTS trades_by_symbol ON trades (symbol, entry_date);
+CREATE INDEX IF NOT EXISTS trades_by_params ON trades (params_hash);
+"""
+# Columns added to the trades table after it was first released
+ADDED_COLUMNS = {'costs': 'REAL', 'entry_costs': 'REAL'}
+STORED_COLUMNS = ['run_id', 'symbol', 'params_hash', 'entry_date', 'entry_price', 'position',
+                  'stop_price', 'stop_hit', 'exit_date', 'exit_price', 'pnl', 'open_at_end',
+                  'holding_days', 'return_pct', 'costs', 'entry_costs']
+
+def params_hash(params):
+    """Short stable hash of a strategy parameter dict"""
+    blob = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+def _to_ns(dates):
+    return pd.DatetimeIndex(dates).values.astype('datetime64[ns]').view(np.int64)
+
+def _where(run_id=None, symbol=None, params_hash=None, start=None, end=None):
+    """SQL filter on trades; symbol may be a list, start/end bound entry_date"""
+    clauses, args = [], []
+    if run_id is not None:
+        clauses.append("run_id = ?")
+        args.append(run_id)
+    if symbol is not None:
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        clauses.append(f"symbol IN ({','.join('?' * len(symbols))})")
+        args.extend(symbols)
+    if params_hash is not None:
+        clauses.append("params_hash = ?")
+        args.append(params_hash)
+    if start is not None:
+        clauses.append("entry_date >= ?")
+        args.append(int(_to_ns([start])[0]))
+    if end is not None:
+        clauses.append("entry_date <= ?")
+        args.append(int(_to_ns([end])[0]))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+class TradeStore:
+    """Append-only SQLite store of trade logs keyed by run, symbol and parameters
+
+    Nothing stored is rewritten: a run id can be registered once, and a
+    trade (run, symbol, entry date) written again is skipped.
+
+    Dates are stored as int64 nanoseconds and the loop engine's mixed
+    stop_loss column (stop price, or True once hit) is split into stop_price
+    and stop_hit, so every column is typed. A fill model's costs and
+    entry_costs are kept (NULL for logs without them). query() rebuilds the trade-log
+    layout backtest_strategy returns; summary() aggregates in SQL without
+    loading the trades.
+    """
+    def __init__(self, path=TRADE_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(trades)")}
+        with self.conn:
+            for name, kind in ADDED_COLUMNS.items():
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE trades ADD COLUMN {name} {kind}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, params=None, run_id=None):
+        """Register a run and return its id; ValueError if run_id is already taken"""
+        run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO runs VALUES (?, ?, ?, ?)",
+                    (run_id, time.time_ns(), params_hash(params),
+                     json.dumps(params or {}, sort_keys=True, default=str)))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Run {run_id} already exists") from None
+        return run_id
+
+    def _run_hash(self, run_id):
+        row = self.conn.execute("SELECT params_hash FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown run: {run_id}")
+        return row[0]
+
+    def add_trades(self, run_id, symbol, trades):
+        """Append a symbol's trade log to a run, returning how many trades were new
+
+        Trades already stored for the run (same symbol and entry date) are
+        skipped, so writing a log again, e.g. from a retried job, adds nothing.
+        Columns the store has no place for raise ValueError rather than being
+        dropped.
+        """
+        unknown = set(trades.columns) - set(TRADE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Trade columns the store cannot keep: {sorted(unknown)}")
+        phash = self._run_hash(run_id)
+        n = len(trades)
+        if 'stop_loss' in trades.columns:
+            stop = trades['stop_loss'].to_numpy(dtype=object)
+            stop_hit = np.array([s is True for s in stop])
+        else:
+            stop = np.full(n, None, dtype=object)
+            stop_hit = np.zeros(n, dtype=bool)
+        stop_price = [None if hit or s is None else float(s) for s, hit in zip(stop, stop_hit)]
+        open_at_end = (trades['open_at_end'].eq(True).to_numpy() if 'open_at_end' in trades.columns
+                       else np.zeros(n, dtype=bool))
+        holding_days = (trades['holding_days'] if 'holding_days' in trades.columns
+                        else (trades['exit_date'] - trades['entry_date']).dt.days)
+        return_pct = (trades['return_pct'] if 'return_pct' in trades.columns
+                      else trades['pnl'] / (trades['entry_price'] * trades['position']) * 100)
+        costs = {name: trades[name].astype(float).tolist() if name in trades.columns else [None] * n
+                 for name in ('costs', 'entry_costs')}
+
+        rows = zip(
+            [run_id] * n, [symbol] * n, [phash] * n,
+            _to_ns(trades['entry_date']).tolist(), trades['entry_price'].astype(float).tolist(),
+            trades['position'].astype(int).tolist(), stop_price, stop_hit.astype(int).tolist(),
+            _to_ns(trades['exit_date']).tolist(), trades['exit_price'].astype(float).tolist(),
+            trades['pnl'].astype(float).tolist(), open_at_end.astype(int).tolist(),
+            holding_days.astype(int).tolist(), return_pct.astype(float).tolist(),
+            costs['costs'], costs['entry_costs'])
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO trades ({', '.join(STORED_COLUMNS)}) "
+                f"VALUES ({','.join('?' * len(STORED_COLUMNS))})", rows)
+            added = self.conn.total_changes - before
+        if added < n:
+            logging.warning(f"⚠️ Skipped {n - added} trades of {symbol} already stored for run {run_id}")
+        return added
+
+    def query(self, run_id=None, symbol=None, params_hash=None, start=None, end=None):
+        """Trades matching the filters, in backtest_strategy's trade-log layout"""
+        where, args = _where(run_id, symbol, params_hash, start, end)
+        df = pd.read_sql_query(
+            "SELECT entry_date, entry_price, position, stop_price, stop_hit, exit_date, exit_price, "
+            "pnl, costs, entry_costs, open_at_end, symbol, holding_days, return_pct FROM trades"
+            f"{where} ORDER BY rowid", self.conn, params=args)
+        if df.empty:
+            return pd.DataFrame()
+
+        for col in ('entry_date', 'exit_date'):
+            df[col] = pd.to_datetime(df[col].to_numpy(dtype='datetime64[ns]'))
+        stop_hit = df['stop_hit'].astype(bool)
+        stop_loss = df['stop_price'].astype(float)
+        if stop_hit.any():
+            stop_loss = stop_loss.astype(object)
+            stop_loss[stop_hit] = True
+        df['stop_loss'] = stop_loss
+        present = {'costs': df['costs'].notna().any(), 'entry_costs': df['entry_costs'].notna().any(),
+                   'open_at_end': df['open_at_end'].any()}
+        if present['open_at_end']:
+            open_at_end = np.full(len(df), np.nan, dtype=object)
+            open_at_end[df['open_at_end'].astype(bool)] = True
+            df['open_at_end'] = open_at_end
+        for col in ('costs', 'entry_costs'):
+            df[col] = df[col].astype(float)
+        return df[[c for c in TRADE_COLUMNS if c not in OPTIONAL_COLUMNS or present[c]]]
+
+    def summary(self, by="symbol", **filters):
+        """Trade count, win rate, average return and total P&L per group, computed in SQL"""
+        groups = [by] if isinstance(by, str) else list(by)
+        for col in groups:
+            if col not in ('run_id', 'symbol', 'params_hash'):
+                raise ValueError(f"Cannot group trades by {col}")
+        where, args = _where(**filters)
+        keys = ", ".join(groups)
+        return pd.read_sql_query(
+            f"SELECT {keys}, COUNT(*) AS trades, AVG(pnl > 0) AS win_rate, "
+            "AVG(return_pct) AS avg_return, SUM(pnl) AS total_pnl, "
+            "AVG(holding_days) AS avg_holding_days "
+            f"FROM trades{where} GROUP BY {keys} ORDER BY {keys}", self.conn, params=args)
+
+    def runs(self):
+        return pd.read_sql_query("SELECT * FROM runs ORDER BY started_at", self.conn)
+
+    def export_csv(self, path, **filters):
+        """Write matching trades as CSV in the legacy trade-log format"""
+        df = self.query(**filters)
+        df.to_csv(path, index=False)
+        logging.info(f"💾 Exported {len(df)} trades to {path}")
+        return len(df)
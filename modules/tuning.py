@@ -0,0 +1,190 @@
+"""Walk-forward hyperparameter search for the per-symbol RandomForest
+
+Run from the repository root to tune symbols from the local cache:
+
+    python -m modules.tuning TATAMOTORS.NS SBIN.NS --offline
+
+The best configuration per symbol is written to models/<symbol>/params.json;
+process_symbol picks it up, so daily runs train with it and skip the search.
+"""
+import os
+import json
+import math
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from itertools import product
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+
+from modules.ml_model import (FEATURES, MODEL_DIR, MODEL_PARAMS, _fit_fold, feature_set_id,
+                              prepare_features, walk_forward_splits)
+
+PARAM_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 4, 8, 16],
+    'min_samples_split': [2, 5, 10, 20],
+    'min_samples_leaf': [1, 5, 20],
+    'max_features': ['sqrt', 0.5, None],
+    'class_weight': [None, 'balanced'],
+}
+PARAMS_FILE = "params.json"
+# Rows between the last training label and the test block: the target looks
+# one bar ahead (purge) and a week of daily bars is left out (embargo)
+PURGE = 1
+EMBARGO = 5
+
+def sample_candidates(space=None, n_candidates=27, seed=0):
+    """Up to n_candidates distinct configurations drawn from the grid"""
+    space = space or PARAM_SPACE
+    grid = [dict(zip(space, values)) for values in product(*space.values())]
+    if len(grid) <= n_candidates:
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in sorted(rng.choice(len(grid), n_candidates, replace=False))]
+
+def _shared_matrix(X, directory):
+    """Dump X once and reopen it memory-mapped so workers map the same pages
+
+    float32 and C order are what the trees use internally, so fits do not
+    make their own converted copy either.
+    """
+    path = os.path.join(directory, "X.mmap")
+    joblib.dump(np.ascontiguousarray(X, dtype=np.float32), path)
+    return joblib.load(path, mmap_mode='r')
+
+def successive_halving(X, y, candidates, splits, eta=3, min_folds=1, n_jobs=-1):
+    """Score candidates on more and more folds, keeping the best 1/eta each rung
+
+    Rung 0 evaluates every candidate on the min_folds most recent folds;
+    each later rung keeps the top ceil(n/eta) by mean accuracy and adds
+    folds (eta times as many) until one candidate is left or all folds are
+    used. Fold scores are cached, so a survivor only fits its new folds.
+    Returns (best index, {index: {fold: accuracy}}, rung summaries).
+    """
+    order = list(range(len(splits)))[::-1]
+    scores = {c: {} for c in range(len(candidates))}
+    alive = list(range(len(candidates)))
+    n_folds = min(min_folds, len(splits))
+    rungs = []
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while True:
+            folds = order[:n_folds]
+            tasks = [(c, f) for c in alive for f in folds if f not in scores[c]]
+            results = parallel(
+                delayed(_fit_fold)(X, y, *splits[f], {**MODEL_PARAMS, **candidates[c]})
+                for c, f in tasks
+            )
+            for (c, f), accuracy in zip(tasks, results):
+                scores[c][f] = accuracy
+
+            means = {c: float(np.mean([scores[c][f] for f in folds])) for c in alive}
+            rungs.append({'candidates': len(alive), 'folds': len(folds), 'fits': len(tasks),
+                          'best': max(means.values())})
+            if len(alive) == 1 or n_folds == len(splits):
+                break
+            keep = max(1, math.ceil(len(alive) / eta))
+            alive = sorted(alive, key=lambda c: -means[c])[:keep]
+            n_folds = min(len(splits), n_folds * eta)
+
+    best = max(alive, key=lambda c: means[c])
+    return best, scores, rungs
+
+def tune_symbol(df, symbol, space=None, n_candidates=27, eta=3, n_splits=9, window="expanding",
+                min_train=250, purge=PURGE, embargo=EMBARGO, n_jobs=-1, seed=0,
+                model_dir=MODEL_DIR):
+    """Search RandomForest settings for one symbol and save the best as JSON
+
+    df is the prepare_features output (or FeatureStore.features). Folds come
+    from walk_forward_splits with purge and embargo; the last row is left out
+    because its target is not known yet. Returns the saved record, or None
+    when there is too little data.
+    """
+    features = [f for f in FEATURES if f in df.columns]
+    data = df.iloc[:-1]
+    splits = walk_forward_splits(len(data), n_splits, window, min_train, purge, embargo)
+    if len(features) < 5 or not splits or splits[0][0].stop - splits[0][0].start < 50:
+        logging.warning(f"⚠️ Insufficient data to tune {symbol}")
+        return None
+
+    candidates = sample_candidates(space, n_candidates, seed)
+    start = time.time()
+    workdir = tempfile.mkdtemp(prefix="tuning_")
+    try:
+        X = _shared_matrix(data[features].to_numpy(), workdir)
+        y = data['target'].to_numpy()
+        best, scores, rungs = successive_halving(X, y, candidates, splits, eta=eta, n_jobs=n_jobs)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    fold_scores = [scores[best][f] for f in sorted(scores[best])]
+    record = {
+        'symbol': symbol,
+        'params': candidates[best],
+        'accuracy': float(np.mean(fold_scores)),
+        'fold_scores': fold_scores,
+        'features': features,
+        'feature_set': feature_set_id(features),
+        'end_date': str(data.index[-1]),
+        'purge': purge,
+        'embargo': embargo,
+        'candidates': len(candidates),
+        'fits': sum(r['fits'] for r in rungs),
+        'rungs': rungs,
+    }
+    path = save_best_params(record, symbol, model_dir)
+    logging.info(f"🎛️ Tuned {symbol}: {record['accuracy']:.2%} with {record['params']} | "
+                 f"{record['fits']} fits in {time.time() - start:.1f}s -> {path}")
+    return record
+
+def save_best_params(record, symbol, model_dir=MODEL_DIR):
+    os.makedirs(os.path.join(model_dir, symbol), exist_ok=True)
+    path = os.path.join(model_dir, symbol, PARAMS_FILE)
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+    return path
+
+def load_best_params(symbol, features=FEATURES, model_dir=MODEL_DIR):
+    """Tuned RandomForest params for a symbol, or None if not tuned for these features"""
+    try:
+        with open(os.path.join(model_dir, symbol, PARAMS_FILE)) as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if record.get('feature_set') != feature_set_id([f for f in FEATURES if f in features]):
+        return None
+    return record['params']
+
+def main(argv=None):
+    from modules.data_fetcher import fetch_data
+    from modules.feature_store import FeatureStore
+    from modules.strategy import calculate_indicators
+
+    parser = argparse.ArgumentParser(description="Tune the RandomForest per symbol")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--period", default="5y")
+    parser.add_argument("--offline", action="store_true", help="read bars from the cache only")
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--splits", type=int, default=9)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--no-feature-store", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = None if args.no_feature_store else FeatureStore()
+    for symbol in args.symbols:
+        df = fetch_data(symbol, period=args.period, offline=args.offline)
+        if df.empty:
+            continue
+        ml_df = store.features(symbol, df) if store else prepare_features(calculate_indicators(df.copy()))
+        tune_symbol(ml_df, symbol, n_candidates=args.candidates, eta=args.eta,
+                    n_splits=args.splits, n_jobs=args.n_jobs)
+
+if __name__ == "__main__":
+    main()